@@ -48,130 +48,185 @@ namespace AygazSmartEnergy.Controllers
             return Ok(lastData);
         }
 
+        // Python ML servisinin JSON ayarları ile uyumlu (camelCase / büyük-küçük harf duyarsız)
+        private static readonly JsonSerializerOptions MlResultJsonOptions = new(JsonSerializerDefaults.Web);
+
+        // Tek sonuç (nesne) veya Python outbox'ının gönderdiği toplu sonuç (dizi) kabul edilir.
         [HttpPost("ml-results")]
-        public async Task<IActionResult> ReceiveMLResults([FromBody] MLResultRequest request)
+        public async Task<IActionResult> ReceiveMLResults([FromBody] JsonElement body)
         {
-            if (request == null || request.DeviceId == 0)
-                return BadRequest("Geçersiz veri");
+            var logger = HttpContext.RequestServices.GetRequiredService<ILogger<EnergyApiController>>();
 
             try
             {
-                var logger = HttpContext.RequestServices.GetRequiredService<ILogger<EnergyApiController>>();
-
-                logger.LogInformation(
-                    "ML sonucu alındı: DeviceId={DeviceId}, ResultType={ResultType}, ProcessedAt={ProcessedAt}",
-                    request.DeviceId, request.ResultType, request.ProcessedAt);
-
-                if (request.ResultType == "anomaly_detection" && request.ResultData.ValueKind != System.Text.Json.JsonValueKind.Null)
+                if (body.ValueKind == JsonValueKind.Array)
                 {
-                    if (request.ResultData.TryGetProperty("anomalies", out var anomalies) && anomalies.ValueKind == System.Text.Json.JsonValueKind.Array)
+                    // Toplu gönderim: her sonuç bağımsız işlenir, hatalı olanlar diğerlerini engellemez
+                    int processed = 0;
+                    var errors = new List<object>();
+                    int index = 0;
+                    foreach (var item in body.EnumerateArray())
                     {
-                        var device = await _context.Devices.FindAsync(request.DeviceId);
-                        if (device == null)
+                        MLResultRequest? itemRequest = null;
+                        string? error;
+                        try
                         {
-                            logger.LogWarning($"ML anomali sonucu için cihaz bulunamadı. DeviceId: {request.DeviceId}");
-                            return BadRequest(new { error = "Cihaz bulunamadı" });
+                            itemRequest = item.ValueKind == JsonValueKind.Object
+                                ? item.Deserialize<MLResultRequest>(MlResultJsonOptions)
+                                : null;
+                            error = await ProcessMLResultAsync(itemRequest, logger);
                         }
-
-                        int alertCount = 0;
-                        foreach (var anomaly in anomalies.EnumerateArray())
+                        catch (Exception ex)
                         {
-                            try
-                            {
-                                var severityValue = anomaly.TryGetProperty("Severity", out var severityPropUpper) 
-                                    ? severityPropUpper.GetDouble() 
-                                    : anomaly.TryGetProperty("severity", out var severityPropLower)
-                                        ? severityPropLower.GetDouble()
-                                        : 0.5;
-                                
-                                var severityLevel = severityValue > 0.8 ? "Critical" 
-                                    : severityValue > 0.6 ? "High" 
-                                    : severityValue > 0.4 ? "Medium" 
-                                    : "Low";
-
-                                // Python ML servisi hem AnomalyType/Description hem anomalyType/description
-                                // şeklinde anahtarlar gönderebileceği için ikisini de dene.
-                                string anomalyType =
-                                    anomaly.TryGetProperty("AnomalyType", out var atUpper)
-                                        ? atUpper.GetString() ?? "Unknown"
-                                        : anomaly.TryGetProperty("anomalyType", out var atLower)
-                                            ? atLower.GetString() ?? "Unknown"
-                                            : "Unknown";
-
-                                string description =
-                                    anomaly.TryGetProperty("Description", out var descUpper)
-                                        ? descUpper.GetString() ?? "ML servisi tarafından anomali tespit edildi"
-                                        : anomaly.TryGetProperty("description", out var descLower)
-                                            ? descLower.GetString() ?? "ML servisi tarafından anomali tespit edildi"
-                                            : "ML servisi tarafından anomali tespit edildi";
-
-                                // Anomali JSON'ını hazırla
-                                var anomalyJson = anomaly.GetRawText();
-
-                                logger.LogInformation($"ML Anomali Alert oluşturuluyor: Type={anomalyType}, Severity={severityLevel}, DeviceId={request.DeviceId}");
-
-                                await _alertService.CreateAlertAsync(
-                                    device.UserId,
-                                    $"ML Anomali: {anomalyType}",
-                                    $"{device.DeviceName} cihazında {description}",
-                                    anomalyType,
-                                    severityLevel,
-                                    device.Id,
-                                    anomalyJson
-                                );
-
-                                alertCount++;
-                                logger.LogInformation($"✓ ML Anomali Alert başarıyla oluşturuldu: Type={anomalyType}, DeviceId={request.DeviceId}");
-                            }
-                            catch (Exception alertEx)
-                            {
-                                logger.LogError(alertEx, $"ML anomali alert'i oluşturulurken hata oluştu. DeviceId: {request.DeviceId}, Anomaly: {anomaly.GetRawText()}");
-                            }
+                            // Tek sonucun hatası (geçersiz JSON, veritabanı hatası) tüm batch'i 500'e çevirmez:
+                            // 5xx yanıtı Python outbox'ında batch'in yeniden gönderilmesine (tekrarlı alert) yol açar.
+                            // Kaydedilemeyen varlıklar sonraki sonucun SaveChanges çağrısına taşınmasın.
+                            logger.LogError(ex, "Toplu ML sonucu işlenemedi: Index={Index}", index);
+                            _context.ChangeTracker.Clear();
+                            error = ex.Message;
                         }
 
-                        if (alertCount > 0)
-                        {
-                            logger.LogInformation($"ML servisi {alertCount} anomali alert'i oluşturdu. DeviceId: {request.DeviceId}");
-                        }
-                    }
-                    else
-                    {
-                        logger.LogDebug($"ML servisi anomali sonucu gönderdi ancak 'anomalies' array'i bulunamadı. DeviceId: {request.DeviceId}");
+                        if (error == null)
+                            processed++;
+                        else
+                            errors.Add(new { index, deviceId = itemRequest?.DeviceId, error });
+                        index++;
                     }
-                }
 
-                // Verimlilik skoru sonuçları için log
-                if (request.ResultType == "efficiency_score" && request.ResultData.ValueKind != System.Text.Json.JsonValueKind.Null)
-                {
-                    logger.LogInformation(
-                        "Verimlilik skoru: DeviceId={DeviceId}, Score={Score}, Level={Level}",
-                        request.DeviceId,
-                        request.ResultData.TryGetProperty("overallScore", out var scoreProp) ? scoreProp.GetDouble() : 0,
-                        request.ResultData.TryGetProperty("efficiencyLevel", out var levelProp) ? levelProp.GetString() : "Unknown");
+                    return Ok(new { message = "ML sonuçları işlendi", processed, failed = errors.Count, errors });
                 }
 
-                await _context.SaveChangesAsync();
+                var request = body.ValueKind == JsonValueKind.Object
+                    ? body.Deserialize<MLResultRequest>(MlResultJsonOptions)
+                    : null;
+                var singleError = await ProcessMLResultAsync(request, logger);
+                if (singleError == "Geçersiz veri")
+                    return BadRequest(singleError);
+                if (singleError != null)
+                    return BadRequest(new { error = singleError });
 
-                // RabbitMQ'ya ML sonuç mesajı gönder
-                _ = _messageBus.PublishAsync(
-                    _rabbitOptions.SensorQueue ?? "sensor-data",
-                    new
-                    {
-                        DeviceId = request.DeviceId,
-                        ResultType = request.ResultType,
-                        ProcessedAt = request.ProcessedAt,
-                        MLServiceVersion = request.MLServiceVersion
-                    });
-
-                return Ok(new { message = "ML sonucu başarıyla işlendi", deviceId = request.DeviceId });
+                return Ok(new { message = "ML sonucu başarıyla işlendi", deviceId = request!.DeviceId });
             }
             catch (Exception ex)
             {
-                var logger = HttpContext.RequestServices.GetRequiredService<ILogger<EnergyApiController>>();
                 logger.LogError(ex, "ML sonucu işlenirken hata oluştu");
                 return StatusCode(500, new { error = "ML sonucu işlenirken hata oluştu" });
             }
         }
+
+        // Tek bir ML sonucunu işler: alert üretir ve RabbitMQ'ya bildirir. Hata yoksa null döner.
+        private async Task<string?> ProcessMLResultAsync(MLResultRequest? request, ILogger logger)
+        {
+            if (request == null || request.DeviceId == 0)
+                return "Geçersiz veri";
+
+            logger.LogInformation(
+                "ML sonucu alındı: DeviceId={DeviceId}, ResultType={ResultType}, ProcessedAt={ProcessedAt}",
+                request.DeviceId, request.ResultType, request.ProcessedAt);
+
+            if (request.ResultType == "anomaly_detection" && request.ResultData.ValueKind != System.Text.Json.JsonValueKind.Null)
+            {
+                if (request.ResultData.TryGetProperty("anomalies", out var anomalies) && anomalies.ValueKind == System.Text.Json.JsonValueKind.Array)
+                {
+                    var device = await _context.Devices.FindAsync(request.DeviceId);
+                    if (device == null)
+                    {
+                        logger.LogWarning($"ML anomali sonucu için cihaz bulunamadı. DeviceId: {request.DeviceId}");
+                        return "Cihaz bulunamadı";
+                    }
+
+                    int alertCount = 0;
+                    foreach (var anomaly in anomalies.EnumerateArray())
+                    {
+                        try
+                        {
+                            var severityValue = anomaly.TryGetProperty("Severity", out var severityPropUpper) 
+                                ? severityPropUpper.GetDouble() 
+                                : anomaly.TryGetProperty("severity", out var severityPropLower)
+                                    ? severityPropLower.GetDouble()
+                                    : 0.5;
+                            
+                            var severityLevel = severityValue > 0.8 ? "Critical" 
+                                : severityValue > 0.6 ? "High" 
+                                : severityValue > 0.4 ? "Medium" 
+                                : "Low";
+
+                            // Python ML servisi hem AnomalyType/Description hem anomalyType/description
+                            // şeklinde anahtarlar gönderebileceği için ikisini de dene.
+                            string anomalyType =
+                                anomaly.TryGetProperty("AnomalyType", out var atUpper)
+                                    ? atUpper.GetString() ?? "Unknown"
+                                    : anomaly.TryGetProperty("anomalyType", out var atLower)
+                                        ? atLower.GetString() ?? "Unknown"
+                                        : "Unknown";
+
+                            string description =
+                                anomaly.TryGetProperty("Description", out var descUpper)
+                                    ? descUpper.GetString() ?? "ML servisi tarafından anomali tespit edildi"
+                                    : anomaly.TryGetProperty("description", out var descLower)
+                                        ? descLower.GetString() ?? "ML servisi tarafından anomali tespit edildi"
+                                        : "ML servisi tarafından anomali tespit edildi";
+
+                            // Anomali JSON'ını hazırla
+                            var anomalyJson = anomaly.GetRawText();
+
+                            logger.LogInformation($"ML Anomali Alert oluşturuluyor: Type={anomalyType}, Severity={severityLevel}, DeviceId={request.DeviceId}");
+
+                            await _alertService.CreateAlertAsync(
+                                device.UserId,
+                                $"ML Anomali: {anomalyType}",
+                                $"{device.DeviceName} cihazında {description}",
+                                anomalyType,
+                                severityLevel,
+                                device.Id,
+                                anomalyJson
+                            );
+
+                            alertCount++;
+                            logger.LogInformation($"✓ ML Anomali Alert başarıyla oluşturuldu: Type={anomalyType}, DeviceId={request.DeviceId}");
+                        }
+                        catch (Exception alertEx)
+                        {
+                            logger.LogError(alertEx, $"ML anomali alert'i oluşturulurken hata oluştu. DeviceId: {request.DeviceId}, Anomaly: {anomaly.GetRawText()}");
+                        }
+                    }
+
+                    if (alertCount > 0)
+                    {
+                        logger.LogInformation($"ML servisi {alertCount} anomali alert'i oluşturdu. DeviceId: {request.DeviceId}");
+                    }
+                }
+                else
+                {
+                    logger.LogDebug($"ML servisi anomali sonucu gönderdi ancak 'anomalies' array'i bulunamadı. DeviceId: {request.DeviceId}");
+                }
+            }
+
+            // Verimlilik skoru sonuçları için log
+            if (request.ResultType == "efficiency_score" && request.ResultData.ValueKind != System.Text.Json.JsonValueKind.Null)
+            {
+                logger.LogInformation(
+                    "Verimlilik skoru: DeviceId={DeviceId}, Score={Score}, Level={Level}",
+                    request.DeviceId,
+                    request.ResultData.TryGetProperty("overallScore", out var scoreProp) ? scoreProp.GetDouble() : 0,
+                    request.ResultData.TryGetProperty("efficiencyLevel", out var levelProp) ? levelProp.GetString() : "Unknown");
+            }
+
+            await _context.SaveChangesAsync();
+
+            // RabbitMQ'ya ML sonuç mesajı gönder
+            _ = _messageBus.PublishAsync(
+                _rabbitOptions.SensorQueue ?? "sensor-data",
+                new
+                {
+                    DeviceId = request.DeviceId,
+                    ResultType = request.ResultType,
+                    ProcessedAt = request.ProcessedAt,
+                    MLServiceVersion = request.MLServiceVersion
+                });
+
+            return null;
+        }
     }
 
     // ML sonuç request modeli
@@ -0,0 +1,112 @@
+"""
+Dashboard grafikleri için saatlik / günlük / aylık toplulaştırma (/aggregate).
+
+Tüm cihazların okumaları tek bir (cihaz, kova) grup koduna indirgenir; kod sıralaması
+üzerinden np.add.reduceat / np.maximum.reduceat ile toplam, ortalama ve tepe değerleri
+tek geçişte hesaplanır (Python döngüsü cihaz ya da kova sayısıyla büyümez).
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+import pandas as pd  # pyright: ignore[reportMissingImports]
+
+# Kova -> datetime64 birimi (kova başlangıcı bu birime yuvarlanarak bulunur)
+INTERVAL_UNITS = {'hour': 'h', 'day': 'D', 'month': 'M'}
+
+DEFAULT_COLUMNS = ('EnergyConsumption', 'PowerConsumption')
+LOAD_COLUMN = 'PowerConsumption'  # Yük faktörü = kova ortalama gücü / kova tepe gücü
+
+
+def local_naive_dates(dates: pd.Series, timezone: Optional[str] = None) -> np.ndarray:
+    """
+    Tarihleri kova hesabı için yerel (timezone) duvar saatine, saat dilimsiz datetime64[ms]'e çevirir.
+
+    Saat dilimsiz tarihler UTC kabul edilir (epoch ms ile gelen tarihler gibi).
+    """
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, utc=True)
+    if getattr(dates.dt, 'tz', None) is None:
+        dates = dates.dt.tz_localize('UTC')
+    if timezone:
+        dates = dates.dt.tz_convert(timezone)
+    return dates.dt.tz_localize(None).to_numpy().astype('datetime64[ms]')
+
+
+def _nullable(values: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    """NaN -> None (JSON null), diğerleri yuvarlanmış float"""
+    return [None if value != value else round(value, digits) for value in values.tolist()]
+
+
+def aggregate(device_ids: Sequence, dates: np.ndarray, columns: Dict[str, np.ndarray],
+              interval: str = 'day') -> Dict[str, Any]:
+    """
+    Okumaları cihaz ve kova bazında toplulaştırır.
+
+    device_ids[i], dates[i] (yerel datetime64), columns[ad][i] -> {
+        'Interval', 'Buckets': [kova başlangıcı ISO, ...],
+        'Devices': {deviceId: {'Count': [...], <sütun>: {'Sum', 'Mean', 'Peak'}, 'LoadFactor': [...]}},
+        'Total': aynı yapı, tüm cihazlar birlikte
+    }
+    Tüm diziler Buckets ile hizalıdır; veri olmayan kovalarda Count 0, diğerleri null.
+    """
+    unit = INTERVAL_UNITS[interval]
+    names = list(columns)
+    if len(dates) == 0:
+        return {'Interval': interval, 'Buckets': [], 'Devices': {}, 'Total': {}}
+
+    device_codes, device_labels = pd.factorize(pd.Series(device_ids, dtype=object), sort=True)
+    bucket_starts = np.asarray(dates, dtype='datetime64[ms]').astype(f'datetime64[{unit}]')
+    buckets, bucket_codes = np.unique(bucket_starts, return_inverse=True)
+    n_devices, n_buckets = len(device_labels), len(buckets)
+
+    # Tek grup kodu: cihaz * kova_sayısı + kova; sıralı koddan grup sınırları
+    group = device_codes.astype(np.int64) * n_buckets + bucket_codes.reshape(-1)
+    order = np.argsort(group, kind='stable')
+    sorted_group = group[order]
+    starts = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]])
+    present = sorted_group[starts]
+    counts = np.diff(np.r_[starts, len(sorted_group)])
+
+    values = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in names])[order]
+    grid_shape = (n_devices, n_buckets, len(names))
+    sums = np.zeros(grid_shape).reshape(-1, len(names))
+    peaks = np.full(grid_shape, np.nan).reshape(-1, len(names))
+    sums[present] = np.add.reduceat(values, starts, axis=0)
+    peaks[present] = np.maximum.reduceat(values, starts, axis=0)
+    count_grid = np.zeros(n_devices * n_buckets, dtype=np.int64)
+    count_grid[present] = counts
+
+    sums = sums.reshape(grid_shape)
+    peaks = peaks.reshape(grid_shape)
+    count_grid = count_grid.reshape(n_devices, n_buckets)
+
+    load_index = names.index(LOAD_COLUMN) if LOAD_COLUMN in names else 0
+
+    def series(count: np.ndarray, total: np.ndarray, peak: np.ndarray) -> Dict[str, Any]:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count[:, None] > 0, total / count[:, None], np.nan)
+            load = np.where(peak[:, load_index] > 0, mean[:, load_index] / peak[:, load_index], np.nan)
+        result: Dict[str, Any] = {'Count': count.tolist()}
+        for j, name in enumerate(names):
+            result[name] = {
+                'Sum': _nullable(np.where(count > 0, total[:, j], np.nan)),
+                'Mean': _nullable(mean[:, j]),
+                'Peak': _nullable(peak[:, j])
+            }
+        result['LoadFactor'] = _nullable(load)
+        return result
+
+    # Toplam tepe: kovadaki en yüksek tekil okuma (veri olmayan cihaz hücreleri hariç)
+    total_counts = count_grid.sum(axis=0)
+    total_peaks = np.where(total_counts[:, None] > 0,
+                           np.where(count_grid[:, :, None] > 0, peaks, -np.inf).max(axis=0), np.nan)
+
+    return {
+        'Interval': interval,
+        'Buckets': np.datetime_as_string(buckets.astype('datetime64[s]')).tolist(),
+        'Devices': {
+            str(device_id): series(count_grid[d], sums[d], peaks[d])
+            for d, device_id in enumerate(device_labels)
+        },
+        'Total': series(total_counts, sums.sum(axis=0), total_peaks)
+    }
@@ -0,0 +1,161 @@
+"""Eşik tabanlı anomali kuralları için bildirimsel (declarative), vektörel kural motoru."""
+import copy
+import json
+import os
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+# Varsayılan kurallar (tüm cihaz tipleri için)
+# - Above / Below: değer bu eşiğin üstünde / altında ise kural tetiklenir
+# - CriticalAbove / CriticalBelow: bu eşikler aşılırsa CriticalSeverity kullanılır
+# - OnlyPositive: 0 ve negatif değerler geçersiz okuma sayılır, kontrol edilmez
+# - Description: {value} ve kuraldaki alanlar ile biçimlendirilir
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        'AnomalyType': 'HighConsumption',
+        'Feature': 'EnergyConsumption',
+        'Above': 300,
+        'Severity': 0.7,
+        'NormalValue': 200.0,
+        'Description': 'Yüksek enerji tüketimi tespit edildi: {value:.2f} kWh (Eşik: {Above:g} kWh)',
+        'Recommendation': 'Enerji tüketimini optimize etmek için cihaz kullanımını gözden geçirin.'
+    },
+    {
+        'AnomalyType': 'TemperatureAnomaly',
+        'Feature': 'Temperature',
+        'Above': 40,
+        'CriticalAbove': 50,
+        'Severity': 0.7,
+        'CriticalSeverity': 0.9,
+        'NormalValue': 25.0,
+        'Description': 'Yüksek sıcaklık tespit edildi: {value:.2f}°C (Eşik: {Above:g}°C)',
+        'Recommendation': 'Cihazın soğutma sistemini kontrol edin ve havalandırmayı iyileştirin.'
+    },
+    {
+        'AnomalyType': 'VoltageAnomaly',
+        'Feature': 'Voltage',
+        'Below': 200,
+        'Above': 250,
+        'CriticalBelow': 180,
+        'CriticalAbove': 260,
+        'OnlyPositive': True,
+        'Severity': 0.6,
+        'CriticalSeverity': 0.9,
+        'NormalValue': 220.0,
+        'Description': 'Voltaj anomalisi tespit edildi: {value:.2f}V (Normal: {Below:g}-{Above:g}V)',
+        'Recommendation': 'Elektrik şebekesindeki voltaj dalgalanmalarını kontrol edin.'
+    },
+    {
+        'AnomalyType': 'LowPowerFactor',
+        'Feature': 'PowerFactor',
+        'Below': 0.7,
+        'CriticalBelow': 0.5,
+        'OnlyPositive': True,
+        'Severity': 0.6,
+        'CriticalSeverity': 0.8,
+        'NormalValue': 0.85,
+        'Description': 'Düşük güç faktörü tespit edildi: {value:.2f} (Normal: >0.8)',
+        'Recommendation': 'Güç faktörünü iyileştirmek için kompanzasyon sistemini kontrol edin.'
+    }
+]
+
+
+class AnomalyRuleEngine:
+    """
+    Eşik kurallarını tüm satırlar üzerinde NumPy boolean maskeleri olarak değerlendirir.
+
+    Cihaz tipine göre kurallar device_type_overrides ile değiştirilebilir:
+        {"HVAC": {"TemperatureAnomaly": {"Above": 45, "CriticalAbove": 60}},
+         "Lighting": {"HighConsumption": {"Enabled": false}}}
+    Bu yapı ANOMALY_RULES_FILE ile verilen JSON dosyasından da okunabilir:
+        {"Rules": [...varsayılan kuralların yerine...], "DeviceTypes": {...}}
+    """
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None,
+                 device_type_overrides: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None):
+        self.rules = copy.deepcopy(rules if rules is not None else DEFAULT_RULES)
+        self.device_type_overrides = device_type_overrides or {}
+        self._cache: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> 'AnomalyRuleEngine':
+        """JSON kural dosyasından motor oluşturur (dosya yoksa varsayılan kurallar)"""
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config.get('Rules'), config.get('DeviceTypes'))
+
+    def rules_for(self, device_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Cihaz tipi için geçerli (override uygulanmış, etkin) kurallar"""
+        with self._lock:
+            rules = self._cache.get(device_type)
+            if rules is None:
+                overrides = self.device_type_overrides.get(device_type, {}) if device_type else {}
+                rules = []
+                for rule in self.rules:
+                    merged = {**rule, **overrides.get(rule['AnomalyType'], {})}
+                    if merged.get('Enabled', True):
+                        rules.append(merged)
+                self._cache[device_type] = rules
+        return rules
+
+    @staticmethod
+    def _mask(values: np.ndarray, rule: Dict[str, Any], above_key: str, below_key: str) -> np.ndarray:
+        mask = np.zeros(len(values), dtype=bool)
+        if rule.get(above_key) is not None:
+            mask |= values > rule[above_key]
+        if rule.get(below_key) is not None:
+            mask |= values < rule[below_key]
+        return mask
+
+    def evaluate(self, columns: Dict[str, np.ndarray], device_type: Optional[str] = None):
+        """
+        Her kural için (kural, tetiklenen satır indeksleri, o satırların severity değerleri) üretir
+
+        columns: özellik adı -> 1 boyutlu NumPy dizisi
+        """
+        for rule in self.rules_for(device_type):
+            values = columns.get(rule['Feature'])
+            if values is None:
+                continue
+            hit = self._mask(values, rule, 'Above', 'Below')
+            if rule.get('OnlyPositive'):
+                hit &= values > 0
+            rows = np.flatnonzero(hit)
+            if len(rows) == 0:
+                continue
+            critical = self._mask(values[rows], rule, 'CriticalAbove', 'CriticalBelow')
+            severity = np.where(critical, rule.get('CriticalSeverity', rule['Severity']), rule['Severity'])
+            yield rule, rows, severity
+
+    def anomalies_by_row(self, columns: Dict[str, np.ndarray], detected_at, n_rows: int,
+                         device_type: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """Kural sonuçlarını satır bazında anomali listelerine dönüştürür (boş liste = kural tetiklenmedi)"""
+        results: List[List[Dict[str, Any]]] = [[] for _ in range(n_rows)]
+        for i, anomalies in self.anomalies_by_hit_row(columns, detected_at, device_type).items():
+            results[i] = anomalies
+        return results
+
+    def anomalies_by_hit_row(self, columns: Dict[str, np.ndarray], detected_at,
+                             device_type: Optional[str] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """Sadece kural tetiklenen satırlar: {satır: [anomali, ...]} (büyük geçmişte satır başına liste ayrılmaz)"""
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        for rule, rows, severity in self.evaluate(columns, device_type):
+            values = columns[rule['Feature']]
+            for i, sev in zip(rows.tolist(), severity.tolist()):
+                value = float(values[i])
+                results.setdefault(i, []).append({
+                    'DetectedAt': detected_at[i],
+                    'AnomalyType': rule['AnomalyType'],
+                    'Description': rule['Description'].format(value=value, **rule),
+                    'Severity': float(sev),
+                    'NormalValue': float(rule['NormalValue']),
+                    'ActualValue': value,
+                    'Recommendation': rule['Recommendation'],
+                    'DecidedBy': 'rules'
+                })
+        return results
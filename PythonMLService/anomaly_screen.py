@@ -0,0 +1,84 @@
+"""
+Isolation Forest öncesi ucuz istatistiksel tarama (iki aşamalı anomali tespiti).
+
+1. aşama (O(n), vektörel): her özellik için medyan/MAD ile robust z-skoru ve IQR çitleri.
+   - Tarama eşiğini aşmayan satırlar normal kabul edilir (Isolation Forest'a gitmez)
+   - Robust z-skoru decisive_z'yi aşan uç değerler doğrudan anomali (aşama: 'screen')
+   - Aradaki şüpheli satırlar 2. aşamaya gider
+2. aşama: Isolation Forest, tüm satırlardan rastgele bir bağlam örneği ile eğitilir ve sadece
+   şüpheli satırları skorlar (aşama: 'isolation-forest').
+
+Isolation Forest her ağacı zaten 256 satırlık alt örneklemle kurar; bağlam örneği ile eğitim
+modelin kendisini değiştirmez, tüm satırların skorlanmasından (eğitim eşiği + predict +
+decision_function) kaçınılır.
+
+NOT: Tarama özellik bazındadır (tek değişkenli); her özelliği tek tek normal aralıkta olup
+sadece birlikte sıra dışı olan satırlar 2. aşamaya ulaşmaz.
+"""
+from typing import Tuple
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+# Normal dağılımda MAD -> standart sapma ve ortalama mutlak sapma -> standart sapma katsayıları
+MAD_SCALE = 0.6745
+MEAN_AD_SCALE = 1.2533
+
+
+def robust_z_scores(X: np.ndarray) -> np.ndarray:
+    """
+    Satır başına en büyük robust (modifiye) z-skoru: max_j 0.6745 * |x - medyan| / MAD
+
+    MAD = 0 olan özellikte (değerlerin yarısından fazlası aynı) ortalama mutlak sapma kullanılır;
+    o da 0 ise (sabit sütun) medyandan her sapma sonsuz skor alır.
+    """
+    median = np.median(X, axis=0)
+    deviation = np.abs(X - median)
+    mad = np.median(deviation, axis=0)
+    scale = np.where(mad > 0, mad / MAD_SCALE, deviation.mean(axis=0) * MEAN_AD_SCALE)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(scale > 0, deviation / scale, np.where(deviation > 0, np.inf, 0.0))
+    return z.max(axis=1)
+
+
+def outside_iqr_fences(X: np.ndarray, k: float) -> np.ndarray:
+    """Herhangi bir özelliği [Q1 - k*IQR, Q3 + k*IQR] dışında kalan satırlar"""
+    q1, q3 = np.percentile(X, [25, 75], axis=0)
+    iqr = q3 - q1
+    return ((X < q1 - k * iqr) | (X > q3 + k * iqr)).any(axis=1)
+
+
+class AnomalyScreen:
+    """
+    Tarama eşikleri ve 2. aşama için bağlam örneği.
+
+    - z_threshold: robust z-skoru bu değeri aşan satır şüpheli (Iglewicz-Hoaglin: 3.5)
+    - iqr_k: IQR çitinin dışında kalan satır şüpheli (3.0 = "uzak" aykırı değer)
+    - decisive_z: robust z-skoru bu değeri aşan satır Isolation Forest'a sorulmadan anomali
+    - context_size: Isolation Forest'ın eğitildiği rastgele satır sayısı
+    """
+
+    def __init__(self, z_threshold: float = 3.5, iqr_k: float = 3.0, decisive_z: float = 10.0,
+                 context_size: int = 512, random_state: int = 42):
+        self.z_threshold = z_threshold
+        self.iqr_k = iqr_k
+        self.decisive_z = decisive_z
+        self.context_size = context_size
+        self.random_state = random_state
+
+    def screen(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(şüpheli maskesi, kesin anomali maskesi, robust z-skorları); kesin anomaliler şüphelilerin alt kümesi"""
+        z = robust_z_scores(X)
+        suspects = (z > self.z_threshold) | outside_iqr_fences(X, self.iqr_k)
+        decisive = z > self.decisive_z
+        return suspects, decisive, z
+
+    def severity(self, z: np.ndarray) -> np.ndarray:
+        """Tarama kararlı anomaliler için 0-1 şiddet: decisive_z -> 0.5, 2 * decisive_z ve üstü -> 1"""
+        return np.minimum(1.0, z / (2 * self.decisive_z))
+
+    def context_rows(self, n_rows: int) -> np.ndarray:
+        """Isolation Forest eğitimi için tekrarlanabilir rastgele satır örneği (sıralı indeksler)"""
+        if n_rows <= self.context_size:
+            return np.arange(n_rows)
+        rng = np.random.default_rng(self.random_state)
+        return np.sort(rng.choice(n_rows, size=self.context_size, replace=False))
@@ -1,8 +1,8 @@
-from flask import Flask, request, jsonify  # pyright: ignore[reportMissingImports]
+from flask import Flask, request, jsonify, g  # pyright: ignore[reportMissingImports]
+from werkzeug.exceptions import BadRequest  # pyright: ignore[reportMissingImports]
 import pandas as pd  # pyright: ignore[reportMissingImports]
 import numpy as np  # pyright: ignore[reportMissingImports]
 from sklearn.ensemble import IsolationForest  # pyright: ignore[reportMissingImports]
-from sklearn.preprocessing import StandardScaler  # pyright: ignore[reportMissingImports]
 from sklearn.linear_model import LinearRegression  # pyright: ignore[reportMissingImports]
 from sklearn.metrics import mean_absolute_error  # pyright: ignore[reportMissingImports]
 import joblib  # pyright: ignore[reportMissingImports]
@@ -13,53 +13,172 @@ import json
 import requests
 import pika  # pyright: ignore[reportMissingModuleSource]
 import threading
-from typing import Dict, Any, Optional
+import atexit
+import socket
+import time
+from typing import Dict, Any, List, Optional
+from model_registry import AnomalyModelRegistry, FLEET_MODEL_KEY
+from stream_window import DeviceWindowStore
+from device_stats import DeviceStatsStore, DeviceStatsReader, DeviceStatsNotFound
+from timeseries_store import TimeSeriesStore, TimeSeriesNotFound, to_epoch_ms, DAY_MS
+from shared_history import SharedHistoryArena
+from aggregation import aggregate, local_naive_dates, INTERVAL_UNITS, DEFAULT_COLUMNS
+from billing import (
+    Tariff, TariffError, DEFAULT_TARIFF, TIER_PERIOD_DAYS, HOURS,
+    bill_response, flat_profile, profile_from_forecast, profile_from_history, readings_per_hour
+)
+from anomaly_rules import AnomalyRuleEngine
+from anomaly_screen import AnomalyScreen
+from result_cache import ResultCache, FallbackResult, is_cacheable
+from payload_format import to_frame, read_request_payload, PayloadFormatError
+from feature_frame import FeatureFrame
+from rabbit_publisher import ConfirmedPublisher
+import metrics
+from metrics import StageTimer
+from result_outbox import ResultOutbox, DELIVERED as OUTBOX_DELIVERED, RETRY as OUTBOX_RETRY, REJECTED as OUTBOX_REJECTED
+from structured_log import configure_logging, get_logger
 warnings.filterwarnings('ignore')
 
+# Loglar kuyruk üzerinden ayrı thread'de (JSON) yazılır; mesaj başına loglar örneklenir (structured_log.py)
+configure_logging()
+logger = get_logger('app')
+message_log = get_logger('messages')
+
 app = Flask(__name__)
 
 # ML servis (anomali + tahmin) için model klasörü
-MODEL_DIR = 'models'
+MODEL_DIR = os.getenv('MODEL_DIR', 'models')
 if not os.path.exists(MODEL_DIR):
     os.makedirs(MODEL_DIR)
 
+# Diğer worker'ların kaydettiği modellerin kontrol aralığı (saniye, 0 = kapalı)
+MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', '30'))
+
+# Anomali tespiti için kullanılan özellikler (model kayıt defteri de bu sırayı kullanır)
+ANOMALY_FEATURES = ['EnergyConsumption', 'PowerConsumption', 'Temperature',
+                    'Voltage', 'Current', 'PowerFactor']
+
+# Analiz endpoint'leri için sonuç önbelleği (aynı istek gövdesi = aynı sonuç)
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '1024'))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', '300'))  # saniye
+RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', '')  # Boş = disk katmanı kapalı
+
+# Toplu analiz süreç havuzu (varsayılan: çekirdek sayısı kadar süreç)
+BATCH_POOL_WORKERS = int(os.getenv('BATCH_POOL_WORKERS', str(os.cpu_count() or 1)))
+BATCH_POOL_START_METHOD = os.getenv('BATCH_POOL_START_METHOD', 'spawn')
+BATCH_INLINE_THRESHOLD = int(os.getenv('BATCH_INLINE_THRESHOLD', '4'))  # Daha az cihaz varsa havuz kullanılmaz
+
+# Cihaz tipine özel eşik kuralları (JSON, opsiyonel) - format için anomaly_rules.py'ye bakın
+ANOMALY_RULES_FILE = os.getenv('ANOMALY_RULES_FILE')
+
+# İki aşamalı anomali tespiti: robust z / IQR taraması, Isolation Forest sadece şüpheli satırlarda
+ANOMALY_SCREEN_ENABLED = os.getenv('ANOMALY_SCREEN_ENABLED', 'true').lower() == 'true'
+ANOMALY_SCREEN_MIN_ROWS = int(os.getenv('ANOMALY_SCREEN_MIN_ROWS', '1000'))  # Altında tüm satırlar Isolation Forest'a
+ANOMALY_SCREEN_Z = float(os.getenv('ANOMALY_SCREEN_Z', '3.5'))  # Robust z-skoru şüphe eşiği
+ANOMALY_SCREEN_IQR_K = float(os.getenv('ANOMALY_SCREEN_IQR_K', '3.0'))  # IQR çiti katsayısı
+ANOMALY_SCREEN_DECISIVE_Z = float(os.getenv('ANOMALY_SCREEN_DECISIVE_Z', '10'))  # Üstü taramada kesin anomali
+ANOMALY_SCREEN_CONTEXT = int(os.getenv('ANOMALY_SCREEN_CONTEXT', '512'))  # Isolation Forest eğitim örneği
+
+# Akış (consumer) anomali tespiti ayarları
+STREAM_WINDOW_SIZE = int(os.getenv('STREAM_WINDOW_SIZE', '256'))  # Cihaz başına tutulan son okuma sayısı
+STREAM_MIN_WINDOW = int(os.getenv('STREAM_MIN_WINDOW', '32'))  # Isolation Forest için gereken minimum okuma
+STREAM_REFIT_INTERVAL = int(os.getenv('STREAM_REFIT_INTERVAL', '500'))  # Kaç okumada bir model yenilenir
+STREAM_MAX_DEVICES = int(os.getenv('STREAM_MAX_DEVICES', '5000'))  # Bellekte tutulan maksimum cihaz penceresi
+STREAM_AUTO_TRAIN = os.getenv('STREAM_AUTO_TRAIN', 'true').lower() == 'true'  # Cihaz modelini pencereden eğit
+# Akış modelinin beklenen anomali oranı (%1) - her okuma tek tek alert'e dönüşebildiği için
+# HTTP tarafındaki 0.1 değeri burada okumaların ~%10'unu alert'e çevirirdi ('auto' da desteklenir)
+STREAM_CONTAMINATION = os.getenv('STREAM_CONTAMINATION', '0.01')
+if STREAM_CONTAMINATION != 'auto':
+    STREAM_CONTAMINATION = float(STREAM_CONTAMINATION)
+
+# Cihaz bazlı artımlı istatistikler (consumer günceller, HTTP worker'ları snapshot'tan okur)
+DEVICE_STATS_ENABLED = os.getenv('DEVICE_STATS_ENABLED', 'true').lower() == 'true'
+DEVICE_STATS_DIR = os.getenv('DEVICE_STATS_DIR', os.path.join(MODEL_DIR, 'device_stats'))
+DEVICE_STATS_SNAPSHOT_INTERVAL = float(os.getenv('DEVICE_STATS_SNAPSHOT_INTERVAL', '10'))  # Saniye
+DEVICE_STATS_RELOAD_INTERVAL = float(os.getenv('DEVICE_STATS_RELOAD_INTERVAL', '5'))  # Saniye
+DEVICE_STATS_EWMA_ALPHA = float(os.getenv('DEVICE_STATS_EWMA_ALPHA', '0.1'))
+
+# Cihaz bazlı yerel zaman serisi deposu (consumer ekler, endpoint'ler {DeviceId, From, To} ile okur)
+TIMESERIES_ENABLED = os.getenv('TIMESERIES_ENABLED', 'true').lower() == 'true'
+TIMESERIES_DIR = os.getenv('TIMESERIES_DIR', os.path.join(MODEL_DIR, 'timeseries'))
+TIMESERIES_RETENTION_DAYS = int(os.getenv('TIMESERIES_RETENTION_DAYS', '90'))  # 0 = silme
+TIMESERIES_DEFAULT_DAYS = int(os.getenv('TIMESERIES_DEFAULT_DAYS', '30'))  # From verilmezse okunan gün sayısı
+
+# Süreçler arası paylaşılan son okumalar (consumer yazar, tüm worker'lar aynı mmap'i okur)
+SHARED_HISTORY_ENABLED = os.getenv('SHARED_HISTORY_ENABLED', 'true').lower() == 'true'
+SHARED_HISTORY_PATH = os.getenv('SHARED_HISTORY_PATH', '/dev/shm/ml-history.arena')
+SHARED_HISTORY_SLOTS = int(os.getenv('SHARED_HISTORY_SLOTS', '4096'))  # Aynı anda tutulan cihaz sayısı
+SHARED_HISTORY_WINDOW = int(os.getenv('SHARED_HISTORY_WINDOW', str(STREAM_WINDOW_SIZE)))  # Cihaz başına okuma
+
+# Fatura projeksiyonu: istekte Tariff verilmezse kullanılan tarife (JSON dosyası; boş = billing.DEFAULT_TARIFF)
+BILLING_TARIFF_FILE = os.getenv('BILLING_TARIFF_FILE', '')
+
+class IsoDateView:
+    """Tarih serisini sadece erişilen satırlar için ISO formatına çevirir (tüm satırları biçimlendirmez)"""
+    def __init__(self, dates):
+        self._dates = dates
+    
+    def __getitem__(self, i):
+        return self._dates.iloc[i].isoformat()
+    
+    def __len__(self):
+        return len(self._dates)
+
 class EnergyMLService:
     """Enerji yönetimi için ML servisi (IsolationForest + LinearRegression)."""
     def __init__(self):
-        # Veri normalizasyonu için StandardScaler
-        self.scaler = StandardScaler()
+        # Not: Fit edilen tahminciler (LinearRegression / IsolationForest) servis
+        # üzerinde paylaşılmaz; her çağrı kendi örneğini oluşturur. Böylece gthread
+        # worker thread'leri ve consumer thread'i birbirinin fit durumunu ezmez.
+        # Paylaşılan durum sadece değişmez nesnelerdir (kural motoru, kayıtlı modeller).
         
         # Isolation Forest - Anomali Tespiti Algoritması
         # contamination=0.1: %10 anomali beklentisi
         # random_state=42: Tekrarlanabilirlik için
-        self.anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
+        self.anomaly_detector_params = {'contamination': 0.1, 'random_state': 42}
         
-        # Linear Regression - Enerji Tüketimi Tahmini
-        self.energy_predictor = LinearRegression()
+        # Eşik tabanlı anomali kuralları (cihaz tipine göre yapılandırılabilir)
+        self.rule_engine = AnomalyRuleEngine.from_file(ANOMALY_RULES_FILE)
         
-    def predict_energy_consumption(self, historical_data, days_ahead):
-        """Linear Regression ile enerji tüketimi tahmini."""
+        # Isolation Forest öncesi istatistiksel tarama (anomaly_screen.py)
+        self.anomaly_screen = AnomalyScreen(
+            z_threshold=ANOMALY_SCREEN_Z,
+            iqr_k=ANOMALY_SCREEN_IQR_K,
+            decisive_z=ANOMALY_SCREEN_DECISIVE_Z,
+            context_size=ANOMALY_SCREEN_CONTEXT,
+            random_state=self.anomaly_detector_params['random_state']
+        )
+        
+        # Önceden eğitilmiş anomali modelleri (deviceId bazında + filo geneli)
+        # Worker başlarken diskteki modeller yüklenir, istek başına yeniden eğitim yapılmaz
+        self.model_registry = AnomalyModelRegistry(MODEL_DIR, reload_interval=MODEL_RELOAD_INTERVAL)
+        loaded_models = self.model_registry.load_all()
+        if loaded_models:
+            logger.info("✓ %d anomali modeli yüklendi (%s)", loaded_models, MODEL_DIR)
+        
+    def _new_anomaly_detector(self):
+        """Çağrıya özel (paylaşılmayan) Isolation Forest örneği"""
+        return IsolationForest(**self.anomaly_detector_params)
+    
+    def _new_energy_predictor(self):
+        """Çağrıya özel (paylaşılmayan) Linear Regression örneği - Enerji Tüketimi Tahmini"""
+        return LinearRegression()
+    
+    def predict_energy_consumption(self, historical_data, days_ahead, return_series=False, resolution='daily'):
+        """
+        Linear Regression ile enerji tüketimi tahmini.
+        
+        return_series=True: 1..days_ahead arasındaki tüm günlerin tahmini 'Series' alanında döner
+        resolution='hourly': ayrıca her günün 24 saatlik tahmini 'HourlySeries' alanında döner
+        """
+        timer = StageTimer('predict-energy')
         try:
-            # 1. VERİ HAZIRLAMA: Geçmiş verileri DataFrame'e dönüştür
-            df = pd.DataFrame(historical_data)
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df.sort_values('Date')  # Tarihe göre sırala
-            
-            # 2. ÖZELLİK MÜHENDİSLİĞİ (Feature Engineering):
-            #    Zaman bazlı özellikler ekle - ML modelinin öğrenmesi için kritik
-            df['DayOfWeek'] = df['Date'].dt.dayofweek  # Haftanın günü (0=Pazartesi, 6=Pazar)
-            df['Hour'] = df['Date'].dt.hour  # Günün saati (0-23)
-            df['Month'] = df['Date'].dt.month  # Ay (1-12)
-            # NOT: Bu özellikler mevsimsel ve günlük pattern'leri yakalamaya yardımcı olur
-            
-            # 3. TREND HESAPLAMA: Hareketli ortalama ile trend analizi
-            df['EnergyTrend'] = df['EnergyConsumption'].rolling(window=7).mean()  # 7 günlük ortalama
-            df['PowerTrend'] = df['PowerConsumption'].rolling(window=7).mean()  # 7 günlük güç ortalaması
-            # NOT: Rolling window ile kısa vadeli trendleri yakalarız
-            
-            # 4. VERİ TEMİZLEME: Eksik değerleri doldur
-            df = df.ffill().bfill()  # Önce ileriye, sonra geriye doldur
-            # NOT: ML modeli eksik veri ile çalışamaz, bu yüzden dolduruyoruz
+            # 1-4. VERİ HAZIRLAMA, ÖZELLİK MÜHENDİSLİĞİ, TREND ve VERİ TEMİZLEME:
+            #    Tarihe göre sıralı çerçeve + DayOfWeek/Hour/Month + 7 günlük trendler + ffill/bfill
+            #    (feature_frame.py; aynı geçmiş için diğer analizlerle paylaşılır)
+            df = FeatureFrame.of(historical_data).prediction_frame
+            timer.mark('frame')
             
             # 5. ÖZELLİK SEÇİMİ: ML modeline verilecek girdi değişkenleri
             features = ['EnergyConsumption', 'PowerConsumption', 'Temperature', 
@@ -70,38 +189,42 @@ class EnergyMLService:
             y = df['EnergyConsumption'].values  # Çıktı vektörü (hedef değişken)
             
             # 6. MODEL EĞİTİMİ: Linear Regression modelini geçmiş verilerle eğit
-            self.energy_predictor.fit(X, y)
+            energy_predictor = self._new_energy_predictor().fit(X, y)
+            timer.mark('fit')
             # NOT: Model, özellikler ile enerji tüketimi arasındaki ilişkiyi öğrenir
             
             # 7. TAHMİN BAŞLANGICI: Son mevcut veriyi kullan
-            last_data = df.iloc[-1][features].values.reshape(1, -1)
+            last_data = df.iloc[-1][features].values.astype(float)
+            last_date = df['Date'].iloc[-1]
             
-            # 8. GELECEK TAHMİNLERİ: Her gün için ayrı ayrı tahmin yap
-            predictions = []
-            current_data = last_data.copy()
+            # 8. GELECEK TAHMİNLERİ: Tüm günlerin özellik satırları tek matriste üretilir
+            #    (DayOfWeek/Month gelecek tarihten, Saat varsayılan olarak öğle vakti)
+            future_dates = pd.DatetimeIndex([last_date + timedelta(days=day) for day in range(1, days_ahead + 1)])
+            daily_rows = np.tile(last_data, (days_ahead, 1))
+            daily_rows[:, 6] = future_dates.dayofweek  # DayOfWeek
+            daily_rows[:, 7] = 12  # Saat (varsayılan: öğle vakti)
+            daily_rows[:, 8] = future_dates.month  # Month
+            
+            # İTERATİF TAHMİN: Her gün bir önceki günün tahminini EnergyConsumption olarak kullanır.
+            # Model doğrusal olduğundan tahmin = taban + w0 * önceki_tahmin şeklinde ayrışır:
+            # taban değerler tek predict çağrısıyla hesaplanır, özyineleme skaler olarak yürütülür.
+            w0 = float(energy_predictor.coef_[0])
+            daily_rows[:, 0] = 0.0
+            daily_base = energy_predictor.predict(daily_rows)
             
-            for day in range(1, days_ahead + 1):
-                # Tarih güncelleme: Gelecek tarihin özelliklerini hesapla
-                future_date = df['Date'].iloc[-1] + timedelta(days=day)
-                current_data[0][6] = future_date.dayofweek  # DayOfWeek güncelle
-                current_data[0][7] = 12  # Saat (varsayılan: öğle vakti)
-                current_data[0][8] = future_date.month  # Month güncelle
-                
-                # TAHMİN: Eğitilmiş model ile gelecek günün enerji tüketimini tahmin et
-                pred = self.energy_predictor.predict(current_data)[0]
-                predictions.append(pred)
-                
-                # İTERATİF TAHMİN: Sonraki gün için önceki tahmini kullan
-                current_data[0][0] = pred  # EnergyConsumption'ı güncelle
-                # NOT: Bu sayede her gün bir önceki günün tahminine bağlı olur
+            predictions = []
+            previous = float(last_data[0])
+            for base in daily_base:
+                previous = float(base) + w0 * previous
+                predictions.append(previous)
             
             # 9. GÜVEN ARALIĞI HESAPLAMA: Tahminin ne kadar güvenilir olduğunu hesapla
-            mae = mean_absolute_error(y, self.energy_predictor.predict(X))  # Ortalama mutlak hata
+            mae = mean_absolute_error(y, energy_predictor.predict(X))  # Ortalama mutlak hata
             confidence = max(0.1, min(0.9, 1 - (mae / np.mean(y))))  # Güven seviyesi (0-1)
             # NOT: MAE ne kadar düşükse, güven seviyesi o kadar yüksektir
             
             # 10. SONUÇ HAZIRLAMA: Tahmin sonuçlarını yapılandırılmış formatta döndür
-            return {
+            result = {
                 'PredictionDate': (datetime.now() + timedelta(days=days_ahead)).isoformat(),
                 'PredictedEnergyConsumption': float(predictions[-1]),  # Tahmin edilen enerji (kWh)
                 'ConfidenceLevel': float(confidence),  # Güven seviyesi (0-1)
@@ -120,23 +243,58 @@ class EnergyMLService:
                     }
                 ]
             }
+            
+            # 11. TAHMİN SERİSİ: Tek istekte tüm ufuk (gün başına tahmin + alt/üst sınır)
+            if return_series or resolution == 'hourly':
+                day_starts = future_dates.normalize()
+                result['Series'] = [
+                    {
+                        'Date': (day_start + timedelta(hours=12)).isoformat(),
+                        'PredictedEnergyConsumption': float(pred),
+                        'MinPrediction': float(pred * 0.8),
+                        'MaxPrediction': float(pred * 1.2)
+                    }
+                    for day_start, pred in zip(day_starts, predictions)
+                ]
+            
+            # 12. SAATLİK ÇÖZÜNÜRLÜK: days_ahead * 24 satır tek predict çağrısıyla hesaplanır;
+            #     her saat, bir önceki günün (öğle) tahminini EnergyConsumption olarak kullanır
+            if resolution == 'hourly':
+                hourly_rows = np.repeat(daily_rows, 24, axis=0)
+                hourly_rows[:, 7] = np.tile(np.arange(24), days_ahead)  # Saat
+                hourly_base = energy_predictor.predict(hourly_rows)
+                previous_day = np.repeat(np.concatenate(([last_data[0]], predictions[:-1])), 24)
+                hourly_predictions = hourly_base + w0 * previous_day
+                hourly_dates = np.repeat(day_starts, 24) + pd.to_timedelta(np.tile(np.arange(24), days_ahead), unit='h')
+                result['HourlySeries'] = [
+                    {
+                        'Date': date.isoformat(),
+                        'PredictedEnergyConsumption': float(pred),
+                        'MinPrediction': float(pred * 0.8),
+                        'MaxPrediction': float(pred * 1.2)
+                    }
+                    for date, pred in zip(hourly_dates, hourly_predictions)
+                ]
+            
+            timer.mark('predict')
+            return result
             # YORUMLAMA REHBERİ:
             # - PredictedEnergyConsumption: Beklenen enerji tüketimi (kWh)
             # - ConfidenceLevel > 0.7: Yüksek güvenilirlik, planlama için kullanılabilir
             # - MinPrediction - MaxPrediction: %80 güven aralığı (gerçek değer bu aralıkta olma ihtimali yüksek)
             # - Factors: Tahmini etkileyen faktörler ve etki dereceleri
         except Exception as e:
-            print(f"Error in energy prediction: {e}")
-            return {
+            logger.error("Error in energy prediction: %s", e)
+            return FallbackResult({
                 'PredictionDate': (datetime.now() + timedelta(days=days_ahead)).isoformat(),
                 'PredictedEnergyConsumption': 0.0,
                 'ConfidenceLevel': 0.0,
                 'MinPrediction': 0.0,
                 'MaxPrediction': 0.0,
                 'Factors': []
-            }
+            })
     
-    def detect_anomalies(self, data):
+    def detect_anomalies(self, data, device_id=None, device_type=None):
         """
         Anomali Tespiti - Isolation Forest Algoritması + Basit Eşik Kontrolleri
         
@@ -150,105 +308,207 @@ class EnergyMLService:
         - EnergyConsumption, PowerConsumption, Temperature
         - Voltage, Current, PowerFactor
         
-        NOT: Tek veri noktası ile Isolation Forest çalışmaz, bu durumda basit eşik kontrolleri kullanılır
+        Model Kayıt Defteri:
+        - device_id için (yoksa filo geneli) önceden eğitilmiş model varsa sadece skorlama yapılır
+        - Hiç model yoksa eski davranış: gelen veri üzerinde fit_predict
+        
+        Eşik Kuralları (anomaly_rules.py):
+        - Tüm satırlar için NumPy maskeleri ile değerlendirilir, device_type'a göre yapılandırılabilir
+        - Kural tetiklenen satır için ayrıca Isolation Forest anomalisi raporlanmaz
+        
+        İki Aşamalı Tespit (anomaly_screen.py, ANOMALY_SCREEN_MIN_ROWS ve üstü satırda):
+        - Robust z-skoru / IQR taraması tüm satırlarda; taramayı geçen satırlar normal
+        - Uç değerler doğrudan anomali, şüpheliler Isolation Forest ile skorlanır
+          (model yoksa rastgele bağlam örneği ile eğitilir)
+        - Her anomalide kararı veren aşama: DecidedBy = rules | screen | isolation-forest
+        
+        NOT: Tek veri noktası ile Isolation Forest çalışmaz, bu durumda sadece eşik kontrolleri kullanılır
         """
+        timer = StageTimer('detect-anomalies')
         try:
-            df = pd.DataFrame(data)
-            df['Date'] = pd.to_datetime(df['Date'])
+            df = to_frame(data)
             
             # Özellikler (ML modeli için girdi değişkenleri)
-            features = ['EnergyConsumption', 'PowerConsumption', 'Temperature', 
-                      'Voltage', 'Current', 'PowerFactor']
+            features = ANOMALY_FEATURES
+            
+            X = df[features].to_numpy(dtype=float)
+            detected_at = IsoDateView(df['Date'])
+            timer.mark('frame')
+            
+            # Eşik kuralları tüm satırlar için vektörel değerlendirilir (sadece tetiklenen satırlar döner)
+            columns = {feature: X[:, j] for j, feature in enumerate(features)}
+            anomalies_by_row = self.rule_engine.anomalies_by_hit_row(columns, detected_at, device_type)
+            timer.mark('rules')
             
             # Tek veri noktası kontrolü: Isolation Forest için en az 2 veri noktası gerekir
             if len(df) < 2:
-                # Basit eşik kontrolleri ile anomali tespiti
-                anomalies = []
-                row = df.iloc[0]
-                
-                # Yüksek Enerji Tüketimi (>300 kWh)
-                if row['EnergyConsumption'] > 300:
-                    anomalies.append({
-                        'DetectedAt': row['Date'].isoformat(),
-                        'AnomalyType': 'HighConsumption',
-                        'Description': f'Yüksek enerji tüketimi tespit edildi: {row["EnergyConsumption"]:.2f} kWh (Eşik: 300 kWh)',
-                        'Severity': 0.7,  # High severity
-                        'NormalValue': 200.0,  # Varsayılan normal değer
-                        'ActualValue': float(row['EnergyConsumption']),
-                        'Recommendation': 'Enerji tüketimini optimize etmek için cihaz kullanımını gözden geçirin.'
-                    })
-                
-                # Yüksek Sıcaklık (>40°C)
-                if row['Temperature'] > 40:
-                    severity = 0.9 if row['Temperature'] > 50 else 0.7
-                    anomalies.append({
-                        'DetectedAt': row['Date'].isoformat(),
-                        'AnomalyType': 'TemperatureAnomaly',
-                        'Description': f'Yüksek sıcaklık tespit edildi: {row["Temperature"]:.2f}°C (Eşik: 40°C)',
-                        'Severity': severity,
-                        'NormalValue': 25.0,
-                        'ActualValue': float(row['Temperature']),
-                        'Recommendation': 'Cihazın soğutma sistemini kontrol edin ve havalandırmayı iyileştirin.'
-                    })
-                
-                # Voltaj Anomalisi (<200V veya >250V) - 0 değeri geçersiz, kontrol etme
-                if row['Voltage'] > 0 and (row['Voltage'] < 200 or row['Voltage'] > 250):
-                    severity = 0.9 if (row['Voltage'] < 180 or row['Voltage'] > 260) else 0.6
-                    anomalies.append({
-                        'DetectedAt': row['Date'].isoformat(),
-                        'AnomalyType': 'VoltageAnomaly',
-                        'Description': f'Voltaj anomalisi tespit edildi: {row["Voltage"]:.2f}V (Normal: 200-250V)',
-                        'Severity': severity,
-                        'NormalValue': 220.0,
-                        'ActualValue': float(row['Voltage']),
-                        'Recommendation': 'Elektrik şebekesindeki voltaj dalgalanmalarını kontrol edin.'
-                    })
-                
-                # Düşük Güç Faktörü (<0.7) - 0 değeri geçersiz, kontrol etme
-                if row['PowerFactor'] > 0 and row['PowerFactor'] < 0.7:
-                    severity = 0.8 if row['PowerFactor'] < 0.5 else 0.6
-                    anomalies.append({
-                        'DetectedAt': row['Date'].isoformat(),
-                        'AnomalyType': 'LowPowerFactor',
-                        'Description': f'Düşük güç faktörü tespit edildi: {row["PowerFactor"]:.2f} (Normal: >0.8)',
-                        'Severity': severity,
-                        'NormalValue': 0.85,
-                        'ActualValue': float(row['PowerFactor']),
-                        'Recommendation': 'Güç faktörünü iyileştirmek için kompanzasyon sistemini kontrol edin.'
-                    })
-                
-                return anomalies
+                return anomalies_by_row.get(0, [])
             
             # Birden fazla veri noktası varsa Isolation Forest kullan
-            X = df[features].values
+            model_entry = self.model_registry.get(device_id)
+            screen_rows = np.empty(0, dtype=np.int64)
+            screen_severity = np.empty(0)
+            if ANOMALY_SCREEN_ENABLED and len(X) >= ANOMALY_SCREEN_MIN_ROWS:
+                # 1. aşama: tarama; sadece şüpheli (ve uç olmayan) satırlar Isolation Forest'a gider
+                suspects, decisive, robust_z = self.anomaly_screen.screen(X)
+                screen_rows = np.flatnonzero(decisive)
+                screen_severity = self.anomaly_screen.severity(robust_z[screen_rows])
+                scored_rows = np.flatnonzero(suspects & ~decisive)
+                timer.mark('screen')
+            else:
+                scored_rows = np.arange(len(X))
             
-            # Isolation Forest ile anomali tespiti
-            # fit_predict: Modeli eğitir ve tahmin yapar (online learning)
-            anomaly_labels = self.anomaly_detector.fit_predict(X)
-            # decision_function: Anomali skorunu hesaplar (-1 ile 1 arası)
-            anomaly_scores = self.anomaly_detector.decision_function(X)
+            # 2. aşama: Isolation Forest skoru (decision_function < 0 ise anomali, predict ile aynı kural)
+            anomaly_scores = np.empty(0)
+            if len(scored_rows):
+                if model_entry is not None:
+                    # Önceden eğitilmiş model: yeniden eğitim yok, sadece skorlama
+                    _, anomaly_scores = self.model_registry.score(model_entry, X[scored_rows])
+                else:
+                    # Model çağrıya özel eğitilir: taramada tüm satırlardan bağlam örneği ile
+                    training_rows = self.anomaly_screen.context_rows(len(X)) if len(scored_rows) < len(X) else scored_rows
+                    anomaly_detector = self._new_anomaly_detector().fit(X[training_rows])
+                    timer.mark('fit')
+                    # decision_function: Anomali skorunu hesaplar (-1 ile 1 arası)
+                    anomaly_scores = anomaly_detector.decision_function(X[scored_rows])
+            forest_rows = scored_rows[anomaly_scores < 0]
+            forest_scores = anomaly_scores[anomaly_scores < 0]
             
-            anomalies = []
-            for i, (label, score) in enumerate(zip(anomaly_labels, anomaly_scores)):
-                if label == -1:  # Anomali
-                    anomaly_type = self._classify_anomaly(df.iloc[i], features)
-                    anomalies.append({
-                        'DetectedAt': df.iloc[i]['Date'].isoformat(),
-                        'AnomalyType': anomaly_type,
-                        'Description': f'{anomaly_type} anomali tespit edildi',
-                        'Severity': float(abs(score)),
-                        'NormalValue': float(np.mean(X[:, features.index('EnergyConsumption')])),
-                        'ActualValue': float(df.iloc[i]['EnergyConsumption']),
-                        'Recommendation': self._get_anomaly_recommendation(anomaly_type)
-                    })
+            # Eşik kuralı tetiklenmemiş anomali satırları vektörel sınıflandırılır
+            has_rule_hit = np.zeros(len(X), dtype=bool)
+            has_rule_hit[list(anomalies_by_row)] = True
+            rows = np.concatenate((screen_rows, forest_rows))
+            severities = np.abs(np.concatenate((screen_severity, forest_scores)))
+            decided_by = np.repeat(['screen', 'isolation-forest'], [len(screen_rows), len(forest_rows)])
+            keep = ~has_rule_hit[rows]
+            anomaly_types = self._classify_anomalies(X[rows[keep]])
+            normal_value = float(np.mean(X[:, features.index('EnergyConsumption')]))
+            for i, anomaly_type, severity, stage in zip(rows[keep].tolist(), anomaly_types.tolist(),
+                                                         severities[keep].tolist(), decided_by[keep].tolist()):
+                anomalies_by_row.setdefault(i, []).append({
+                    'DetectedAt': detected_at[i],
+                    'AnomalyType': anomaly_type,
+                    'Description': f'{anomaly_type} anomali tespit edildi',
+                    'Severity': float(severity),
+                    'NormalValue': normal_value,
+                    'ActualValue': float(X[i, 0]),
+                    'Recommendation': self._get_anomaly_recommendation(anomaly_type),
+                    'DecidedBy': stage
+                })
             
+            anomalies = [anomaly for i in sorted(anomalies_by_row) for anomaly in anomalies_by_row[i]]
+            timer.mark('predict')
             return anomalies
         except Exception as e:
-            print(f"Error in anomaly detection: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in anomaly detection: %s", e)
             return []
     
+    def threshold_anomalies_batch(self, X, detected_at, device_types=None):
+        """
+        Basit eşik kontrolleri - tüm satırlar için vektörel (kural motoru, NumPy maskeleri ile)
+        
+        X: (n, len(ANOMALY_FEATURES)) matris, detected_at: n elemanlı tarih listesi
+        device_types: None, tek bir cihaz tipi ya da satır başına cihaz tipi listesi
+        Dönüş: her satır için anomali listesi (eşik aşılmayan satırlar için boş liste)
+        """
+        if device_types is None or isinstance(device_types, str):
+            columns = {feature: X[:, j] for j, feature in enumerate(ANOMALY_FEATURES)}
+            return self.rule_engine.anomalies_by_row(columns, detected_at, len(X), device_types)
+        
+        # Farklı cihaz tipleri: her tip kendi kural setiyle, kendi satırları üzerinde değerlendirilir
+        results = [[] for _ in range(len(X))]
+        types = np.array([str(t) if t else '' for t in device_types])
+        for device_type in np.unique(types):
+            rows = np.flatnonzero(types == device_type)
+            sub_results = self.threshold_anomalies_batch(
+                X[rows], [detected_at[i] for i in rows], str(device_type) or None
+            )
+            for i, anomalies in zip(rows, sub_results):
+                results[i] = anomalies
+        return results
+    
+    def _stream_model(self, device_id, window):
+        """
+        Cihaz penceresi için skorlamada kullanılacak modeli döndürür
+        
+        - Pencere STREAM_MIN_WINDOW okumaya ulaşmadıysa None
+        - STREAM_AUTO_TRAIN: model pencere üzerinde eğitilir; pencere büyüdükçe (32 → 64 → 128 ...) ve
+          sonrasında her STREAM_REFIT_INTERVAL okumada yenilenir. Akış modeli pencerede tutulur:
+          kayıt defterindeki (HTTP ile eğitilmiş) cihaz modelinin ve dosyasının üzerine yazılmaz,
+          diske kaydedilmez ve pencereyle birlikte LRU ile atılır (STREAM_MAX_DEVICES)
+        - Aksi halde kayıt defterindeki cihaz modeli, yoksa filo modeli
+        """
+        if window.count < STREAM_MIN_WINDOW:
+            return None
+        if not STREAM_AUTO_TRAIN:
+            return self.model_registry.get(device_id)
+        
+        refit_after = min(STREAM_REFIT_INTERVAL, max(window.trained_total, 1))
+        if window.model is None or window.total - window.trained_total >= refit_after:
+            try:
+                window.model = self.model_registry.fit(window.view(), ANOMALY_FEATURES,
+                                                       contamination=STREAM_CONTAMINATION)
+                window.trained_total = window.total
+            except Exception as e:
+                logger.warning("⚠ Akış modeli eğitilemedi: Device %s: %s", device_id, e)
+        return window.model
+    
+    def detect_stream_anomalies_batch(self, device_ids, X, detected_at, windows, device_types=None):
+        """
+        Akış (streaming) anomali tespiti - consumer'daki cihaz pencereleri üzerinde
+        
+        - Tüm satırlar önce vektörel eşik kontrollerinden geçer (DataFrame oluşturulmaz)
+        - Satırlar kullanılacak modele göre gruplanır, her grup tek decision_function
+          çağrısıyla önceden eğitilmiş model ile skorlanır (mesaj başına yeniden eğitim yok)
+        - windows[i]: i. satırın eklendiği cihaz penceresi
+        """
+        results = self.threshold_anomalies_batch(X, detected_at, device_types)
+        
+        rows_by_device = {}
+        for i, device_id in enumerate(device_ids):
+            rows_by_device.setdefault(device_id, []).append(i)
+        
+        # Satırları kullanılacak modele göre grupla: aynı modeli paylaşan cihazlar
+        # (ör. STREAM_AUTO_TRAIN=false iken filo modeli) tek çağrıda skorlanır
+        rows_by_model = {}
+        window_of_row = {}
+        for device_id, rows in rows_by_device.items():
+            window = windows[rows[-1]]
+            model_entry = self._stream_model(device_id, window)
+            # Eşik kuralı zaten tetiklendiyse aynı okuma için ikinci bir alert üretme
+            candidates = [i for i in rows if not results[i]]
+            if model_entry is None or not candidates:
+                continue
+            rows_by_model.setdefault(id(model_entry), (model_entry, []))[1].extend(candidates)
+            for i in candidates:
+                window_of_row[i] = window
+        
+        for model_entry, rows in rows_by_model.values():
+            labels, scores = self.model_registry.score(model_entry, X[rows])
+            for i, label, score in zip(rows, labels, scores):
+                if label != -1:
+                    continue
+                window = window_of_row[i]
+                anomaly_type = str(self._classify_anomalies(X[i:i + 1])[0])
+                results[i].append({
+                    'DetectedAt': detected_at[i],
+                    'AnomalyType': anomaly_type,
+                    'Description': f'{anomaly_type} anomali tespit edildi (son {window.count} okuma ile karşılaştırıldı)',
+                    'Severity': float(abs(score)),
+                    'NormalValue': float(np.mean(window.view()[:, 0])),
+                    'ActualValue': float(X[i, 0]),
+                    'Recommendation': self._get_anomaly_recommendation(anomaly_type),
+                    'DecidedBy': 'isolation-forest'
+                })
+        
+        return results
+    
+    def train_anomaly_model(self, data, device_id=None):
+        """Anomali modelini eğitir/yeniler ve kayıt defterine (diske) kaydeder"""
+        df = to_frame(data, parse_dates=False)
+        X = df[ANOMALY_FEATURES].values
+        return self.model_registry.train(device_id, X, ANOMALY_FEATURES)
+    
     def optimize_energy(self, device_info, historical_data):
         """
         ============================================================
@@ -282,21 +542,22 @@ class EnergyMLService:
         
         ============================================================
         """
+        timer = StageTimer('optimize-energy')
         try:
-            # 1. VERİ HAZIRLAMA
-            df = pd.DataFrame(historical_data)
-            df['Date'] = pd.to_datetime(df['Date'])
+            # 1. VERİ HAZIRLAMA (paylaşılan özellik çerçevesi)
+            frame = FeatureFrame.of(historical_data)
+            timer.mark('frame')
             
             # 2. VERİMLİLİK ANALİZİ: Cihazın ne kadar verimli çalıştığını hesapla
-            avg_power = df['PowerConsumption'].mean()  # Ortalama güç tüketimi
+            avg_power = frame.mean('PowerConsumption')  # Ortalama güç tüketimi
             max_power = device_info['MaxPowerConsumption']  # Maksimum güç kapasitesi
             efficiency = (avg_power / max_power) * 100  # Verimlilik yüzdesi
             # YORUM: efficiency < 70% = Düşük verimlilik, optimizasyon gerekli
             #        efficiency > 85% = İyi verimlilik, mevcut durum yeterli
             
             # 3. TREND ANALİZİ: Enerji tüketiminin artış/azalış trendini belirle
-            power_trend = df['PowerConsumption'].pct_change().mean()  # Güç trendi (% değişim)
-            energy_trend = df['EnergyConsumption'].pct_change().mean()  # Enerji trendi (% değişim)
+            power_trend = frame.pct_change_mean('PowerConsumption')  # Güç trendi (% değişim)
+            energy_trend = frame.pct_change_mean('EnergyConsumption')  # Enerji trendi (% değişim)
             # YORUM: Pozitif trend = Artış var, optimizasyon gerekli
             #        Negatif trend = Azalış var, iyi durum
             
@@ -341,7 +602,7 @@ class EnergyMLService:
                 })
             
             # 6. SICAKLIK OPTİMİZASYONU: Sıcaklık ile enerji tüketimi arasındaki ilişkiyi analiz et
-            temp_correlation = df['Temperature'].corr(df['EnergyConsumption'])  # Korelasyon katsayısı
+            temp_correlation = frame.corr('Temperature', 'EnergyConsumption')  # Korelasyon katsayısı
             # YORUM: Korelasyon > 0.5 = Güçlü pozitif ilişki (sıcaklık artarsa enerji artar)
             if temp_correlation > 0.5:
                 actions.append({
@@ -366,6 +627,7 @@ class EnergyMLService:
             total_energy_reduction = sum(action['EnergyReduction'] for action in actions)
             total_cost = sum(action['ImplementationCost'] for action in actions)
             
+            timer.mark('compute')
             return {
                 'Actions': actions,  # Tüm önerilen aksiyonlar
                 'PotentialSavings': total_savings,  # Toplam potansiyel tasarruf (TL/ay)
@@ -381,15 +643,15 @@ class EnergyMLService:
             # - PaybackPeriod < 12: Hızlı geri dönüş, öncelikli uygulanmalı
             # - CarbonReduction: Çevresel etki (karbon ayak izi azaltma)
         except Exception as e:
-            print(f"Error in energy optimization: {e}")
-            return {
+            logger.error("Error in energy optimization: %s", e)
+            return FallbackResult({
                 'Actions': [],
                 'PotentialSavings': 0.0,
                 'EnergyReduction': 0.0,
                 'CarbonReduction': 0.0,
                 'ImplementationCost': 0.0,
                 'PaybackPeriod': 0
-            }
+            })
     
     def predict_maintenance(self, device_info, historical_data):
         """
@@ -424,10 +686,11 @@ class EnergyMLService:
         
         ============================================================
         """
+        timer = StageTimer('predict-maintenance')
         try:
-            # 1. VERİ HAZIRLAMA
-            df = pd.DataFrame(historical_data)
-            df['Date'] = pd.to_datetime(df['Date'])
+            # 1. VERİ HAZIRLAMA (paylaşılan özellik çerçevesi)
+            frame = FeatureFrame.of(historical_data)
+            timer.mark('frame')
             
             # 2. CİHAZ YAŞI HESAPLAMA: Kurulum tarihinden itibaren geçen süre
             installation_date = pd.to_datetime(device_info['InstallationDate'])
@@ -443,9 +706,9 @@ class EnergyMLService:
             # YORUM: Bakım süresi uzadıkça aciliyet artar
             
             # 4. PERFORMANS ANALİZİ: Son 30 günlük verileri analiz et
-            recent_data = df.tail(30)  # Son 30 günlük veri
-            power_variance = recent_data['PowerConsumption'].var()  # Güç tüketimi varyansı
-            efficiency_trend = recent_data['PowerConsumption'].pct_change().mean()  # Verimlilik trendi
+            recent_data = frame.tail(30)  # Son 30 günlük veri (istatistiklerden: son okumaların EWMA'sı)
+            power_variance = recent_data.var('PowerConsumption')  # Son dönem güç tüketimi varyansı
+            efficiency_trend = recent_data.pct_change_mean('PowerConsumption')  # Verimlilik trendi
             # YORUM: Yüksek varyans = Düzensiz çalışma, bakım gerekli
             #        Negatif trend = Verimlilik düşüyor, bakım gerekli
             
@@ -454,7 +717,7 @@ class EnergyMLService:
             # YORUM: 365 gün geçtiyse skor = 1.0 (maksimum aciliyet)
             
             # Performans bozulması durumunda aciliyeti artır
-            if power_variance > recent_data['PowerConsumption'].var() * 1.5:  # Varyans 1.5x'ten fazla
+            if power_variance > frame.var('PowerConsumption') * 1.5:  # Son varyans tüm geçmişin 1.5x'inden fazla
                 urgency_score += 0.2  # Aciliyet +20%
                 # YORUM: Düzensiz çalışma = Bakım gerekli
             if efficiency_trend < -0.05:  # Verimlilik %5'ten fazla düşüş
@@ -481,6 +744,7 @@ class EnergyMLService:
                 risk_level = "Low"
                 # YORUM: Önleyici amaçlı, risk düşük
             
+            timer.mark('compute')
             return {
                 'PredictedMaintenanceDate': (datetime.now() + timedelta(days=365 - days_since_maintenance)).isoformat(),
                 'UrgencyScore': float(urgency_score),
@@ -495,15 +759,15 @@ class EnergyMLService:
                 'RiskLevel': risk_level
             }
         except Exception as e:
-            print(f"Error in maintenance prediction: {e}")
-            return {
+            logger.error("Error in maintenance prediction: %s", e)
+            return FallbackResult({
                 'PredictedMaintenanceDate': (datetime.now() + timedelta(days=30)).isoformat(),
                 'UrgencyScore': 0.5,
                 'MaintenanceType': 'Rutin Bakım',
                 'RecommendedActions': ['Genel kontrol'],
                 'EstimatedCost': 500.0,
                 'RiskLevel': 'Medium'
-            }
+            })
     
     def calculate_efficiency_score(self, device_info, historical_data):
         """
@@ -546,32 +810,34 @@ class EnergyMLService:
         
         ============================================================
         """
+        timer = StageTimer('calculate-efficiency')
         try:
-            # 1. VERİ HAZIRLAMA
-            df = pd.DataFrame(historical_data)
+            # 1. VERİ HAZIRLAMA (paylaşılan özellik çerçevesi)
+            frame = FeatureFrame.of(historical_data)
+            timer.mark('frame')
             
             # 2. GÜÇ VERİMLİLİĞİ HESAPLAMA: Ortalama güç / Maksimum güç
-            avg_power = df['PowerConsumption'].mean()  # Ortalama güç tüketimi (W)
+            avg_power = frame.mean('PowerConsumption')  # Ortalama güç tüketimi (W)
             max_power = device_info['MaxPowerConsumption']  # Maksimum güç kapasitesi (W)
             power_efficiency = (avg_power / max_power) * 100  # Verimlilik yüzdesi
             # YORUM: %85-95 arası ideal, %70'in altı düşük verimlilik
             #        Yüksek değer = Cihaz kapasitesine yakın çalışıyor (iyi)
             
             # 3. GÜÇ FAKTÖRÜ ANALİZİ: Elektriksel verimlilik göstergesi
-            avg_power_factor = df['PowerFactor'].mean()  # Ortalama güç faktörü (0-1 arası)
+            avg_power_factor = frame.mean('PowerFactor')  # Ortalama güç faktörü (0-1 arası)
             power_factor_score = avg_power_factor * 100  # Skor (0-100)
             # YORUM: 0.9-1.0 = Mükemmel, 0.8-0.9 = İyi, <0.8 = Düşük (kompanzasyon gerekli)
             #        Güç faktörü düşükse reaktif güç kaybı var demektir
             
             # 4. SICAKLIK STABİLİTESİ: Sıcaklık değişkenliğini analiz et
-            temp_std = df['Temperature'].std()  # Standart sapma (°C)
+            temp_std = frame.std('Temperature')  # Standart sapma (°C)
             temp_stability = max(0, 100 - (temp_std * 2))  # Stabilite skoru (0-100)
             # YORUM: Düşük standart sapma = Yüksek stabilite (iyi)
             #        Yüksek standart sapma = Düşük stabilite (kötü)
             #        Formül: 100 - (std * 2) = Stabilite skoru
             
             # 5. VOLTAJ STABİLİTESİ: Voltaj değişkenliğini analiz et
-            voltage_std = df['Voltage'].std()  # Standart sapma (V)
+            voltage_std = frame.std('Voltage')  # Standart sapma (V)
             voltage_stability = max(0, 100 - (voltage_std * 5))  # Stabilite skoru (0-100)
             # YORUM: Düşük standart sapma = Yüksek stabilite (iyi)
             #        Yüksek standart sapma = Düşük stabilite (kötü, elektrik sorunu olabilir)
@@ -662,6 +928,7 @@ class EnergyMLService:
                     'Description': 'Voltaj değişkenliği yüksek. Elektrik sistemi kontrol edilmeli.'
                 })
             
+            timer.mark('compute')
             # 9. SONUÇ HAZIRLAMA: Tüm analiz sonuçlarını yapılandırılmış formatta döndür
             return {
                 'OverallScore': float(overall_score),  # Genel verimlilik skoru (0-100)
@@ -680,25 +947,57 @@ class EnergyMLService:
             # - ImprovementAreas: Priority'ye göre önceliklendirilmiş iyileştirme alanları
             # - Her metrik için Interpretation: Mevcut durum ve hedef değerler
         except Exception as e:
-            print(f"Error in efficiency calculation: {e}")
-            return {
+            logger.error("Error in efficiency calculation: %s", e)
+            return FallbackResult({
                 'OverallScore': 0.0,
                 'EfficiencyLevel': 'Poor',
                 'Metrics': [],
                 'ImprovementAreas': ['Veri yetersiz'],
                 'BenchmarkComparison': 0.0
-            }
+            })
     
-    def _classify_anomaly(self, row, features):
-        """Anomali türünü sınıflandır"""
-        if row['PowerConsumption'] > row['EnergyConsumption'] * 2:
-            return 'HighConsumption'
-        elif row['Temperature'] > 50:
-            return 'TemperatureSpike'
-        elif row['Voltage'] < 200 or row['Voltage'] > 250:
-            return 'VoltageAnomaly'
-        else:
-            return 'GeneralAnomaly'
+    # /analyze-device yanıt alanı -> analiz
+    DEVICE_ANALYSIS_FIELDS = ('Prediction', 'Optimization', 'Maintenance', 'Efficiency')
+    
+    def analyze_device(self, device_info, historical_data, days_ahead=7, analyses=None):
+        """
+        Cihaz detay sayfası için dört analizi tek geçmiş üzerinde çalıştırır.
+        
+        DataFrame bir kez oluşturulur; ortalama, std, pct_change gibi ortak istatistikler
+        FeatureFrame üzerinde bir kez hesaplanıp tüm analizlerce paylaşılır.
+        analyses: DEVICE_ANALYSIS_FIELDS alt kümesi (None = hepsi)
+        """
+        timer = StageTimer('analyze-device')
+        try:
+            frame = FeatureFrame(historical_data)
+            timer.mark('frame')
+        except Exception as e:
+            logger.error("Error in device analysis: %s", e)
+            frame = historical_data  # Her analiz kendi hata durumunu (varsayılan sonucunu) döndürür
+        
+        runners = {
+            'Prediction': lambda: self.predict_energy_consumption(
+                frame, days_ahead,
+                device_info.get('ReturnSeries', False), device_info.get('Resolution', 'daily')
+            ),
+            'Optimization': lambda: self.optimize_energy(device_info, frame),
+            'Maintenance': lambda: self.predict_maintenance(device_info, frame),
+            'Efficiency': lambda: self.calculate_efficiency_score(device_info, frame)
+        }
+        selected = analyses or self.DEVICE_ANALYSIS_FIELDS
+        return {field: runners[field]() for field in self.DEVICE_ANALYSIS_FIELDS if field in selected}
+    
+    def _classify_anomalies(self, X):
+        """Anomali türünü sınıflandır (vektörel, X: ANOMALY_FEATURES sırasıyla matris)"""
+        energy = X[:, 0]
+        power = X[:, 1]
+        temperature = X[:, 2]
+        voltage = X[:, 3]
+        return np.select(
+            [power > energy * 2, temperature > 50, (voltage < 200) | (voltage > 250)],
+            ['HighConsumption', 'TemperatureSpike', 'VoltageAnomaly'],
+            default='GeneralAnomaly'
+        )
     
     def _get_anomaly_recommendation(self, anomaly_type):
         """Anomali türüne göre öneri"""
@@ -710,6 +1009,14 @@ class EnergyMLService:
         }
         return recommendations.get(anomaly_type, 'Sistem kontrolü gerekli')
     
+    def _get_efficiency_levels(self, scores):
+        """Verimlilik seviyesini belirle (vektörel, _get_efficiency_level ile aynı eşikler)"""
+        return np.select(
+            [scores >= 90, scores >= 80, scores >= 70, scores >= 60],
+            ['Excellent', 'Good', 'Average', 'Below Average'],
+            default='Poor'
+        )
+    
     def _get_efficiency_level(self, score):
         """Verimlilik seviyesini belirle"""
         if score >= 90:
@@ -726,52 +1033,614 @@ class EnergyMLService:
 # ML servisini başlat
 ml_service = EnergyMLService()
 
+# Analiz sonuç önbelleği (worker başına bellek + opsiyonel paylaşılan disk katmanı)
+result_cache = ResultCache(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL, RESULT_CACHE_DIR)
+
+def cached_result(endpoint, data, compute):
+    """Saf analiz endpoint'leri için: aynı istek gövdesi önbellekten döner"""
+    if not RESULT_CACHE_ENABLED or 'HistoricalData' not in data:
+        # HistoricalData'sız (DeviceId ile istatistikten) sonuçlar yeni okumalarla değişir
+        return compute()
+    return result_cache.get_or_compute(endpoint, data, compute)
+
+# Consumer'ın yazdığı cihaz istatistik snapshot'ları (HTTP worker'ları için salt okunur)
+device_stats_reader = DeviceStatsReader(DEVICE_STATS_DIR, DEVICE_STATS_RELOAD_INTERVAL)
+
+# Consumer'ın yazdığı cihaz zaman serileri; her consumer süreci kendi dosyalarına ekler
+# (<cihaz>/<gün>.<host>-<slot>.bin), okuyucu tüm yazıcıların dosyalarını birleştirir
+timeseries_store = TimeSeriesStore(
+    TIMESERIES_DIR,
+    ANOMALY_FEATURES,
+    writer_name=f"{socket.gethostname()}-{os.getenv('CONSUMER_SLOT', '0')}",
+    retention_days=TIMESERIES_RETENTION_DAYS
+)
+atexit.register(timeseries_store.close)
+
+# Cihaz slotu x pencere x özellik boyutlu paylaşılan halka tamponlar (/dev/shm); bellek
+# worker sayısından bağımsız, dosya ilk kullanımda her süreçte ayrı eşlenir
+shared_history = SharedHistoryArena(
+    SHARED_HISTORY_PATH,
+    ANOMALY_FEATURES,
+    slots=SHARED_HISTORY_SLOTS,
+    window=SHARED_HISTORY_WINDOW
+)
+
+def resolve_history(data, key='HistoricalData'):
+    """
+    Analiz geçmişi: gövdedeki alan (HistoricalData / Data) varsa o, yoksa DeviceId için:
+    - Varsayılan: yerel zaman serisi deposundan [From, To] aralığı (epoch ms ya da ISO; From yoksa
+      son TIMESERIES_DEFAULT_DAYS gün, To yoksa şimdi)
+    - Source='live' ya da anomali tespiti (Data) ve From/To yoksa: paylaşılan bellekteki canlı
+      pencere (son SHARED_HISTORY_WINDOW okuma); cihaz arenada yoksa depoya düşülür
+    .NET tarafı geçmişi POST etmek zorunda kalmaz
+    """
+    if key in data or not data.get('DeviceId'):
+        return data[key]
+    live_requested = data.get('Source') == 'live' or key == 'Data'
+    if SHARED_HISTORY_ENABLED and live_requested and 'From' not in data and 'To' not in data:
+        live = shared_history.history(data['DeviceId'])
+        if live is not None:
+            return live
+    try:
+        end_ms = to_epoch_ms(data.get('To'))
+        start_ms = to_epoch_ms(data.get('From'))
+    except ValueError as e:
+        raise BadRequest(f'Geçersiz From/To: {str(e)}')
+    if end_ms is None:
+        end_ms = int(time.time() * 1000)
+    if start_ms is None:
+        start_ms = end_ms - TIMESERIES_DEFAULT_DAYS * DAY_MS
+    return timeseries_store.read(data['DeviceId'], start_ms, end_ms)
+
+def history_or_stats(data):
+    """
+    Verimlilik / bakım analizleri için veri kaynağı: HistoricalData varsa o, DeviceId ile
+    From/To verildiyse zaman serisi deposundaki aralık, yalnızca DeviceId varsa consumer'ın
+    tuttuğu artımlı istatistikler (geçmiş taranmaz)
+    """
+    if 'HistoricalData' in data or not data.get('DeviceId'):
+        return data['HistoricalData']
+    if 'From' in data or 'To' in data:
+        return resolve_history(data)
+    frame = device_stats_reader.frame(data['DeviceId'])
+    if frame is None:
+        raise DeviceStatsNotFound(f"Cihaz için istatistik bulunamadı: {data['DeviceId']}")
+    return frame
+
+def analysis_response(analysis, result):
+    """Analiz sonucunu JSON'a çevirir (serileştirme süresi ayrı bir aşama olarak ölçülür)"""
+    with metrics.stage(analysis, 'serialize'):
+        return jsonify(result)
+
+@app.errorhandler(DeviceStatsNotFound)
+def device_stats_not_found(e):
+    """HistoricalData gönderilmedi ve cihaz için istatistik yok"""
+    return jsonify({'error': str(e)}), 404
+
+@app.errorhandler(TariffError)
+def tariff_error(e):
+    """İstekteki tarife tanımı geçersiz"""
+    return jsonify({'error': str(e)}), 400
+
+@app.errorhandler(TimeSeriesNotFound)
+def timeseries_not_found(e):
+    """DeviceId + aralık ile istendi, depoda kayıt yok"""
+    return jsonify({'error': str(e)}), 404
+
+@app.errorhandler(PayloadFormatError)
+def payload_format_error(e):
+    """Çözülemeyen ikili/sütunsal gövde"""
+    return jsonify({'error': str(e)}), 415
+
 @app.route('/predict-energy', methods=['POST'])
 def predict_energy():
-    data = request.json
-    result = ml_service.predict_energy_consumption(
-        data['HistoricalData'], 
-        data['DaysAhead']
-    )
-    return jsonify(result)
+    data = read_request_payload(request)
+    history = resolve_history(data)
+    result = cached_result('predict-energy', data, lambda: ml_service.predict_energy_consumption(
+        history, 
+        data['DaysAhead'],
+        data.get('ReturnSeries', False),
+        data.get('Resolution', 'daily')
+    ))
+    return analysis_response('predict-energy', result)
 
 @app.route('/detect-anomalies', methods=['POST'])
 def detect_anomalies():
-    data = request.json
-    result = ml_service.detect_anomalies(data['Data'])
-    return jsonify(result)
+    data = read_request_payload(request, 'Data')
+    result = ml_service.detect_anomalies(resolve_history(data, 'Data'), data.get('DeviceId'), data.get('DeviceType'))
+    return analysis_response('detect-anomalies', result)
+
+@app.route('/models/anomaly', methods=['GET'])
+def list_anomaly_models():
+    """Yüklü anomali modellerini listeler"""
+    return jsonify({'Models': ml_service.model_registry.describe()})
+
+@app.route('/models/anomaly/train', methods=['POST'])
+def train_anomaly_model():
+    """Anomali modelini eğitir/yeniler (DeviceId yoksa filo geneli model)"""
+    data = read_request_payload(request, 'Data')
+    try:
+        result = ml_service.train_anomaly_model(data['Data'], data.get('DeviceId'))
+        return jsonify(result)
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/models/anomaly/<model_key>', methods=['DELETE'])
+def delete_anomaly_model(model_key):
+    """Anomali modelini siler ('fleet' = filo geneli model)"""
+    device_id = None if model_key == FLEET_MODEL_KEY else model_key
+    if not ml_service.model_registry.remove(device_id):
+        return jsonify({'error': 'Model bulunamadı'}), 404
+    return jsonify({'status': 'deleted', 'ModelKey': model_key})
 
 @app.route('/optimize-energy', methods=['POST'])
 def optimize_energy():
-    data = request.json
-    result = ml_service.optimize_energy(
+    data = read_request_payload(request)
+    history = resolve_history(data)
+    result = cached_result('optimize-energy', data, lambda: ml_service.optimize_energy(
         data, 
-        data['HistoricalData']
-    )
-    return jsonify(result)
+        history
+    ))
+    return analysis_response('optimize-energy', result)
 
 @app.route('/predict-maintenance', methods=['POST'])
 def predict_maintenance():
-    data = request.json
-    result = ml_service.predict_maintenance(
+    data = read_request_payload(request)
+    source = history_or_stats(data)
+    result = cached_result('predict-maintenance', data, lambda: ml_service.predict_maintenance(
         data, 
-        data['HistoricalData']
-    )
-    return jsonify(result)
+        source
+    ))
+    return analysis_response('predict-maintenance', result)
 
 @app.route('/calculate-efficiency', methods=['POST'])
 def calculate_efficiency():
-    data = request.json
-    result = ml_service.calculate_efficiency_score(
+    data = read_request_payload(request)
+    source = history_or_stats(data)
+    result = cached_result('calculate-efficiency', data, lambda: ml_service.calculate_efficiency_score(
         data, 
-        data['HistoricalData']
+        source
+    ))
+    return analysis_response('calculate-efficiency', result)
+
+@app.route('/analyze-device', methods=['POST'])
+def analyze_device():
+    """
+    Tahmin + optimizasyon + bakım + verimlilik analizlerini tek istekte döndürür
+    
+    Gövde: tek analiz endpoint'leri ile aynı (HistoricalData, DaysAhead, MaxPowerConsumption,
+    InstallationDate, ...). Opsiyonel 'Analyses': ['Prediction', 'Efficiency', ...]
+    """
+    data = read_request_payload(request)
+    unknown = set(data.get('Analyses') or []) - set(EnergyMLService.DEVICE_ANALYSIS_FIELDS)
+    if unknown:
+        return jsonify({'error': f'Bilinmeyen analiz: {", ".join(sorted(unknown))}'}), 400
+    history = resolve_history(data)
+    result = cached_result('analyze-device', data, lambda: ml_service.analyze_device(
+        data,
+        history,
+        data.get('DaysAhead', 7),
+        data.get('Analyses')
+    ))
+    return analysis_response('analyze-device', result)
+
+# ============================================================================
+# Toplu (Çok Cihazlı) Analiz - ProcessPoolExecutor
+# ============================================================================
+
+# Endpoint adı -> tek cihaz payload'ı ile çalışan analiz fonksiyonu
+# (süreç havuzundaki worker'lar da aynı tabloyu kendi ml_service örnekleri ile kullanır)
+DEVICE_ANALYSES = {
+    'predict-energy': lambda payload: ml_service.predict_energy_consumption(
+        resolve_history(payload), payload['DaysAhead'],
+        payload.get('ReturnSeries', False), payload.get('Resolution', 'daily')
+    ),
+    'detect-anomalies': lambda payload: ml_service.detect_anomalies(
+        resolve_history(payload, 'Data'), payload.get('DeviceId'), payload.get('DeviceType')
+    ),
+    'optimize-energy': lambda payload: ml_service.optimize_energy(payload, resolve_history(payload)),
+    'predict-maintenance': lambda payload: ml_service.predict_maintenance(payload, history_or_stats(payload)),
+    'calculate-efficiency': lambda payload: ml_service.calculate_efficiency_score(payload, history_or_stats(payload)),
+    'analyze-device': lambda payload: ml_service.analyze_device(
+        payload, resolve_history(payload), payload.get('DaysAhead', 7), payload.get('Analyses')
     )
-    return jsonify(result)
+}
+
+# Sonucu sadece istek gövdesine bağlı olan (önbelleğe alınabilen) analizler;
+# detect-anomalies kayıtlı modele bağlı olduğundan önbelleğe alınmaz
+CACHEABLE_ANALYSES = {'predict-energy', 'optimize-energy', 'predict-maintenance', 'calculate-efficiency',
+                      'analyze-device'}
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+
+def _get_batch_pool():
+    """Süreç havuzunu ilk kullanımda oluşturur (worker başına bir havuz)"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # 'spawn': gthread worker'ı çok thread'li olduğundan fork kilit durumlarını kopyalayabilir
+            _batch_pool = ProcessPoolExecutor(
+                max_workers=BATCH_POOL_WORKERS,
+                mp_context=multiprocessing.get_context(BATCH_POOL_START_METHOD)
+            )
+        return _batch_pool
+
+
+def _reset_batch_pool():
+    """Bozulan (ör. worker süreci ölen) havuzu kapatır, sonraki istekte yeniden oluşturulur"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is not None:
+            _batch_pool.shutdown(wait=False, cancel_futures=True)
+            _batch_pool = None
+
+
+def run_device_analysis(task):
+    """Tek cihaz analizi (süreç havuzunda çalışır): hata olursa sadece bu cihaz hatalı döner"""
+    analysis, payload = task
+    try:
+        return {'Status': 'ok', 'Result': DEVICE_ANALYSES[analysis](payload)}
+    except Exception as e:
+        return {'Status': 'error', 'Error': f'{type(e).__name__}: {str(e)}'}
+
+
+def run_batch_analysis(analysis, devices):
+    """
+    Cihaz listesini analiz eder: önbellekte olanlar doğrudan döner, kalanlar
+    süreç havuzuna dağıtılır (az cihaz varsa IPC maliyetinden kaçınmak için aynı süreçte)
+    """
+    use_cache = RESULT_CACHE_ENABLED and analysis in CACHEABLE_ANALYSES
+    results = [None] * len(devices)
+    pending = []
+    for i, payload in enumerate(devices):
+        if use_cache and isinstance(payload, dict) and 'HistoricalData' in payload:
+            hit, value = result_cache.get(result_cache.make_key(analysis, payload))
+            if hit:
+                results[i] = {'Status': 'ok', 'Result': value}
+                continue
+        pending.append(i)
+    
+    tasks = [(analysis, devices[i]) for i in pending]
+    if len(tasks) < BATCH_INLINE_THRESHOLD or BATCH_POOL_WORKERS <= 1:
+        outcomes = [run_device_analysis(task) for task in tasks]
+    else:
+        from concurrent.futures.process import BrokenProcessPool
+        chunksize = max(1, len(tasks) // (BATCH_POOL_WORKERS * 4))
+        try:
+            outcomes = list(_get_batch_pool().map(run_device_analysis, tasks, chunksize=chunksize))
+        except BrokenProcessPool as e:
+            _reset_batch_pool()
+            # Her cihaza ayrı sözlük: Index/DeviceId aşağıda sonuç başına yazılır
+            outcomes = [{'Status': 'error', 'Error': f'Süreç havuzu hatası: {str(e)}'} for _ in tasks]
+    
+    for i, outcome in zip(pending, outcomes):
+        results[i] = outcome
+        if (use_cache and outcome['Status'] == 'ok' and isinstance(devices[i], dict)
+                and 'HistoricalData' in devices[i] and is_cacheable(outcome['Result'])):
+            result_cache.set(result_cache.make_key(analysis, devices[i]), outcome['Result'])
+    
+    for i, (payload, outcome) in enumerate(zip(devices, results)):
+        outcome['Index'] = i
+        outcome['DeviceId'] = payload.get('DeviceId') if isinstance(payload, dict) else None
+    return results
+
+
+@app.route('/batch/<analysis>', methods=['POST'])
+def batch_analysis(analysis):
+    """
+    Toplu analiz: {'Devices': [tek cihaz endpoint'inin gövdesi, ...]}
+    
+    Desteklenen analizler: predict-energy, detect-anomalies, optimize-energy,
+    predict-maintenance, calculate-efficiency. Her cihazın sonucu/hatası ayrı döner.
+    """
+    if analysis not in DEVICE_ANALYSES:
+        return jsonify({'error': f'Bilinmeyen analiz: {analysis}'}), 404
+    data = request.json or {}
+    devices = data.get('Devices')
+    if not isinstance(devices, list):
+        return jsonify({'error': 'Devices listesi gerekli'}), 400
+    
+    results = run_batch_analysis(analysis, devices)
+    return jsonify({
+        'Analysis': analysis,
+        'DeviceCount': len(devices),
+        'ErrorCount': sum(1 for result in results if result['Status'] != 'ok'),
+        'Results': results
+    })
+
+@app.route('/aggregate', methods=['POST'])
+def aggregate_consumption():
+    """
+    Dashboard grafikleri için toplulaştırma: cihaz ve kova (Interval: hour | day | month)
+    bazında toplam, ortalama, tepe ve yük faktörü
+    
+    Gövde: HistoricalData (satır / sütun; DeviceId sütunu varsa çok cihazlı), DeviceId (+ From/To)
+    ile sunucu tarafı geçmiş ya da {'Devices': [bu gövdelerden, ...]}.
+    Opsiyonel: Columns (sayısal özellikler; varsayılan EnergyConsumption, PowerConsumption), Timezone
+    (kova sınırları, ör. Europe/Istanbul; varsayılan UTC)
+    """
+    data = read_request_payload(request)
+    interval = str(data.get('Interval', 'day')).lower()
+    if interval not in INTERVAL_UNITS:
+        return jsonify({'error': f'Geçersiz Interval: {interval} (hour, day, month)'}), 400
+    
+    requested = data.get('Columns') or DEFAULT_COLUMNS
+    non_numeric = [column for column in requested if column not in ANOMALY_FEATURES]
+    if non_numeric:
+        return jsonify({'error': f'Columns sadece sayısal özellikler olabilir ({", ".join(ANOMALY_FEATURES)}): '
+                                 f'{", ".join(map(str, non_numeric))}'}), 400
+    entries = data['Devices'] if isinstance(data.get('Devices'), list) else [data]
+    if not entries:
+        return jsonify({'error': 'Devices boş olamaz'}), 400
+    
+    timer = StageTimer('aggregate')
+    frames = []
+    for entry in entries:
+        frame = to_frame(resolve_history(entry))
+        if 'DeviceId' not in frame.columns:
+            frame['DeviceId'] = str(entry.get('DeviceId', 'all'))
+        frames.append(frame)
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    
+    columns = [column for column in requested if column in df.columns]
+    if not columns:
+        return jsonify({'error': 'Toplulaştırılacak sütun bulunamadı'}), 400
+    try:
+        dates = local_naive_dates(df['Date'], data.get('Timezone'))
+    except KeyError:
+        return jsonify({'error': f'Bilinmeyen Timezone: {data.get("Timezone")}'}), 400
+    timer.mark('frame')
+    
+    result = aggregate(df['DeviceId'].astype(str).to_numpy(), dates,
+                       {column: df[column].to_numpy() for column in columns}, interval)
+    timer.mark('compute')
+    return analysis_response('aggregate', result)
+
+def load_default_tariff():
+    """BILLING_TARIFF_FILE varsa oradaki, yoksa örnek varsayılan tarife"""
+    if BILLING_TARIFF_FILE:
+        with open(BILLING_TARIFF_FILE, encoding='utf-8') as f:
+            return Tariff(json.load(f))
+    return Tariff(DEFAULT_TARIFF)
+
+default_tariff = load_default_tariff()
+
+def device_profile(entry, days):
+    """
+    Tek cihaz girdisinden günlük saat profili ((24,) kWh), öncelik sırasıyla:
+    HourlyProfile, MonthlyEnergy, Forecast (/predict-energy çıktısı; tahmin okuma başına değer,
+    ReadingsPerHour ile saatlik kWh'e çevrilir, varsayılan 1), geçmiş (HistoricalData ya da
+    DeviceId ile sunucu tarafı; UseForecast=true ise geçmişten saatlik tahmin üretilir ve
+    geçmişin okuma sıklığı kullanılır)
+    """
+    if 'HourlyProfile' in entry:
+        profile = np.asarray(entry['HourlyProfile'], dtype=np.float64)
+        if profile.shape != (HOURS,):
+            raise ValueError('HourlyProfile 24 değer içermeli')
+        return profile
+    if 'MonthlyEnergy' in entry:
+        return flat_profile(entry['MonthlyEnergy'])
+    if 'Forecast' in entry:
+        return profile_from_forecast(entry['Forecast'], float(entry.get('ReadingsPerHour', 1.0)))
+    history = resolve_history(entry)
+    frame = to_frame(history)
+    if entry.get('UseForecast'):
+        forecast = ml_service.predict_energy_consumption(history, max(1, int(round(days))), resolution='hourly')
+        if not forecast.get('HourlySeries'):
+            raise ValueError('Tahmin üretilemedi')
+        return profile_from_forecast(forecast, readings_per_hour(frame['Date'].to_numpy()))
+    return profile_from_history(frame['Date'].to_numpy(), frame['EnergyConsumption'].to_numpy())
+
+@app.route('/project-bill', methods=['POST'])
+def project_bill():
+    """
+    Filo fatura projeksiyonu: cihaz başına günlük saat profili x tarife, Days gün (varsayılan 30)
+    
+    Gövde:
+    - Tariff: tarife tanımı (billing.py); yoksa varsayılan tarife
+    - Profiles: {'DeviceId': [...], 'Hourly': [[24 kWh], ...]} - binlerce cihaz için sütunsal hızlı yol
+      (NPZ gövde olarak da gönderilebilir; diğer alanlar X-ML-Payload başlığında)
+    - Devices: [{DeviceId, HourlyProfile | MonthlyEnergy | Forecast (+ReadingsPerHour) | HistoricalData, UseForecast}, ...]
+      (cihaz başına hata Errors listesinde döner, diğer cihazlar hesaplanır)
+    """
+    data = read_request_payload(request, table_field='Profiles') or {}
+    tariff = Tariff(data['Tariff']) if data.get('Tariff') else default_tariff
+    days = float(data.get('Days', TIER_PERIOD_DAYS))
+    if days <= 0:
+        return jsonify({'error': 'Days pozitif olmalı'}), 400
+    
+    timer = StageTimer('project-bill')
+    device_ids, profiles, errors = [], [], []
+    fleet_profiles = data.get('Profiles')
+    if fleet_profiles:
+        hourly = np.asarray(fleet_profiles.get('Hourly'), dtype=np.float64)
+        ids = fleet_profiles.get('DeviceId')
+        ids = list(range(len(hourly))) if ids is None else np.asarray(ids).tolist()
+        if hourly.ndim != 2 or hourly.shape[1] != HOURS or len(ids) != len(hourly):
+            return jsonify({'error': 'Profiles.Hourly (n, 24) matris olmalı, DeviceId ile aynı uzunlukta'}), 400
+        device_ids.extend(ids)
+        profiles.append(hourly)
+    for entry in data.get('Devices') or []:
+        try:
+            profile = device_profile(entry, days)
+        except Exception as e:
+            errors.append({'DeviceId': entry.get('DeviceId'), 'Error': str(e)})
+            continue
+        device_ids.append(entry.get('DeviceId'))
+        profiles.append(profile[None, :])
+    timer.mark('frame')
+    
+    hourly_kwh = np.vstack(profiles) if profiles else np.zeros((0, HOURS))
+    result = bill_response(tariff, device_ids, hourly_kwh, days, errors)
+    timer.mark('compute')
+    return analysis_response('project-bill', result)
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Sonuç önbelleği hit/miss sayaçları (bu worker için)"""
+    return jsonify({**result_cache.stats(), 'Enabled': RESULT_CACHE_ENABLED})
+
+@app.route('/cache', methods=['DELETE'])
+def clear_cache():
+    """Sonuç önbelleğini temizler"""
+    result_cache.clear()
+    return jsonify({'status': 'cleared'})
+
+@app.route('/devices/<device_id>/stats', methods=['GET'])
+def device_stats_summary(device_id):
+    """Consumer'ın cihaz için tuttuğu artımlı istatistikler (son snapshot)"""
+    stats = device_stats_reader.get(device_id)
+    if stats is None:
+        return jsonify({'error': f'Cihaz için istatistik bulunamadı: {device_id}'}), 404
+    return jsonify({'DeviceId': device_id, **stats})
+
+@app.route('/devices/<device_id>/timeseries', methods=['GET'])
+def device_timeseries_summary(device_id):
+    """Zaman serisi deposunda cihaz için tutulan günler ve kayıt sayıları"""
+    summary = timeseries_store.describe(device_id)
+    if not summary['Records']:
+        return jsonify({'error': f'Cihaz için zaman serisi kaydı bulunamadı: {device_id}'}), 404
+    return jsonify(summary)
+
+@app.route('/devices/<device_id>/recent', methods=['GET'])
+def device_recent_summary(device_id):
+    """Paylaşılan bellekteki canlı pencerenin özeti (pencere ortalaması, son okuma)"""
+    summary = shared_history.summary(device_id) if SHARED_HISTORY_ENABLED else None
+    if summary is None:
+        return jsonify({'error': f'Cihaz için canlı pencere bulunamadı: {device_id}'}), 404
+    return jsonify(summary)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_duration(response):
+    """İstek süresi route şablonu bazında (/devices/<device_id>/stats) ölçülür: etiket sayısı sınırlı kalır"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.HTTP_REQUEST_SECONDS.labels(route, request.method, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrikleri (gunicorn altında tüm worker ve consumer süreçleri birleştirilmiş)"""
+    body, content_type = metrics.render()
+    return body, 200, {'Content-Type': content_type}
 
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'timestamp': datetime.now(timezone.utc).isoformat()})
 
+# ============================================================================
+# Isınma (warm-up) ve Hazırlık (readiness)
+# ============================================================================
+
+# /ready: broker erişilemezken 503 dönülsün mü (HTTP analizleri broker'a ihtiyaç duymaz)
+READY_REQUIRE_BROKER = os.getenv('READY_REQUIRE_BROKER', 'false').lower() == 'true'
+READY_BROKER_CHECK_INTERVAL = float(os.getenv('READY_BROKER_CHECK_INTERVAL', '10'))  # Broker yoklama önbelleği (saniye)
+
+warm_up_state = {'WarmedUp': False, 'Seconds': None, 'Pid': None}
+_broker_probe = {'Connected': False, 'CheckedAt': None, 'Error': None}
+_broker_probe_lock = threading.Lock()
+
+
+def warm_up() -> Dict[str, Any]:
+    """
+    Kütüphane kod yollarını ve modelleri ilk istekten önce ısıtır.
+    
+    Küçük sentetik bir geçmiş üzerinde tahmin (LinearRegression fit/predict), anomali
+    (IsolationForest fit/predict + kayıtlı modelle skorlama) ve istatistik analizleri çalıştırılır;
+    pandas/sklearn'ün tembel import'ları ve ilk çağrı maliyetleri burada ödenir. Gunicorn preload
+    modunda master'da bir kez çağrılır, worker'lar ısınmış belleği fork ile (copy-on-write) devralır.
+    """
+    started = time.perf_counter()
+    rows = 48
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    power = 1000 + rng.normal(0, 50, rows)
+    history = {
+        'Date': [(start + timedelta(hours=i)).isoformat() for i in range(rows)],
+        'EnergyConsumption': (power / 1000).tolist(),
+        'PowerConsumption': power.tolist(),
+        'Temperature': (25 + rng.normal(0, 1, rows)).tolist(),
+        'Voltage': (220 + rng.normal(0, 2, rows)).tolist(),
+        'Current': (power / 220).tolist(),
+        'PowerFactor': [0.92] * rows
+    }
+    device_info = {'MaxPowerConsumption': 2000, 'InstallationDate': '2024-01-01'}
+    try:
+        json.dumps(ml_service.analyze_device(device_info, history, days_ahead=2))
+        json.dumps(ml_service.detect_anomalies(history))
+        model_entry = ml_service.model_registry.get(None)
+        if model_entry is not None:
+            X = np.column_stack([history[feature] for feature in ANOMALY_FEATURES])
+            ml_service.model_registry.score(model_entry, X)
+    except Exception as e:
+        logger.exception("⚠ Isınma (warm-up) tamamlanamadı: %s", e)
+        return warm_up_state
+    
+    warm_up_state.update(WarmedUp=True, Seconds=round(time.perf_counter() - started, 3), Pid=os.getpid())
+    logger.info("✓ ML servisi ısındı (%.2f sn, %d anomali modeli yüklü)",
+                warm_up_state['Seconds'], len(ml_service.model_registry.describe()))
+    return warm_up_state
+
+
+def broker_status() -> Dict[str, Any]:
+    """
+    RabbitMQ erişilebilirliği: yayıncı bağlıysa doğrudan, değilse kısa bir bağlantı denemesiyle
+    (sonuç READY_BROKER_CHECK_INTERVAL saniye önbellekte tutulur, probe'lar broker'ı yormaz)
+    """
+    if result_sender.publisher.stats()['Connected']:
+        return {'Connected': True, 'Source': 'publisher'}
+    with _broker_probe_lock:
+        checked_at = _broker_probe['CheckedAt']
+        if checked_at is None or time.monotonic() - checked_at >= READY_BROKER_CHECK_INTERVAL:
+            try:
+                parameters = rabbitmq_parameters()
+                parameters.socket_timeout = 2
+                parameters.connection_attempts = 1
+                pika.BlockingConnection(parameters).close()
+                _broker_probe.update(Connected=True, Error=None)
+            except Exception as e:
+                _broker_probe.update(Connected=False, Error=f'{type(e).__name__}: {e}' if str(e) else type(e).__name__)
+            _broker_probe['CheckedAt'] = time.monotonic()
+        status = {'Connected': _broker_probe['Connected'], 'Source': 'probe'}
+        if _broker_probe['Error']:
+            status['Error'] = _broker_probe['Error']
+        return status
+
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """
+    Hazırlık (readiness): modeller yüklendi/ısındı mı, broker erişilebilir mi
+    
+    /health sadece sürecin ayakta olduğunu (liveness) söyler; /ready ısınma tamamlanmadan
+    (ve READY_REQUIRE_BROKER=true iken broker erişilemezken) 503 döner.
+    """
+    models = {
+        'WarmedUp': warm_up_state['WarmedUp'],
+        'WarmUpSeconds': warm_up_state['Seconds'],
+        'Preloaded': warm_up_state['Pid'] is not None and warm_up_state['Pid'] != os.getpid(),
+        'AnomalyModels': len(ml_service.model_registry.describe())
+    }
+    broker = broker_status()
+    ready = models['WarmedUp'] and (broker['Connected'] or not READY_REQUIRE_BROKER)
+    return jsonify({
+        'status': 'ready' if ready else 'not_ready',
+        'Models': models,
+        'Broker': broker,
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }), 200 if ready else 503
+
 # ============================================================================
 # RabbitMQ Consumer ve API'ye Geri Gönderme
 # ============================================================================
@@ -780,6 +1649,17 @@ def health_check():
 API_BASE_URL = os.getenv('API_BASE_URL', 'https://localhost:5001')
 API_CALLBACK_URL = f"{API_BASE_URL}/api/EnergyApi/ml-results"
 API_VERIFY_SSL = os.getenv('API_VERIFY_SSL', 'false').lower() == 'true'
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', '10'))
+
+# API callback outbox ayarları (asenkron, toplu gönderim)
+OUTBOX_ENABLED = os.getenv('OUTBOX_ENABLED', 'true').lower() == 'true'
+OUTBOX_MAX_SIZE = int(os.getenv('OUTBOX_MAX_SIZE', '10000'))  # Bekleyen maksimum sonuç
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))  # Tek POST'taki maksimum sonuç
+OUTBOX_MAX_WAIT = float(os.getenv('OUTBOX_MAX_WAIT', '0.5'))  # Batch dolmasını bekleme süresi (saniye)
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', '2'))  # Sender thread sayısı
+OUTBOX_FULL_POLICY = os.getenv('OUTBOX_FULL_POLICY', 'drop_oldest').lower()  # drop_oldest | drop_new | block
+OUTBOX_BLOCK_TIMEOUT = float(os.getenv('OUTBOX_BLOCK_TIMEOUT', '5'))  # block politikasında maksimum bekleme
+OUTBOX_MAX_RETRIES = int(os.getenv('OUTBOX_MAX_RETRIES', '5'))  # Geçici hatalarda yeniden deneme
 
 # RabbitMQ ayarları
 RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'localhost')
@@ -789,6 +1669,33 @@ RABBITMQ_PASS = os.getenv('RABBITMQ_PASS', 'guest')
 RABBITMQ_QUEUE = os.getenv('RABBITMQ_QUEUE', 'sensor-data')
 RABBITMQ_RESULTS_QUEUE = os.getenv('RABBITMQ_RESULTS_QUEUE', 'ml-results')
 
+# ml-results yayıncısı (publisher confirms)
+RABBITMQ_PUBLISHER_CHANNELS = int(os.getenv('RABBITMQ_PUBLISHER_CHANNELS', '4'))  # Kanal havuzu boyutu
+RABBITMQ_PUBLISHER_MAX_UNCONFIRMED = int(os.getenv('RABBITMQ_PUBLISHER_MAX_UNCONFIRMED', '1000'))  # Kanal başına
+RABBITMQ_PUBLISHER_MAX_PENDING = int(os.getenv('RABBITMQ_PUBLISHER_MAX_PENDING', '50000'))  # Bağlantı yokken tutulacak
+
+
+def rabbitmq_parameters() -> pika.ConnectionParameters:
+    """RabbitMQ bağlantı parametreleri"""
+    return pika.ConnectionParameters(
+        host=RABBITMQ_HOST,
+        port=RABBITMQ_PORT,
+        credentials=pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS),
+        heartbeat=600,
+        blocked_connection_timeout=300
+    )
+
+# Consumer modu: 'batch' (mesajlar gruplar halinde işlenir) veya 'single' (mesaj mesaj)
+CONSUMER_MODE = os.getenv('CONSUMER_MODE', 'batch').lower()
+CONSUMER_BATCH_SIZE = int(os.getenv('CONSUMER_BATCH_SIZE', '100'))  # Batch başına maksimum mesaj
+CONSUMER_BATCH_MAX_WAIT = float(os.getenv('CONSUMER_BATCH_MAX_WAIT', '0.2'))  # Batch için maksimum bekleme (saniye)
+# Onaylanmamış maksimum mesaj sayısı (batch modunda en az bir batch kadar olmalı)
+RABBITMQ_PREFETCH = int(os.getenv(
+    'RABBITMQ_PREFETCH', str(CONSUMER_BATCH_SIZE * 2 if CONSUMER_MODE == 'batch' else 1)
+))
+MESSAGE_MAX_AGE_SECONDS = 300  # 5 dakikadan eski mesajlar işlenmez
+QUEUE_DEPTH_METRICS_INTERVAL = float(os.getenv('QUEUE_DEPTH_METRICS_INTERVAL', '5'))  # Kuyruk derinliği ölçüm aralığı (saniye)
+
 
 class MLResultSender:
     """ML sonuçlarını API'ye JSON formatında gönderen sınıf"""
@@ -800,242 +1707,343 @@ class MLResultSender:
             import urllib3
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         
-        # RabbitMQ connection pooling için global connection ve channel
-        self._rabbitmq_connection = None
-        self._rabbitmq_channel = None
-        self._rabbitmq_lock = threading.Lock()
+        # ml-results kuyruğu için publisher confirms kullanan, kanal havuzlu yayıncı
+        # (kendi I/O thread'inde çalışır, çağıran thread'ler tek kilit/soket üzerinde beklemez)
+        self.publisher = ConfirmedPublisher(
+            rabbitmq_parameters,
+            RABBITMQ_RESULTS_QUEUE,
+            channel_count=RABBITMQ_PUBLISHER_CHANNELS,
+            max_unconfirmed=RABBITMQ_PUBLISHER_MAX_UNCONFIRMED,
+            max_pending=RABBITMQ_PUBLISHER_MAX_PENDING
+        )
+    
+    @staticmethod
+    def build_api_payload(device_id: int, result_type: str, result_data: Dict[str, Any]) -> Dict[str, Any]:
+        """API'nin beklediği MLResultRequest gövdesi"""
+        return {
+            'deviceId': device_id,
+            'resultType': result_type,
+            'resultData': result_data,
+            'processedAt': datetime.now(timezone.utc).isoformat(),
+            'mlServiceVersion': '1.0'
+        }
     
-    def send_to_api(self, device_id: int, result_type: str, result_data: Dict[str, Any]) -> bool:
-        """ML sonuçlarını API'ye JSON formatında gönderir"""
+    def _post_to_api(self, body) -> str:
+        """Tek sonuç (dict) ya da toplu sonuç (list) gönderir; outbox iletim sonucunu döndürür"""
+        with metrics.CALLBACK_SECONDS.labels('api_post').time():
+            outcome = self._post_to_api_once(body)
+        metrics.CALLBACK_RESULTS.labels('api_post', outcome).inc(len(body) if isinstance(body, list) else 1)
+        return outcome
+    
+    def _post_to_api_once(self, body) -> str:
         try:
-            payload = {
-                'deviceId': device_id,
-                'resultType': result_type,
-                'resultData': result_data,
-                'processedAt': datetime.now(timezone.utc).isoformat(),
-                'mlServiceVersion': '1.0'
-            }
-            
             response = self.session.post(
                 API_CALLBACK_URL,
-                json=payload,
+                json=body,
                 headers={'Content-Type': 'application/json'},
-                timeout=10
+                timeout=API_TIMEOUT
             )
-            
-            if response.status_code in [200, 201]:
-                print(f"✓ ML sonucu API'ye gönderildi: Device {device_id}, Type: {result_type}")
-                return True
-            else:
-                print(f"✗ API gönderim hatası: {response.status_code} - {response.text}")
-                return False
-                
         except Exception as e:
-            print(f"✗ API gönderim hatası: {str(e)}")
-            return False
+            logger.warning("✗ API gönderim hatası: %s", e)
+            return OUTBOX_RETRY
+        
+        if response.status_code in [200, 201]:
+            return OUTBOX_DELIVERED
+        logger.warning("✗ API gönderim hatası: %s - %s", response.status_code, response.text)
+        if response.status_code in (408, 429) or response.status_code >= 500:
+            return OUTBOX_RETRY
+        return OUTBOX_REJECTED
     
-    def _ensure_rabbitmq_connection(self) -> bool:
-        """RabbitMQ bağlantısını kontrol et ve gerekirse yeniden oluştur"""
-        with self._rabbitmq_lock:
-            try:
-                # Bağlantı var mı ve açık mı kontrol et
-                if self._rabbitmq_connection is None or self._rabbitmq_connection.is_closed:
-                    self._rabbitmq_connection = pika.BlockingConnection(
-                        pika.ConnectionParameters(
-                            host=RABBITMQ_HOST,
-                            port=RABBITMQ_PORT,
-                            credentials=pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS),
-                            heartbeat=600,
-                            blocked_connection_timeout=300
-                        )
-                    )
-                    self._rabbitmq_channel = self._rabbitmq_connection.channel()
-                    # Results queue'yu tanımla
-                    self._rabbitmq_channel.queue_declare(queue=RABBITMQ_RESULTS_QUEUE, durable=True)
-                    print("✓ RabbitMQ bağlantısı oluşturuldu (connection pooling)")
-                
-                # Channel var mı ve açık mı kontrol et
-                if self._rabbitmq_channel is None or self._rabbitmq_channel.is_closed:
-                    if self._rabbitmq_connection and not self._rabbitmq_connection.is_closed:
-                        self._rabbitmq_channel = self._rabbitmq_connection.channel()
-                        self._rabbitmq_channel.queue_declare(queue=RABBITMQ_RESULTS_QUEUE, durable=True)
-                    else:
-                        return False
-                
-                return True
-            except Exception as e:
-                print(f"⚠ RabbitMQ bağlantı hatası: {str(e)}")
-                # Bağlantıyı temizle, bir sonraki çağrıda yeniden oluşturulacak
-                self._rabbitmq_connection = None
-                self._rabbitmq_channel = None
-                return False
+    def post_results(self, payloads: List[Dict[str, Any]]) -> str:
+        """Outbox sender thread'leri için: sonuç listesini tek istekte (dizi gövde) gönderir"""
+        outcome = self._post_to_api(payloads)
+        if outcome == OUTBOX_DELIVERED:
+            message_log.info("✓ %d ML sonucu API'ye gönderildi (toplu)", len(payloads))
+        return outcome
+    
+    def send_to_api(self, device_id: int, result_type: str, result_data: Dict[str, Any], wait: bool = False) -> bool:
+        """
+        ML sonuçlarını API'ye JSON formatında gönderir.
+        
+        Varsayılan olarak sonuç outbox'a bırakılır ve hemen döner (consumer API'yi beklemez);
+        wait=True ya da OUTBOX_ENABLED=false ise istek senkron yapılır.
+        """
+        payload = self.build_api_payload(device_id, result_type, result_data)
+        if OUTBOX_ENABLED and not wait:
+            with metrics.CALLBACK_SECONDS.labels('api_enqueue').time():
+                accepted = result_outbox.put(payload)
+            metrics.CALLBACK_RESULTS.labels('api_enqueue', 'accepted' if accepted else 'dropped').inc()
+            return accepted
+        
+        if self._post_to_api(payload) == OUTBOX_DELIVERED:
+            message_log.info("✓ ML sonucu API'ye gönderildi: Device %s, Type: %s", device_id, result_type)
+            return True
+        return False
+    
+    @staticmethod
+    def build_rabbitmq_message(result_type: str, result_data: Dict[str, Any]) -> str:
+        """ml-results kuyruğuna yazılan JSON mesaj"""
+        return json.dumps({
+            'resultType': result_type,
+            'resultData': result_data,
+            'processedAt': datetime.now(timezone.utc).isoformat()
+        })
     
     def send_to_rabbitmq(self, result_type: str, result_data: Dict[str, Any]) -> bool:
-        """ML sonuçlarını RabbitMQ'ya JSON formatında gönderir (connection pooling ile)"""
+        """ML sonucunu RabbitMQ yayın kuyruğuna ekler (onay arka planda, toplu beklenir)"""
+        return self.send_many_to_rabbitmq([(result_type, result_data)]) == 1
+    
+    def send_many_to_rabbitmq(self, results: List[tuple]) -> int:
+        """(result_type, result_data) listesini tek seferde yayın kuyruğuna ekler"""
+        if not results:
+            return 0
+        started = time.perf_counter()
         try:
-            # Bağlantıyı kontrol et ve gerekirse oluştur
-            if not self._ensure_rabbitmq_connection():
-                return False
-            
-            # Mesajı gönder
-            payload = {
-                'resultType': result_type,
-                'resultData': result_data,
-                'processedAt': datetime.now(timezone.utc).isoformat()
-            }
-            
-            message = json.dumps(payload)
-            
-            with self._rabbitmq_lock:
-                self._rabbitmq_channel.basic_publish(
-                    exchange='',
-                    routing_key=RABBITMQ_RESULTS_QUEUE,
-                    body=message,
-                    properties=pika.BasicProperties(
-                        delivery_mode=2,  # Mesajı kalıcı yap
-                        content_type='application/json'
-                    )
-                )
-            
-            print(f"✓ ML sonucu RabbitMQ'ya gönderildi: Type: {result_type}")
-            return True
-            
+            published = self.publisher.publish_many(
+                [self.build_rabbitmq_message(result_type, result_data) for result_type, result_data in results]
+            )
         except Exception as e:
-            print(f"✗ RabbitMQ gönderim hatası: {str(e)}")
-            # Hata durumunda bağlantıyı temizle
-            with self._rabbitmq_lock:
-                self._rabbitmq_connection = None
-                self._rabbitmq_channel = None
-            return False
+            logger.error("✗ RabbitMQ gönderim hatası: %s", e)
+            published = 0
+        metrics.CALLBACK_SECONDS.labels('rabbitmq_publish').observe(time.perf_counter() - started)
+        metrics.CALLBACK_RESULTS.labels('rabbitmq_publish', 'accepted').inc(published)
+        if published < len(results):
+            metrics.CALLBACK_RESULTS.labels('rabbitmq_publish', 'dropped').inc(len(results) - published)
+        return published
     
     def close_rabbitmq_connection(self):
-        """RabbitMQ bağlantısını kapat (cleanup için)"""
-        with self._rabbitmq_lock:
-            try:
-                if self._rabbitmq_channel and not self._rabbitmq_channel.is_closed:
-                    self._rabbitmq_channel.close()
-                if self._rabbitmq_connection and not self._rabbitmq_connection.is_closed:
-                    self._rabbitmq_connection.close()
-            except:
-                pass
-            finally:
-                self._rabbitmq_connection = None
-                self._rabbitmq_channel = None
+        """Bekleyen mesajların onayını bekler ve yayıncı bağlantısını kapatır (cleanup için)"""
+        self.publisher.stop(timeout=5.0)
 
 
 # ML sonuç gönderici
 result_sender = MLResultSender()
 
+# API callback outbox'ı: consumer sonuçları bırakır, sender thread'leri toplu POST yapar
+result_outbox = ResultOutbox(
+    result_sender.post_results,
+    max_size=OUTBOX_MAX_SIZE,
+    batch_size=OUTBOX_BATCH_SIZE,
+    max_wait=OUTBOX_MAX_WAIT,
+    workers=OUTBOX_WORKERS,
+    full_policy=OUTBOX_FULL_POLICY,
+    block_timeout=OUTBOX_BLOCK_TIMEOUT,
+    max_retries=OUTBOX_MAX_RETRIES
+)
+atexit.register(result_outbox.stop, OUTBOX_MAX_WAIT + API_TIMEOUT)
+atexit.register(result_sender.close_rabbitmq_connection)
 
-def process_sensor_data(message_data: Dict[str, Any]) -> None:
-    """Sensor verisini işler ve ML analizleri yapar"""
+# Cihaz bazlı son okumalar (consumer içinde, NumPy halka tamponları)
+stream_windows = DeviceWindowStore(STREAM_WINDOW_SIZE, len(ANOMALY_FEATURES), STREAM_MAX_DEVICES)
+
+# Cihaz bazlı artımlı istatistikler; her consumer süreci kendi snapshot dosyasını yazar
+# (ör. device_stats-<host>-<slot>.npz), okuyucu tüm dosyaları birleştirir
+device_stats = DeviceStatsStore(
+    ANOMALY_FEATURES,
+    ewma_alpha=DEVICE_STATS_EWMA_ALPHA,
+    snapshot_dir=DEVICE_STATS_DIR,
+    snapshot_name=f"{socket.gethostname()}-{os.getenv('CONSUMER_SLOT', '0')}",
+    snapshot_interval=DEVICE_STATS_SNAPSHOT_INTERVAL
+)
+atexit.register(device_stats.snapshot)
+
+
+# Mesaj alanları (ANOMALY_FEATURES ile aynı sırada)
+SENSOR_MESSAGE_FIELDS = ['energyUsed', 'powerConsumption', 'temperature',
+                         'voltage', 'current', 'powerFactor']
+
+
+def process_sensor_batch(messages: List[Dict[str, Any]]) -> None:
+    """
+    Sensor mesajlarını toplu işler ve ML analizleri yapar
+    
+    - Mesajlar tek bir (n, 6) NumPy matrisine dönüştürülür
+    - Eşik kontrolleri ve verimlilik formülü tüm satırlar için vektörel hesaplanır
+    - Isolation Forest skorlaması cihaz bazında tek çağrıda yapılır
+    """
+    started = time.perf_counter()
     try:
-        device_id = message_data.get('deviceId')
-        if not device_id:
-            print("✗ DeviceId bulunamadı")
+        valid_messages = []
+        for message_data in messages:
+            if not message_data.get('deviceId'):
+                message_log.warning("✗ DeviceId bulunamadı")
+                metrics.CONSUMER_MESSAGES.labels('invalid').inc()
+                continue
+            valid_messages.append(message_data)
+        if not valid_messages:
             return
         
-        # Tek veri noktası için anomali kontrolü
-        single_data_point = {
-            'Date': message_data.get('recordedAt', datetime.now(timezone.utc).isoformat()),
-            'EnergyConsumption': message_data.get('energyUsed', 0),
-            'PowerConsumption': message_data.get('powerConsumption', 0),
-            'Temperature': message_data.get('temperature', 0),
-            'Voltage': message_data.get('voltage', 0),
-            'Current': message_data.get('current', 0),
-            'PowerFactor': message_data.get('powerFactor', 0)
-        }
+        device_ids = [message_data['deviceId'] for message_data in valid_messages]
+        X = np.array(
+            [[message_data.get(field) or 0 for field in SENSOR_MESSAGE_FIELDS] for message_data in valid_messages],
+            dtype=np.float64
+        )
+        now_iso = datetime.now(timezone.utc).isoformat()
+        detected_at = [message_data.get('recordedAt') or now_iso for message_data in valid_messages]
         
-        # Anomali tespiti
-        anomalies = ml_service.detect_anomalies([single_data_point])
+        # Okumaları cihaz pencerelerine ekle
+        windows = [stream_windows.append(device_id, row) for device_id, row in zip(device_ids, X)]
         
-        if anomalies:
-            # Anomali bulundu - API'ye gönder
-            anomaly_result = {
-                'anomalies': anomalies,
-                'deviceId': device_id,
-                'originalData': message_data
-            }
-            result_sender.send_to_api(device_id, 'anomaly_detection', anomaly_result)
-            result_sender.send_to_rabbitmq('anomaly_detection', anomaly_result)
+        # Cihaz istatistiklerini güncelle (mesaj başına O(1), geçmiş saklanmaz)
+        if DEVICE_STATS_ENABLED:
+            device_stats.update(device_ids, X)
+            device_stats.maybe_snapshot()
         
-        # Verimlilik skoru hesaplama (basit)
-        efficiency_data = {
-            'deviceId': device_id,
-            'powerConsumption': message_data.get('powerConsumption', 0),
-            'powerFactor': message_data.get('powerFactor', 0),
-            'temperature': message_data.get('temperature', 0),
-            'voltage': message_data.get('voltage', 0)
-        }
+        # Okumaları cihazın zaman serisine ve paylaşılan canlı penceresine ekle
+        # (recordedAt yoksa/çözülemezse işlenme zamanı)
+        if TIMESERIES_ENABLED or SHARED_HISTORY_ENABLED:
+            recorded = pd.to_datetime(pd.Series(detected_at), utc=True, errors='coerce', format='ISO8601')
+            recorded = recorded.fillna(pd.Timestamp.now(tz='UTC'))
+            timestamps_ms = ((recorded - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)).to_numpy()
+            if TIMESERIES_ENABLED:
+                timeseries_store.append(device_ids, timestamps_ms, X)
+            if SHARED_HISTORY_ENABLED:
+                shared_history.append(device_ids, timestamps_ms, X)
         
-        # Basit verimlilik skoru
-        power_factor_score = efficiency_data['powerFactor'] * 100
-        voltage_stability = 100 - abs(efficiency_data['voltage'] - 220) * 2
-        temp_stability = 100 - abs(efficiency_data['temperature'] - 25) * 2
+        # Anomali tespiti (her okuma, cihaz penceresi ile karşılaştırılır)
+        device_types = [message_data.get('deviceType') for message_data in valid_messages]
+        anomalies_per_row = ml_service.detect_stream_anomalies_batch(
+            device_ids, X, detected_at, windows, device_types
+        )
+        
+        rabbitmq_results = []
+        for device_id, message_data, anomalies in zip(device_ids, valid_messages, anomalies_per_row):
+            if anomalies:
+                # Anomali bulundu - API'ye gönder
+                anomaly_result = {
+                    'anomalies': anomalies,
+                    'deviceId': device_id,
+                    'originalData': message_data
+                }
+                result_sender.send_to_api(device_id, 'anomaly_detection', anomaly_result)
+                rabbitmq_results.append(('anomaly_detection', anomaly_result))
+        
+        # Basit verimlilik skoru (tüm batch için vektörel)
+        temperature = X[:, 2]
+        voltage = X[:, 3]
+        power_factor = X[:, 5]
+        power_factor_score = power_factor * 100
+        voltage_stability = 100 - np.abs(voltage - 220) * 2
+        temp_stability = 100 - np.abs(temperature - 25) * 2
         
         overall_score = (power_factor_score * 0.5 + voltage_stability * 0.25 + temp_stability * 0.25)
+        efficiency_levels = ml_service._get_efficiency_levels(overall_score)
+        processed_at = datetime.now().isoformat()
         
-        efficiency_result = {
-            'deviceId': device_id,
-            'overallScore': float(overall_score),
-            'efficiencyLevel': ml_service._get_efficiency_level(overall_score),
-            'metrics': [
-                {
-                    'metricName': 'Güç Faktörü',
-                    'value': float(efficiency_data['powerFactor']),
-                    'score': float(power_factor_score),
-                    'unit': ''
-                },
-                {
-                    'metricName': 'Voltaj Stabilitesi',
-                    'value': float(voltage_stability),
-                    'score': float(voltage_stability),
-                    'unit': '%'
-                }
-            ],
-            'processedAt': datetime.now().isoformat()
-        }
+        for i, device_id in enumerate(device_ids):
+            efficiency_result = {
+                'deviceId': device_id,
+                'overallScore': float(overall_score[i]),
+                'efficiencyLevel': str(efficiency_levels[i]),
+                'metrics': [
+                    {
+                        'metricName': 'Güç Faktörü',
+                        'value': float(power_factor[i]),
+                        'score': float(power_factor_score[i]),
+                        'unit': ''
+                    },
+                    {
+                        'metricName': 'Voltaj Stabilitesi',
+                        'value': float(voltage_stability[i]),
+                        'score': float(voltage_stability[i]),
+                        'unit': '%'
+                    }
+                ],
+                'processedAt': processed_at,
+                # Okumanın kaydedilme zamanı: ml-results okuyucuları uçtan uca gecikmeyi ölçebilir
+                'recordedAt': valid_messages[i].get('recordedAt')
+            }
+            
+            # Verimlilik sonuçlarını gönder
+            result_sender.send_to_api(device_id, 'efficiency_score', efficiency_result)
+            rabbitmq_results.append(('efficiency_score', efficiency_result))
         
-        # Verimlilik sonuçlarını gönder
-        result_sender.send_to_api(device_id, 'efficiency_score', efficiency_result)
-        result_sender.send_to_rabbitmq('efficiency_score', efficiency_result)
+        # Tüm batch sonuçları tek seferde yayıncıya verilir
+        result_sender.send_many_to_rabbitmq(rabbitmq_results)
         
+        metrics.CONSUMER_BATCH_SECONDS.observe(time.perf_counter() - started)
+        metrics.CONSUMER_BATCH_SIZE.observe(len(valid_messages))
+        metrics.CONSUMER_MESSAGES.labels('processed').inc(len(valid_messages))
     except Exception as e:
-        print(f"✗ Sensor verisi işleme hatası: {str(e)}")
+        logger.exception("✗ Sensor verisi işleme hatası: %s", e)
+        metrics.CONSUMER_MESSAGES.labels('error').inc(len(messages))
+
+
+def process_sensor_data(message_data: Dict[str, Any]) -> None:
+    """Sensor verisini işler ve ML analizleri yapar (tek mesajlık batch)"""
+    process_sensor_batch([message_data])
+
+
+def _message_age_seconds(recorded_at: Optional[str]) -> Optional[float]:
+    """recordedAt (ISO format) ile şimdiki zaman arasındaki farkı saniye olarak döndürür"""
+    if not recorded_at:
+        return None
+    # ISO format string'i parse et
+    message_time = datetime.fromisoformat(recorded_at.replace('Z', '+00:00'))
+    
+    # Eğer timezone bilgisi yoksa UTC olarak kabul et
+    if message_time.tzinfo is None:
+        message_time = message_time.replace(tzinfo=timezone.utc)
+    
+    # Şimdiki zamanı UTC olarak al (her zaman UTC kullan)
+    return (datetime.now(timezone.utc) - message_time).total_seconds()
+
+
+def _is_stale_message(message_data: Dict[str, Any]) -> bool:
+    """5 dakikadan eski mesajları tespit eder (eski mesajlar için alert oluşturma)"""
+    try:
+        age = _message_age_seconds(message_data.get('recordedAt'))
+    except Exception as time_ex:
+        message_log.warning("⚠ Tarih parse hatası, mesaj işleniyor: %s", time_ex)
+        return False
+    if age is None:
+        return False
+    if age > MESSAGE_MAX_AGE_SECONDS:
+        message_log.warning("⚠ Eski mesaj atlandı: Device %s, Yaş: %.0f saniye", message_data.get('deviceId'), age)
+        metrics.CONSUMER_MESSAGES.labels('stale').inc()
+        return True
+    metrics.CONSUMER_MESSAGE_AGE_SECONDS.observe(max(0.0, age))
+    return False
+
+
+_queue_depth_observed_at = 0.0
+
+
+def observe_queue_depths(channel) -> None:
+    """
+    Kuyruk derinliği metriklerini günceller (en fazla QUEUE_DEPTH_METRICS_INTERVAL saniyede bir)
+    
+    Broker kuyruğu pasif queue_declare ile okunur; outbox ve yayıncı tamponları bu sürece aittir.
+    """
+    global _queue_depth_observed_at
+    now = time.monotonic()
+    if now - _queue_depth_observed_at < QUEUE_DEPTH_METRICS_INTERVAL:
+        return
+    _queue_depth_observed_at = now
+    try:
+        declared = channel.queue_declare(queue=RABBITMQ_QUEUE, passive=True)
+        metrics.BROKER_QUEUE_DEPTH.labels(RABBITMQ_QUEUE).set(declared.method.message_count)
+    except Exception as e:
+        logger.warning("⚠ Kuyruk derinliği okunamadı: %s", e)
+    outbox_stats = result_outbox.stats()
+    publisher_stats = result_sender.publisher.stats()
+    metrics.LOCAL_QUEUE_DEPTH.labels('outbox').set(outbox_stats['Pending'] + outbox_stats['InFlight'])
+    metrics.LOCAL_QUEUE_DEPTH.labels('publisher').set(publisher_stats['Pending'] + publisher_stats['Unconfirmed'])
 
 
 def rabbitmq_callback(ch, method, properties, body):
-    """RabbitMQ mesaj callback fonksiyonu"""
+    """RabbitMQ mesaj callback fonksiyonu (tek mesaj modu)"""
+    observe_queue_depths(ch)
     try:
         message_data = json.loads(body.decode('utf-8'))
         device_id = message_data.get('deviceId')
-        recorded_at = message_data.get('recordedAt')
         
-        # Mesajın zamanını kontrol et - eğer 5 dakikadan eskiyse işleme (eski mesajlar için alert oluşturma)
-        if recorded_at:
-            try:
-                from datetime import timezone
-                # ISO format string'i parse et
-                message_time_str = recorded_at.replace('Z', '+00:00')
-                message_time = datetime.fromisoformat(message_time_str)
-                
-                # Eğer timezone bilgisi yoksa UTC olarak kabul et
-                if message_time.tzinfo is None:
-                    message_time = message_time.replace(tzinfo=timezone.utc)
-                
-                # Şimdiki zamanı UTC olarak al (her zaman UTC kullan)
-                now = datetime.now(timezone.utc)
-                
-                # Zaman farkını hesapla
-                time_diff = now - message_time
-                if time_diff.total_seconds() > 300:  # 5 dakikadan eski mesajlar
-                    print(f"⚠ Eski mesaj atlandı: Device {device_id}, Yaş: {time_diff.total_seconds():.0f} saniye")
-                    ch.basic_ack(delivery_tag=method.delivery_tag)
-                    return
-            except Exception as time_ex:
-                print(f"⚠ Tarih parse hatası, mesaj işleniyor: {str(time_ex)}")
-        
-        print(f"📥 RabbitMQ'dan mesaj alındı: Device {device_id}")
+        # Mesajın zamanını kontrol et - eğer 5 dakikadan eskiyse işleme
+        if _is_stale_message(message_data):
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            return
+        
+        message_log.info("📥 RabbitMQ'dan mesaj alındı: Device %s", device_id)
         
         # ML işlemlerini yap
         process_sensor_data(message_data)
@@ -1044,17 +2052,80 @@ def rabbitmq_callback(ch, method, properties, body):
         ch.basic_ack(delivery_tag=method.delivery_tag)
         
     except Exception as e:
-        print(f"✗ RabbitMQ callback hatası: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("✗ RabbitMQ callback hatası: %s", e)
+        metrics.CONSUMER_MESSAGES.labels('invalid').inc()
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
 
 
-def start_rabbitmq_consumer():
-    """RabbitMQ consumer'ı başlatır (retry mekanizması ile)"""
-    import traceback
-    import time
+def parse_deliveries(deliveries) -> List[Dict[str, Any]]:
+    """
+    Teslimatları JSON mesajlarına çevirir; bozuk/eski mesajlar atlanır (tek mesaj modundaki
+    nack(requeue=False) ile aynı sonuç: mesaj kuyruktan düşer)
+    """
+    messages = []
+    for method, body in deliveries:
+        try:
+            message_data = json.loads(body.decode('utf-8'))
+        except Exception as e:
+            message_log.warning("✗ Mesaj parse hatası, atlandı: %s", e)
+            metrics.CONSUMER_MESSAGES.labels('invalid').inc()
+            continue
+        if not _is_stale_message(message_data):
+            messages.append(message_data)
+    return messages
+
+
+def handle_message_batch(channel, deliveries) -> None:
+    """
+    Toplanan mesajları tek seferde işler ve tek basic_ack(multiple=True) ile onaylar
+    
+    İşleme hatası olursa da batch onaylanır, aksi halde aynı hatalı batch sürekli yeniden
+    teslim edilirdi.
+    """
+    messages = parse_deliveries(deliveries)
+    if messages:
+        message_log.info("📥 RabbitMQ'dan %d mesaj alındı (batch)", len(messages))
+        process_sensor_batch(messages)
+    
+    # Son delivery_tag'e kadar tüm mesajları tek seferde onayla
+    channel.basic_ack(delivery_tag=deliveries[-1][0].delivery_tag, multiple=True)
+
+
+def consume_in_batches(channel, handle_batch=handle_message_batch, poll=None) -> None:
+    """
+    Mesajları CONSUMER_BATCH_SIZE adetlik gruplar halinde tüketir
     
+    Batch dolunca ya da ilk mesajdan sonra CONSUMER_BATCH_MAX_WAIT saniye geçince işlenir;
+    böylece düşük trafikte gecikme sınırlı kalır, yüksek trafikte mesaj başı maliyet düşer.
+    handle_batch(channel, deliveries) batch'i işler; poll(channel) her döngüde (boşta en geç
+    CONSUMER_BATCH_MAX_WAIT saniyede bir) çağrılır (ör. gecikmeli onaylar için).
+    """
+    deliveries = []
+    deadline = None
+    for method, properties, body in channel.consume(
+            RABBITMQ_QUEUE, inactivity_timeout=CONSUMER_BATCH_MAX_WAIT):
+        if method is not None:
+            deliveries.append((method, body))
+            if deadline is None:
+                deadline = time.monotonic() + CONSUMER_BATCH_MAX_WAIT
+        
+        if deliveries and (method is None or len(deliveries) >= CONSUMER_BATCH_SIZE
+                           or time.monotonic() >= deadline):
+            handle_batch(channel, deliveries)
+            deliveries = []
+            deadline = None
+        if poll is not None:
+            poll(channel)
+        observe_queue_depths(channel)
+
+
+def start_rabbitmq_consumer(consume=None):
+    """
+    RabbitMQ consumer'ı başlatır (retry mekanizması ile)
+    
+    consume(channel) verilirse kuyruk onunla tüketilir (ör. consumer.py'deki deviceId
+    yönlendiricisi); yoksa CONSUMER_MODE'a göre batch ya da tek mesaj modu.
+    """
     # Exchange adı (.NET tarafıyla aynı olmalı)
     exchange_name = os.getenv('RABBITMQ_EXCHANGE', 'aygaz.sensors')
     routing_key = f'sensor.{RABBITMQ_QUEUE}'  # sensor.sensor-data
@@ -1066,8 +2137,8 @@ def start_rabbitmq_consumer():
     
     for attempt in range(1, max_retries + 1):
         try:
-            print(f"🔄 RabbitMQ bağlantısı deneniyor ({attempt}/{max_retries}): {RABBITMQ_HOST}:{RABBITMQ_PORT}")
-            print(f"   Exchange: {exchange_name}, Queue: {RABBITMQ_QUEUE}, RoutingKey: {routing_key}")
+            logger.info("🔄 RabbitMQ bağlantısı deneniyor (%d/%d): %s:%s, Exchange: %s, Queue: %s, RoutingKey: %s",
+                        attempt, max_retries, RABBITMQ_HOST, RABBITMQ_PORT, exchange_name, RABBITMQ_QUEUE, routing_key)
             
             connection = pika.BlockingConnection(
                 pika.ConnectionParameters(
@@ -1080,19 +2151,16 @@ def start_rabbitmq_consumer():
                     retry_delay=2
                 )
             )
-            print(f"✓ RabbitMQ bağlantısı başarılı! (Deneme {attempt})")
+            logger.info("✓ RabbitMQ bağlantısı başarılı! (Deneme %d)", attempt)
             break  # Bağlantı başarılı, döngüden çık
             
         except (pika.exceptions.AMQPConnectionError, Exception) as e:
             if attempt < max_retries:
-                print(f"⚠ Deneme {attempt} başarısız: {str(e)}")
-                print(f"   {retry_delay} saniye sonra tekrar denenecek...")
+                logger.warning("⚠ Deneme %d başarısız: %s (%d saniye sonra tekrar denenecek)", attempt, e, retry_delay)
                 time.sleep(retry_delay)
             else:
-                print(f"✗ RabbitMQ bağlantısı kurulamadı ({max_retries} deneme sonrası)")
-                print(f"   Host: {RABBITMQ_HOST}, Port: {RABBITMQ_PORT}")
-                print("⚠ RabbitMQ bağlantısı kurulamadı, sadece HTTP endpoint'leri çalışacak")
-                traceback.print_exc()
+                logger.exception("✗ RabbitMQ bağlantısı kurulamadı (%d deneme sonrası, %s:%s), "
+                                 "sadece HTTP endpoint'leri çalışacak", max_retries, RABBITMQ_HOST, RABBITMQ_PORT)
                 return
     
     if connection is None:
@@ -1120,24 +2188,26 @@ def start_rabbitmq_consumer():
         )
         
         # Consumer ayarları
-        channel.basic_qos(prefetch_count=1)
-        channel.basic_consume(
-            queue=RABBITMQ_QUEUE,
-            on_message_callback=rabbitmq_callback
-        )
+        channel.basic_qos(prefetch_count=RABBITMQ_PREFETCH)
         
-        print(f"✓ RabbitMQ consumer başlatıldı!")
-        print(f"   Exchange: {exchange_name}")
-        print(f"   Queue: {RABBITMQ_QUEUE}")
-        print(f"   RoutingKey: {routing_key}")
-        print("📡 Mesaj kuyruğundan veri bekleniyor...")
+        logger.info("✓ RabbitMQ consumer başlatıldı, mesaj kuyruğundan veri bekleniyor",
+                    extra={'exchange': exchange_name, 'queue': RABBITMQ_QUEUE, 'routing_key': routing_key,
+                           'mode': CONSUMER_MODE, 'prefetch': RABBITMQ_PREFETCH})
         
-        channel.start_consuming()
+        if consume is not None:
+            consume(channel)
+        elif CONSUMER_MODE == 'batch':
+            consume_in_batches(channel)
+        else:
+            channel.basic_consume(
+                queue=RABBITMQ_QUEUE,
+                on_message_callback=rabbitmq_callback
+            )
+            channel.start_consuming()
         
     except Exception as e:
-        print(f"✗ RabbitMQ consumer hatası: {type(e).__name__}: {str(e)}")
-        print("⚠ RabbitMQ consumer başlatılamadı, sadece HTTP endpoint'leri çalışacak")
-        traceback.print_exc()
+        logger.exception("✗ RabbitMQ consumer hatası: %s: %s (sadece HTTP endpoint'leri çalışacak)",
+                         type(e).__name__, e)
         if connection and not connection.is_closed:
             try:
                 connection.close()
@@ -1166,7 +2236,7 @@ def send_result_manually():
         if not device_id:
             return jsonify({'error': 'deviceId gerekli'}), 400
         
-        success = result_sender.send_to_api(device_id, result_type, result_data)
+        success = result_sender.send_to_api(device_id, result_type, result_data, wait=True)
         
         if success:
             return jsonify({
@@ -1186,18 +2256,18 @@ def send_result_manually():
 
 
 if __name__ == '__main__':
+    warm_up()
+    
     # RabbitMQ consumer'ı başlat
     try:
         consumer_thread = start_consumer_thread()
-        print("✓ RabbitMQ consumer thread başlatıldı")
+        logger.info("✓ RabbitMQ consumer thread başlatıldı")
     except Exception as e:
-        print(f"⚠ RabbitMQ consumer başlatılamadı: {str(e)}")
-        print("⚠ Sadece HTTP endpoint'leri çalışacak")
+        logger.warning("⚠ RabbitMQ consumer başlatılamadı: %s (sadece HTTP endpoint'leri çalışacak)", e)
     
     # Flask uygulamasını başlat (sadece development için)
     # Production'da gunicorn kullanılır (Dockerfile'da CMD ile)
-    print("🚀 Python ML Servisi başlatılıyor (Flask dev server)...")
-    print(f"📡 API Callback URL: {API_CALLBACK_URL}")
-    print(f"📡 RabbitMQ: {RABBITMQ_HOST}:{RABBITMQ_PORT}")
+    logger.info("🚀 Python ML Servisi başlatılıyor (Flask dev server)...",
+                extra={'api_callback_url': API_CALLBACK_URL, 'rabbitmq': f'{RABBITMQ_HOST}:{RABBITMQ_PORT}'})
     app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
 
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+EnergyMLService performans ölçümü (benchmark) - Aygaz Smart Energy
+
+Analiz metotlarını ve Flask endpoint'lerini (test client üzerinden) farklı
+geçmiş veri boyutlarında çalıştırır; gecikme yüzdelikleri, throughput ve
+tepe bellek kullanımını raporlar. Sonuçlar JSON baseline olarak saklanıp
+sonraki çalıştırmalarla karşılaştırılabilir (gerileme varsa çıkış kodu 1).
+
+Kullanım:
+    python benchmark.py                                   # Varsayılan boyutlar: 1, 30, 1k, 100k, 1M
+    python benchmark.py --sizes 30,1000 --save-baseline bench_baseline.json
+    python benchmark.py --sizes 30,1000 --baseline bench_baseline.json --threshold 0.2
+    python benchmark.py --targets method --only calculate_efficiency_score,predict_maintenance
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+DEFAULT_SIZES = [1, 30, 1_000, 100_000, 1_000_000]
+DEFAULT_REPEAT = 20  # Vaka başına en fazla ölçüm
+DEFAULT_MAX_TIME = 10.0  # Vaka başına ölçüm süresi üst sınırı (saniye)
+DEFAULT_THRESHOLD = 0.2  # p50 / tepe bellek %20'den fazla artarsa gerileme
+NOISE_FLOOR_MS = 0.5  # Bu farkın altındaki p50 değişimleri gerileme sayılmaz
+
+# Ölçüm tekrarlanabilir olsun: önbellek kapalı, modeller ve istatistikler geçici dizinde.
+# app import edilmeden önce ayarlanmalı (modül seviyesinde okunuyorlar)
+_scratch_dir = tempfile.mkdtemp(prefix='ml-benchmark-')
+os.environ.setdefault('RESULT_CACHE_ENABLED', 'false')
+os.environ.setdefault('MODEL_DIR', os.path.join(_scratch_dir, 'models'))
+os.environ.setdefault('DEVICE_STATS_DIR', os.path.join(_scratch_dir, 'device_stats'))
+
+
+def synthetic_history(rows: int, seed: int = 42, columnar: bool = True):
+    """
+    Saatlik sentetik sensör geçmişi (günlük döngü + gürültü + %1 uç değer).
+
+    columnar=True: {'Date': epoch ms, 'EnergyConsumption': [...], ...} sütun sözlüğü
+    columnar=False: eski satır listesi formatı (ISO tarih)
+    """
+    rng = np.random.default_rng(seed)
+    start_ms = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    dates = start_ms + np.arange(rows, dtype=np.int64) * 3_600_000
+    hour = (np.arange(rows) % 24).astype(np.float64)
+    daily = np.sin((hour - 6) / 24 * 2 * np.pi)
+
+    power = 1000 + 300 * daily + rng.normal(0, 50, rows)
+    spikes = rng.random(rows) < 0.01
+    power[spikes] *= 2.5
+    columns = {
+        'Date': dates,
+        'EnergyConsumption': power / 1000 + rng.normal(0, 0.05, rows),
+        'PowerConsumption': power,
+        'Temperature': 25 + 5 * daily + rng.normal(0, 1.5, rows),
+        'Voltage': 220 + rng.normal(0, 3, rows),
+        'Current': power / 220 + rng.normal(0, 0.1, rows),
+        'PowerFactor': np.clip(0.92 + rng.normal(0, 0.03, rows), 0, 1)
+    }
+    if columnar:
+        return columns
+
+    iso_dates = (np.datetime64('1970-01-01T00:00:00', 'ms') + dates).astype('datetime64[s]').astype(str)
+    names = [name for name in columns if name != 'Date']
+    values = np.column_stack([columns[name] for name in names]).tolist()
+    return [{'Date': date, **dict(zip(names, row))} for date, row in zip(iso_dates, values)]
+
+
+def _json_ready(history):
+    """Sütun sözlüğünü JSON gövdesine uygun hale getirir (NumPy -> liste)"""
+    if isinstance(history, dict):
+        return {name: values.tolist() for name, values in history.items()}
+    return history
+
+
+DEVICE_INFO = {
+    'DeviceId': 1,
+    'DeviceType': 'Benchmark',
+    'MaxPowerConsumption': 2000.0,
+    'InstallationDate': '2022-01-01T00:00:00',
+    'LastMaintenance': '2024-01-01T00:00:00'
+}
+
+
+def build_cases(service, client, history, targets: List[str]) -> Dict[str, Callable[[], Any]]:
+    """Ölçülecek çağrılar: 'method:<ad>' ve 'endpoint:<yol>'"""
+    cases: Dict[str, Callable[[], Any]] = {}
+    if 'method' in targets:
+        cases.update({
+            'method:predict_energy_consumption': lambda: service.predict_energy_consumption(history, 7),
+            'method:detect_anomalies': lambda: service.detect_anomalies(history),
+            'method:optimize_energy': lambda: service.optimize_energy(DEVICE_INFO, history),
+            'method:predict_maintenance': lambda: service.predict_maintenance(DEVICE_INFO, history),
+            'method:calculate_efficiency_score': lambda: service.calculate_efficiency_score(DEVICE_INFO, history)
+        })
+    if 'endpoint' in targets:
+        # Gövde bir kez serileştirilir; ölçüm istek çözümleme + analiz + yanıt serileştirmeyi kapsar
+        body = _json_ready(history)
+        bodies = {
+            '/predict-energy': json.dumps({'HistoricalData': body, 'DaysAhead': 7}),
+            '/detect-anomalies': json.dumps({'Data': body}),
+            '/optimize-energy': json.dumps({**DEVICE_INFO, 'HistoricalData': body}),
+            '/predict-maintenance': json.dumps({**DEVICE_INFO, 'HistoricalData': body}),
+            '/calculate-efficiency': json.dumps({**DEVICE_INFO, 'HistoricalData': body}),
+            '/analyze-device': json.dumps({**DEVICE_INFO, 'HistoricalData': body, 'DaysAhead': 7})
+        }
+        for path, payload in bodies.items():
+            cases[f'endpoint:{path}'] = (
+                lambda path=path, payload=payload: _post(client, path, payload)
+            )
+    return cases
+
+
+def _post(client, path: str, payload: str):
+    response = client.post(path, data=payload, content_type='application/json')
+    if response.status_code != 200:
+        raise RuntimeError(f'{path} -> HTTP {response.status_code}')
+    return response.get_data()
+
+
+def measure(call: Callable[[], Any], repeat: int, max_time: float, memory: bool) -> Dict[str, Any]:
+    """Tek vaka: ısınma çağrısı, ardından repeat kez (ya da max_time dolana kadar) ölçüm"""
+    call()  # Isınma: import, lazy başlatma ve ilk tahsisler ölçüme girmez
+
+    samples: List[float] = []
+    started = time.perf_counter()
+    while len(samples) < repeat and (not samples or time.perf_counter() - started < max_time):
+        t0 = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    peak_kb = None
+    if memory:
+        # tracemalloc ölçümü yavaşlattığından ayrı bir çağrıda yapılır (NumPy tahsisleri dahil)
+        tracemalloc.start()
+        try:
+            call()
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    ordered = sorted(samples)
+    mean_ms = statistics.fmean(samples)
+    return {
+        'Runs': len(samples),
+        'MeanMs': mean_ms,
+        'MinMs': ordered[0],
+        'P50Ms': _percentile(ordered, 50),
+        'P90Ms': _percentile(ordered, 90),
+        'P99Ms': _percentile(ordered, 99),
+        'CallsPerSec': 1000 / mean_ms if mean_ms > 0 else None,
+        'PeakKb': peak_kb
+    }
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    """Sıralı örneklerde doğrusal aralıklı yüzdelik"""
+    return float(np.percentile(ordered, percent)) if len(ordered) > 1 else ordered[0]
+
+
+def run_benchmarks(sizes: List[int], targets: List[str], only: Optional[List[str]], repeat: int,
+                   max_time: float, memory: bool, columnar: bool, seed: int) -> Dict[str, Dict[str, Any]]:
+    import app as ml_app  # Ortam değişkenleri ayarlandıktan sonra
+
+    client = ml_app.app.test_client()
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        history = synthetic_history(size, seed, columnar)
+        cases = build_cases(ml_app.ml_service, client, history, targets)
+        for name, call in cases.items():
+            if only and not any(part in name for part in only):
+                continue
+            key = f'{name}/{size}'
+            try:
+                result = measure(call, repeat, max_time, memory)
+                result['RowsPerSec'] = size * result['CallsPerSec'] if result['CallsPerSec'] else None
+            except Exception as e:
+                result = {'Error': f'{type(e).__name__}: {str(e)}'}
+            results[key] = result
+            _print_row(key, result)
+        del history
+    return results
+
+
+def _print_row(key: str, result: Dict[str, Any]) -> None:
+    if 'Error' in result:
+        print(f"{key:<48} HATA: {result['Error']}")
+        return
+    peak = f"{result['PeakKb'] / 1024:9.1f}" if result['PeakKb'] is not None else f"{'-':>9}"
+    print(f"{key:<48} {result['Runs']:>5} {result['P50Ms']:>10.2f} {result['P90Ms']:>10.2f} "
+          f"{result['P99Ms']:>10.2f} {result['RowsPerSec']:>14,.0f} {peak}")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Baseline'a göre gerilemeleri döndürür (p50 gecikme ve tepe bellek)"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get('Results', {}).get(key)
+        if base is None or 'Error' in base:
+            continue
+        if 'Error' in result:
+            regressions.append(f'{key}: artık hata veriyor ({result["Error"]})')
+            continue
+        p50, base_p50 = result['P50Ms'], base['P50Ms']
+        if p50 > base_p50 * (1 + threshold) and p50 - base_p50 > NOISE_FLOOR_MS:
+            regressions.append(f'{key}: p50 {base_p50:.2f} ms -> {p50:.2f} ms (+{(p50 / base_p50 - 1) * 100:.0f}%)')
+        peak, base_peak = result.get('PeakKb'), base.get('PeakKb')
+        if peak is not None and base_peak and peak > base_peak * (1 + threshold):
+            regressions.append(f'{key}: tepe bellek {base_peak / 1024:.1f} MB -> {peak / 1024:.1f} MB '
+                               f'(+{(peak / base_peak - 1) * 100:.0f}%)')
+    return regressions
+
+
+def environment_info() -> Dict[str, Any]:
+    import pandas as pd  # pyright: ignore[reportMissingImports]
+    import sklearn  # pyright: ignore[reportMissingImports]
+    return {
+        'CreatedAt': datetime.now(timezone.utc).isoformat(),
+        'Python': platform.python_version(),
+        'NumPy': np.__version__,
+        'Pandas': pd.__version__,
+        'ScikitLearn': sklearn.__version__,
+        'Platform': platform.platform(),
+        'CpuCount': os.cpu_count()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='EnergyMLService benchmark')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Virgülle ayrılmış geçmiş veri satır sayıları')
+    parser.add_argument('--targets', default='method,endpoint',
+                        help='method, endpoint ya da ikisi (virgülle)')
+    parser.add_argument('--only', help='Sadece adında bu parçalardan biri geçen vakalar (virgülle)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Vaka başına en fazla ölçüm')
+    parser.add_argument('--max-time', type=float, default=DEFAULT_MAX_TIME,
+                        help='Vaka başına ölçüm süresi üst sınırı (saniye, en az bir ölçüm yapılır)')
+    parser.add_argument('--no-memory', action='store_true', help='tracemalloc tepe bellek ölçümünü atla')
+    parser.add_argument('--rows', action='store_true', help='Sütun sözlüğü yerine satır listesi girdisi kullan')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+    parser.add_argument('--baseline', help='Karşılaştırılacak baseline JSON dosyası')
+    parser.add_argument('--save-baseline', help='Sonuçları baseline olarak bu dosyaya kaydet')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Gerileme eşiği (0.2 = %%20 yavaşlama/bellek artışı)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    only = [part.strip() for part in args.only.split(',')] if args.only else None
+
+    print(f"{'Vaka':<48} {'Ölçüm':>5} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'Satır/sn':>14} {'Tepe MB':>9}")
+    results = run_benchmarks(sizes, targets, only, args.repeat, args.max_time, not args.no_memory,
+                             not args.rows, args.seed)
+    report = {
+        'Environment': environment_info(),
+        'Settings': {'Sizes': sizes, 'Targets': targets, 'Repeat': args.repeat, 'MaxTime': args.max_time,
+                     'Input': 'rows' if args.rows else 'columns', 'Seed': args.seed},
+        'Results': results
+    }
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"✓ Sonuçlar kaydedildi: {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('Settings', {}).get('Input') != report['Settings']['Input']:
+            print("⚠ Baseline farklı girdi formatı ile alınmış, karşılaştırma yanıltıcı olabilir")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"✗ {len(regressions)} gerileme (eşik %{args.threshold * 100:.0f}):")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"✓ Baseline'a göre gerileme yok (eşik %{args.threshold * 100:.0f})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Tarife tanımları ve filo ölçeğinde fatura projeksiyonu (/project-bill).
+
+Her cihazın tüketimi günün saatlerine göre bir profil olarak (n_cihaz, 24) kWh/gün matrisine
+indirgenir; zaman dilimi, kademe, dağıtım ve vergi hesapları bu matris üzerinde vektörel
+yapılır (cihaz başına Python döngüsü yok). Binlerce cihaz tek çağrıda milisaniyeler içinde
+hesaplanır.
+
+Tarife (JSON):
+    {
+      "Name": "Üç zamanlı mesken",
+      "Currency": "TRY",
+      "EnergyRate": 2.5,                                   # TimeOfUse yoksa tek fiyat (TL/kWh)
+      "TimeOfUse": [{"Name": "Gündüz", "From": 6, "To": 17, "Rate": 2.0}, ...],  # saat [From, To)
+      "Tiers": [{"UpTo": 416, "Rate": 0.0}, {"UpTo": null, "Rate": 0.8}],  # aylık kWh blokları
+      "DistributionRate": 0.9,                             # TL/kWh
+      "FixedCharge": 0.0,                                  # TL/ay
+      "Taxes": [{"Name": "ETV", "Rate": 0.05, "Base": "energy"},
+                {"Name": "KDV", "Rate": 0.20, "Base": "subtotal"}]
+    }
+
+- Kademe fiyatı enerji bedeline eklenir (TimeOfUse ve EnergyRate yoksa klasik kademeli tarife)
+- Kademe sınırları aylık (30 gün) tüketime göredir, projeksiyon süresine oranlanır
+- Vergiler sırayla uygulanır: 'energy' tabanlı vergiler enerji + kademe bedeline, 'subtotal'
+  tabanlı vergiler o ana kadarki toplam bedele (önceki vergiler dahil)
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+import pandas as pd  # pyright: ignore[reportMissingImports]
+
+HOURS = 24
+TIER_PERIOD_DAYS = 30
+
+# Örnek varsayılan tarife (üç zamanlı); gerçek tarife istekte ya da BILLING_TARIFF_FILE ile verilir
+DEFAULT_TARIFF = {
+    'Name': 'Üç zamanlı (örnek)',
+    'Currency': 'TRY',
+    'TimeOfUse': [
+        {'Name': 'Gündüz', 'From': 6, 'To': 17, 'Rate': 2.0},
+        {'Name': 'Puant', 'From': 17, 'To': 22, 'Rate': 3.0},
+        {'Name': 'Gece', 'From': 22, 'To': 6, 'Rate': 1.2}
+    ],
+    'DistributionRate': 0.9,
+    'FixedCharge': 0.0,
+    'Taxes': [
+        {'Name': 'ETV', 'Rate': 0.05, 'Base': 'energy'},
+        {'Name': 'KDV', 'Rate': 0.20, 'Base': 'subtotal'}
+    ]
+}
+
+
+class TariffError(ValueError):
+    """Tarife tanımı geçersiz"""
+
+
+class Tariff:
+    """
+    Ayrıştırılmış tarife: saat -> zaman dilimi maskesi (24, n_dilim), dilim fiyatları,
+    kademe sınırları/fiyatları ve vergi listesi (NumPy dizileri olarak)
+    """
+
+    def __init__(self, definition: Dict[str, Any]):
+        try:
+            self.name = str(definition.get('Name', 'Tarife'))
+            self.currency = str(definition.get('Currency', 'TRY'))
+            bands = definition.get('TimeOfUse') or []
+            if bands:
+                self.band_names = [str(band.get('Name', f'Dilim{i + 1}')) for i, band in enumerate(bands)]
+                self.band_rates = np.array([float(band['Rate']) for band in bands])
+                self.band_mask = np.zeros((HOURS, len(bands)))
+                for j, band in enumerate(bands):
+                    start, end = int(band['From']) % HOURS, int(band['To']) % HOURS
+                    hours = np.arange(start, end) if start < end else np.r_[np.arange(start, HOURS), np.arange(0, end)]
+                    self.band_mask[hours, j] = 1.0
+                overlap = self.band_mask.sum(axis=1)
+                if (overlap != 1).any():
+                    missing = np.flatnonzero(overlap != 1).tolist()
+                    raise TariffError(f'Zaman dilimleri günün her saatini tam bir kez kapsamalı (saat: {missing})')
+            else:
+                # Tek zamanlı: tüm saatler tek dilimde (EnergyRate, yoksa sadece kademeler)
+                self.band_names = ['Tek']
+                self.band_rates = np.array([float(definition.get('EnergyRate', 0.0))])
+                self.band_mask = np.ones((HOURS, 1))
+
+            tiers = definition.get('Tiers') or []
+            limits = [tier.get('UpTo') for tier in tiers]
+            if any(limit is None for limit in limits[:-1]):
+                raise TariffError('Sadece son kademe sınırsız (UpTo: null) olabilir')
+            self.tier_upper = np.array([np.inf if limit is None else float(limit) for limit in limits])
+            self.tier_lower = np.r_[0.0, self.tier_upper[:-1]] if tiers else np.zeros(0)
+            if (np.diff(self.tier_upper) <= 0).any():
+                raise TariffError('Kademe sınırları artan sırada olmalı')
+            self.tier_rates = np.array([float(tier['Rate']) for tier in tiers])
+
+            self.distribution_rate = float(definition.get('DistributionRate', 0.0))
+            self.fixed_charge = float(definition.get('FixedCharge', 0.0))
+            self.taxes = []
+            for tax in definition.get('Taxes') or []:
+                base = str(tax.get('Base', 'subtotal')).lower()
+                if base not in ('energy', 'subtotal'):
+                    raise TariffError(f"Vergi tabanı 'energy' ya da 'subtotal' olmalı: {base}")
+                self.taxes.append((str(tax['Name']), float(tax['Rate']), base))
+        except TariffError:
+            raise
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise TariffError(f'Tarife tanımı geçersiz: {str(e)}')
+
+    def project(self, hourly_kwh: np.ndarray, days: float) -> Dict[str, np.ndarray]:
+        """
+        (n, 24) günlük saat profili (kWh) -> `days` günlük fatura bileşenleri (her biri (n,) dizi;
+        'Bands' (n, n_dilim), 'Taxes' vergi adı -> (n,))
+        """
+        band_kwh = hourly_kwh @ self.band_mask * days  # (n, n_dilim)
+        energy_kwh = band_kwh.sum(axis=1)
+        energy_charge = band_kwh @ self.band_rates
+
+        # Kademe: aylık sınırlar projeksiyon süresine oranlanır, her bloğa düşen kWh x fiyat
+        if len(self.tier_rates):
+            scale = days / TIER_PERIOD_DAYS
+            lower, upper = self.tier_lower * scale, self.tier_upper * scale
+            block_kwh = np.clip(energy_kwh[:, None] - lower, 0.0, upper - lower)
+            tier_charge = block_kwh @ self.tier_rates
+        else:
+            tier_charge = np.zeros_like(energy_kwh)
+
+        distribution_charge = energy_kwh * self.distribution_rate
+        fixed_charge = np.full_like(energy_kwh, self.fixed_charge * days / TIER_PERIOD_DAYS)
+
+        energy_base = energy_charge + tier_charge
+        subtotal = energy_base + distribution_charge + fixed_charge
+        taxes = {}
+        for name, rate, base in self.taxes:
+            amount = (energy_base if base == 'energy' else subtotal) * rate
+            taxes[name] = amount
+            subtotal = subtotal + amount
+        return {
+            'EnergyKWh': energy_kwh,
+            'Bands': band_kwh,
+            'EnergyCharge': energy_charge,
+            'TierCharge': tier_charge,
+            'DistributionCharge': distribution_charge,
+            'FixedCharge': fixed_charge,
+            'Taxes': taxes,
+            'Total': subtotal
+        }
+
+
+# ----------------------------------------------------------------------
+# Tüketim profilleri: (24,) kWh/gün, saat başına
+# ----------------------------------------------------------------------
+
+def profile_from_history(dates: np.ndarray, energy: np.ndarray) -> np.ndarray:
+    """
+    Geçmiş okumalardan günlük saat profili: her (gün, saat) toplamı, gözlenen gün sayısına
+    bölünür (kaç günlük veri olursa olsun ortalama bir gün)
+    """
+    dates = np.asarray(dates, dtype='datetime64[h]')
+    if len(dates) == 0:
+        return np.zeros(HOURS)
+    hours = (dates - dates.astype('datetime64[D]')).astype(np.int64)
+    n_days = len(np.unique(dates.astype('datetime64[D]')))
+    return np.bincount(hours, weights=np.asarray(energy, dtype=np.float64), minlength=HOURS) / n_days
+
+
+def readings_per_hour(dates: np.ndarray) -> float:
+    """Geçmişte saat başına ortalama okuma sayısı (okuma olan saatler üzerinden)"""
+    hours = np.asarray(dates, dtype='datetime64[h]')
+    return len(hours) / max(1, len(np.unique(hours)))
+
+
+def profile_from_forecast(forecast: Dict[str, Any], per_hour: float = 1.0) -> np.ndarray:
+    """
+    /predict-energy çıktısından günlük saat profili.
+
+    Tahmin (PredictedEnergyConsumption) okuma başına değerdir (geçmişteki EnergyConsumption ile
+    aynı birim); saatlik kWh = okuma değeri x saat başına okuma sayısı (per_hour). Her iki biçim
+    aynı birimle çevrilir:
+    - HourlySeries: her saatin tahmin ortalaması
+    - Series / PredictedEnergyConsumption: günlük (öğle) tahmin tüm saatlere aynı okuma değeri olarak
+    """
+    hourly = forecast.get('HourlySeries')
+    if hourly:
+        frame = pd.DataFrame(hourly)
+        hours = pd.to_datetime(frame['Date']).dt.hour.to_numpy()
+        values = frame['PredictedEnergyConsumption'].to_numpy(dtype=np.float64)
+        counts = np.bincount(hours, minlength=HOURS)
+        sums = np.bincount(hours, weights=values, minlength=HOURS)
+        return np.divide(sums, counts, out=np.zeros(HOURS), where=counts > 0) * per_hour
+    series = forecast.get('Series')
+    if series:
+        reading = float(np.mean([point['PredictedEnergyConsumption'] for point in series]))
+    else:
+        reading = float(forecast['PredictedEnergyConsumption'])
+    return np.full(HOURS, reading * per_hour)
+
+
+def flat_profile(monthly_kwh: float) -> np.ndarray:
+    """Aylık toplam tüketim -> saatlere eşit dağıtılmış günlük profil"""
+    return np.full(HOURS, float(monthly_kwh) / TIER_PERIOD_DAYS / HOURS)
+
+
+def _rounded(values: np.ndarray, digits: int = 2) -> List[float]:
+    return np.round(values, digits).tolist()
+
+
+def bill_response(tariff: Tariff, device_ids: Sequence, hourly_kwh: np.ndarray, days: float,
+                  errors: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Projeksiyonu cihaz listesi + filo toplamı olarak JSON'a hazırlar"""
+    bills = tariff.project(hourly_kwh, days)
+    components = ('EnergyKWh', 'EnergyCharge', 'TierCharge', 'DistributionCharge', 'FixedCharge', 'Total')
+    columns = {name: _rounded(bills[name]) for name in components}
+    bands = {name: _rounded(bills['Bands'][:, j]) for j, name in enumerate(tariff.band_names)}
+    taxes = {name: _rounded(amount) for name, amount in bills['Taxes'].items()}
+
+    devices = []
+    for i, device_id in enumerate(device_ids):
+        bill = {'DeviceId': device_id}
+        for name in components:
+            bill[name] = columns[name][i]
+        bill['Bands'] = {name: values[i] for name, values in bands.items()}
+        bill['Taxes'] = {name: values[i] for name, values in taxes.items()}
+        devices.append(bill)
+
+    fleet = {name: round(float(bills[name].sum()), 2) for name in components}
+    fleet['Bands'] = {name: round(float(bills['Bands'][:, j].sum()), 2) for j, name in enumerate(tariff.band_names)}
+    fleet['Taxes'] = {name: round(float(amount.sum()), 2) for name, amount in bills['Taxes'].items()}
+    fleet['DeviceCount'] = len(devices)
+    return {
+        'Tariff': tariff.name,
+        'Currency': tariff.currency,
+        'Days': days,
+        'Devices': devices,
+        'Fleet': fleet,
+        'Errors': errors or []
+    }
@@ -0,0 +1,307 @@
+"""
+RabbitMQ sensor-data consumer süreç havuzu (supervisor).
+
+Gunicorn master'ındaki tek consumer thread'i yerine CONSUMER_PROCESSES kadar consumer
+süreci çalıştırır; çöken süreç üstel bekleme ile yeniden başlatılır.
+
+Cihaz bazlı akış durumu (halka tampon pencereleri, akış modelleri, cihaz istatistikleri)
+süreç içindedir ve bir cihazın tüm okumalarını görmelidir. Broker mesajları aynı kuyruğu
+tüketen süreçlere cihazdan bağımsız (round-robin) dağıttığı için CONSUMER_PROCESSES > 1
+olduğunda kuyruğu tek bir yönlendirici süreç okur ve mesajları crc32(deviceId) % N ile
+worker süreçlerine (multiprocessing kuyrukları) dağıtır: her cihaz hep aynı worker'da
+işlenir, yayıncı (.NET) tarafında değişiklik gerekmez.
+
+- Batch, tüm worker'lar kendi parçasını işlediğini bildirince (sırayla) onaylanır
+- Grup (yönlendirici + worker'lar) tek birimdir: herhangi bir süreç biterse hepsi durdurulur
+  ve birlikte yeniden başlatılır; onaylanmamış mesajlar broker tarafından yeniden teslim edilir
+- Birden fazla consumer konteyneri (--scale) yine round-robin alır: konteyner başına tek grup
+
+Kullanım:
+    python consumer.py                      # Ayrı servis/konteyner olarak
+    ML_CONSUMER_MODE=process (gunicorn)     # gunicorn master'ı supervisor'ı başlatır
+"""
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import shutil
+import signal
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from structured_log import configure_logging, get_logger
+
+CONSUMER_PROCESSES = int(os.getenv('CONSUMER_PROCESSES', str(os.cpu_count() or 1)))  # > 1: deviceId ile bölümlenir
+CONSUMER_RESTART_DELAY = float(os.getenv('CONSUMER_RESTART_DELAY', '1'))  # İlk yeniden başlatma beklemesi
+CONSUMER_MAX_RESTART_DELAY = float(os.getenv('CONSUMER_MAX_RESTART_DELAY', '60'))
+CONSUMER_STABLE_SECONDS = 60  # Bu süreden uzun çalışan grup çökerse bekleme sıfırlanır
+# Ayrı servis olarak çalışırken metrikler bu porttan sunulur (0: kapalı)
+CONSUMER_METRICS_PORT = int(os.getenv('CONSUMER_METRICS_PORT', '0'))
+
+logger = get_logger('consumer')
+
+
+def run_consumer(slot: int) -> None:
+    """Tek consumer süreci: app modülünü yükler ve kuyruğu tüketir"""
+    # SIGTERM'de SystemExit: atexit ile outbox ve yayıncı boşaltılır
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # Slot numarası süreç bazlı dosyaları (ör. cihaz istatistik snapshot'ı) ayırır
+    os.environ['CONSUMER_SLOT'] = str(slot)
+    from app import start_rabbitmq_consumer
+    logger.info("🚀 Consumer süreci #%d başladı (PID %d)", slot, os.getpid())
+    start_rabbitmq_consumer()
+    # start_rabbitmq_consumer sadece bağlantı kurulamadığında/koptuğunda döner
+    sys.exit(1)
+
+
+def partition_of(device_id, partitions: int) -> int:
+    """deviceId -> worker numarası (süreçler ve yeniden başlatmalar arasında sabit; hash() değil)"""
+    return zlib.crc32(str(device_id).encode('utf-8')) % partitions
+
+
+def run_partition_worker(slot: int, work_queue, done_queue) -> None:
+    """Bölüm worker'ı: yönlendiricinin gönderdiği (batch_id, mesajlar) parçalarını işler"""
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    os.environ['CONSUMER_SLOT'] = str(slot)
+    from app import process_sensor_batch
+    logger.info("🚀 Consumer worker #%d başladı (PID %d)", slot, os.getpid())
+    while True:
+        batch_id, messages = work_queue.get()
+        process_sensor_batch(messages)
+        done_queue.put(batch_id)
+
+
+def run_partition_router(work_queues, done_queue) -> None:
+    """Yönlendirici süreç: kuyruğu tek bağlantı ile tüketir, mesajları deviceId'ye göre dağıtır"""
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    os.environ['CONSUMER_SLOT'] = 'router'
+    from app import start_rabbitmq_consumer
+    logger.info("🚀 Consumer yönlendiricisi başladı (PID %d, %d worker)", os.getpid(), len(work_queues))
+    start_rabbitmq_consumer(consume=PartitionRouter(work_queues, done_queue).consume)
+    sys.exit(1)
+
+
+class PartitionRouter:
+    """
+    Teslimat batch'lerini deviceId'ye göre worker kuyruklarına böler ve işlenen batch'leri onaylar.
+
+    basic_ack(multiple=True) önceki tüm teslimatları da onayladığından batch'ler geliş sırasıyla
+    onaylanır: en eski tamamlanmamış batch'ten öncekiler. İşlemdeki mesaj sayısı prefetch ile
+    sınırlıdır (RABBITMQ_PREFETCH verilmediyse worker sayısı ile ölçeklenir). Mesajlar
+    CONSUMER_MODE'dan bağımsız olarak batch halinde toplanır (CONSUMER_BATCH_SIZE / _MAX_WAIT).
+    """
+
+    def __init__(self, work_queues: List[Any], done_queue: Any):
+        self.work_queues = work_queues
+        self.done_queue = done_queue
+        self._pending: deque = deque()  # [batch_id, son delivery_tag, kalan parça sayısı], geliş sırasıyla
+        self._remaining: Dict[int, List] = {}
+        self._next_id = 0
+
+    def dispatch(self, channel, deliveries) -> None:
+        """Batch'i cihaz bölümlerine ayırır ve her parçayı kendi worker'ına gönderir"""
+        from app import parse_deliveries
+        parts: Dict[int, List[Dict[str, Any]]] = {}
+        for message_data in parse_deliveries(deliveries):
+            slot = partition_of(message_data.get('deviceId'), len(self.work_queues))
+            parts.setdefault(slot, []).append(message_data)
+
+        batch_id = self._next_id
+        self._next_id += 1
+        entry = [batch_id, deliveries[-1][0].delivery_tag, len(parts)]
+        self._pending.append(entry)
+        if parts:
+            self._remaining[batch_id] = entry
+        for slot, messages in parts.items():
+            self.work_queues[slot].put((batch_id, messages))
+
+    def acknowledge(self, channel) -> None:
+        """Worker'ların bitirdiği parçaları toplar, tamamlanan batch'leri sırayla onaylar"""
+        while True:
+            try:
+                batch_id = self.done_queue.get_nowait()
+            except queue.Empty:
+                break
+            entry = self._remaining.get(batch_id)
+            if entry is not None:
+                entry[2] -= 1
+                if entry[2] == 0:
+                    del self._remaining[batch_id]
+
+        last_tag = None
+        while self._pending and self._pending[0][2] == 0:
+            last_tag = self._pending.popleft()[1]
+        if last_tag is not None:
+            channel.basic_ack(delivery_tag=last_tag, multiple=True)
+
+    def consume(self, channel) -> None:
+        from app import consume_in_batches, CONSUMER_BATCH_SIZE
+        if 'RABBITMQ_PREFETCH' not in os.environ:
+            # Her worker için varsayılan tek süreç prefetch'i kadar (2 batch) işlemde mesaj
+            channel.basic_qos(prefetch_count=CONSUMER_BATCH_SIZE * 2 * len(self.work_queues))
+        consume_in_batches(channel, handle_batch=self.dispatch, poll=self.acknowledge)
+
+
+def _mark_process_dead(pid: Optional[int]) -> None:
+    """Biten consumer sürecinin canlı gauge değerlerini metrik dizininden kaldırır"""
+    if pid is None or not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        return
+    try:
+        from metrics import mark_process_dead
+        mark_process_dead(pid)
+    except Exception as e:
+        logger.warning("⚠ Metrik dosyaları temizlenemedi (PID %d): %s", pid, e)
+
+
+def start_metrics_server(port: int) -> None:
+    """Consumer süreçlerinin metriklerini birleştirerek HTTP üzerinden sunar"""
+    # Çocuk süreçler ortamı devralır: multiprocess dizini import'lardan önce ayarlanmalı
+    metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/ml-consumer-metrics')
+    shutil.rmtree(metrics_dir, ignore_errors=True)  # Önceki çalıştırmadan kalan dosyalar
+    os.makedirs(metrics_dir, exist_ok=True)
+    from prometheus_client import CollectorRegistry, multiprocess, start_http_server  # pyright: ignore[reportMissingImports]
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+    logger.info("✓ Consumer metrikleri :%d/metrics adresinde", port)
+
+
+class ConsumerSupervisor:
+    """
+    Consumer süreç grubunu başlatır, izler ve çöktüğünde yeniden başlatır.
+
+    - processes == 1: kuyruğu doğrudan tüketen tek süreç
+    - processes > 1: yönlendirici + processes kadar bölüm worker'ı (deviceId ile bölümleme)
+    Grup tek birim olarak yeniden başlatılır (kuyruklar yeniden oluşturulur), böylece yarım
+    kalmış bir kuyruk/kilit durumu yeni süreçlere taşınmaz.
+
+    Süreçler 'spawn' ile başlatılır: supervisor gunicorn master'ı içinde de
+    çalışabildiğinden master'ın thread/kilit durumu kopyalanmaz.
+    """
+
+    def __init__(self, processes: int = CONSUMER_PROCESSES, restart_delay: float = CONSUMER_RESTART_DELAY,
+                 max_restart_delay: float = CONSUMER_MAX_RESTART_DELAY):
+        self.processes = max(1, processes)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self._context = multiprocessing.get_context('spawn')
+        self._members: Dict[str, multiprocessing.Process] = {}
+        # Grubun kuyrukları: spawn edilen süreçler kuyrukları başladıktan sonra açar, referans
+        # supervisor'da tutulmazsa semaforlar çocuklar bağlanmadan serbest kalır
+        self._queues: List[Any] = []
+        self._started_at = 0.0
+        self._failures = 0
+        self._restart_at: Optional[float] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _spawn(self, name: str, target, args) -> None:
+        process = self._context.Process(target=target, args=args, name=f'ml-consumer-{name}', daemon=True)
+        process.start()
+        self._members[name] = process
+
+    def _start_group(self) -> None:
+        if self.processes == 1:
+            self._spawn('0', run_consumer, (0,))
+        else:
+            work_queues = [self._context.Queue() for _ in range(self.processes)]
+            done_queue = self._context.Queue()
+            self._queues = work_queues + [done_queue]
+            for slot in range(self.processes):
+                self._spawn(str(slot), run_partition_worker, (slot, work_queues[slot], done_queue))
+            self._spawn('router', run_partition_router, (work_queues, done_queue))
+        self._started_at = time.monotonic()
+
+    def _on_exit(self, name: str, process: multiprocessing.Process) -> None:
+        """Biten süreç için grubu durdurur ve yeniden başlatma zamanını belirler"""
+        if time.monotonic() - self._started_at >= CONSUMER_STABLE_SECONDS:
+            self._failures = 0
+        delay = min(self.max_restart_delay, self.restart_delay * (2 ** self._failures))
+        self._failures += 1
+        self._restart_at = time.monotonic() + delay
+        logger.warning("⚠ Consumer süreci %s sonlandı (çıkış kodu %s), grup %.0f saniye sonra yeniden başlatılacak",
+                       name, process.exitcode, delay)
+        self._terminate_all()
+
+    def run(self) -> None:
+        """Supervisor döngüsü (stop() çağrılana kadar)"""
+        if self.processes == 1:
+            logger.info("🚀 Consumer süreci başlatılıyor...")
+        else:
+            logger.info("🚀 Consumer yönlendiricisi + %d worker süreci başlatılıyor (deviceId ile bölümleme)...",
+                        self.processes)
+        self._start_group()
+
+        while not self._stopping.is_set():
+            sentinels = [process.sentinel for process in self._members.values()]
+            if sentinels:
+                multiprocessing.connection.wait(sentinels, timeout=1.0)
+            else:
+                self._stopping.wait(1.0)
+
+            for name, process in list(self._members.items()):
+                if not process.is_alive():
+                    process.join()
+                    self._on_exit(name, process)
+                    break
+
+            if self._restart_at is not None and time.monotonic() >= self._restart_at and not self._stopping.is_set():
+                self._restart_at = None
+                self._start_group()
+
+        self._terminate_all()
+
+    def _terminate_all(self, timeout: float = 10.0) -> None:
+        for process in self._members.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._members.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+            _mark_process_dead(process.pid)
+        self._members.clear()
+        for group_queue in self._queues:
+            group_queue.cancel_join_thread()  # Yarım kalan parçalar beklenmez, mesajlar yeniden teslim edilir
+            group_queue.close()
+        self._queues = []
+
+    def start_in_background(self) -> threading.Thread:
+        """Supervisor'ı (ör. gunicorn master'ında) arka plan thread'inde çalıştırır"""
+        self._thread = threading.Thread(target=self.run, name='ml-consumer-supervisor', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Süreçleri durdurur (arka planda çalışıyorsa supervisor thread'inin bitmesini bekler)"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(15.0)
+
+    def alive_count(self) -> int:
+        return sum(1 for process in list(self._members.values()) if process.is_alive())
+
+
+def main() -> None:
+    configure_logging()
+    if CONSUMER_METRICS_PORT:
+        start_metrics_server(CONSUMER_METRICS_PORT)
+    supervisor = ConsumerSupervisor()
+
+    def _shutdown(signum, frame):
+        logger.info("🛑 Consumer supervisor durduruluyor...")
+        supervisor.stop()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+    supervisor.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,414 @@
+"""Consumer'ın cihaz bazında tuttuğu artımlı (O(1)) istatistikler: Welford ortalama/varyans, EWMA, min/max."""
+import glob
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+from feature_frame import FeatureFrame
+from structured_log import get_logger
+
+logger = get_logger('device_stats')
+
+SNAPSHOT_PREFIX = 'device_stats-'
+SNAPSHOT_SUFFIX = '.npz'
+
+# Snapshot dosyasındaki cihaz başına diziler (ids hariç)
+_ARRAY_FIELDS = ('count', 'mean', 'm2', 'minimum', 'maximum', 'ewma', 'ewsq', 'trend', 'last',
+                 'first_seen', 'last_seen')
+
+
+class DeviceStatsNotFound(Exception):
+    """Cihaz için (henüz) istatistik yok"""
+
+
+class DeviceStatsStore:
+    """
+    deviceId -> özellik başına çalışan (running) istatistikler.
+
+    - count / mean / m2: Welford (batch için Chan birleştirmesi), varyans = m2 / (count - 1)
+    - ewma: üstel ağırlıklı hareketli ortalama (ewma_alpha)
+    - ewsq: karelerin EWMA'sı; son okumaların varyansı = ewsq - ewma^2
+    - trend: ardışık okumalar arası yüzde değişimin EWMA'sı (trend_alpha, ~son 30 okuma)
+    - minimum / maximum / last, first_seen / last_seen (epoch saniye)
+
+    Tüm cihazlar (n_devices, n_features) boyutlu dizilerde tutulur; update() batch'i
+    cihaza göre gruplar ve NumPy reduceat ile tek geçişte birleştirir (mesaj başına O(1)).
+    Geçmiş veri saklanmaz: cihaz başına bellek ~ 8 * (3 + 7 * n_features) byte.
+
+    Consumer süreci snapshot_interval aralıklarla durumu snapshot_dir altına atomik olarak
+    yazar; HTTP worker'ları DeviceStatsReader ile bu dosyaları okur. Süreç yeniden
+    başladığında kendi snapshot'ından devam eder.
+    """
+
+    def __init__(self, features: Sequence[str], ewma_alpha: float = 0.1, trend_alpha: float = 2 / 31,
+                 snapshot_dir: Optional[str] = None, snapshot_name: str = 'default',
+                 snapshot_interval: float = 10.0):
+        self.features = list(features)
+        self.ewma_alpha = ewma_alpha
+        self.trend_alpha = trend_alpha
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_name = snapshot_name
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+        self._reset(0)
+
+    def _reset(self, capacity: int) -> None:
+        n_features = len(self.features)
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.first_seen = np.zeros(capacity, dtype=np.float64)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        self.mean = np.zeros((capacity, n_features), dtype=np.float64)
+        self.m2 = np.zeros((capacity, n_features), dtype=np.float64)
+        self.minimum = np.full((capacity, n_features), np.inf)
+        self.maximum = np.full((capacity, n_features), -np.inf)
+        self.ewma = np.zeros((capacity, n_features), dtype=np.float64)
+        self.ewsq = np.zeros((capacity, n_features), dtype=np.float64)
+        self.trend = np.zeros((capacity, n_features), dtype=np.float64)
+        self.last = np.zeros((capacity, n_features), dtype=np.float64)
+
+    @property
+    def snapshot_path(self) -> Optional[str]:
+        if not self.snapshot_dir:
+            return None
+        return os.path.join(self.snapshot_dir, f'{SNAPSHOT_PREFIX}{self.snapshot_name}{SNAPSHOT_SUFFIX}')
+
+    def _grow(self, needed: int) -> None:
+        """Dizileri ikiye katlayarak büyütür (yeni cihaz eklenirken)"""
+        capacity = len(self.count)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 64)
+        for name in _ARRAY_FIELDS:
+            old = getattr(self, name)
+            fill = np.inf if name == 'minimum' else -np.inf if name == 'maximum' else 0
+            new = np.full((new_capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+
+    def _slots(self, device_ids: Iterable) -> np.ndarray:
+        slots = []
+        for device_id in device_ids:
+            key = str(device_id)
+            slot = self._index.get(key)
+            if slot is None:
+                slot = len(self._ids)
+                self._index[key] = slot
+                self._ids.append(key)
+            slots.append(slot)
+        self._grow(len(self._ids))
+        return np.asarray(slots, dtype=np.int64)
+
+    def update(self, device_ids: Sequence, X: np.ndarray, timestamps: Optional[np.ndarray] = None) -> None:
+        """
+        Batch'teki okumaları cihaz istatistiklerine ekler.
+
+        X: (n, n_features) matris, satırlar geliş sırasında. Aynı cihazın birden fazla
+        okuması batch içindeki sırası korunarak işlenir (EWMA ve trend sıraya bağlıdır).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return
+        now = time.time()
+        if timestamps is None:
+            timestamps = np.full(len(X), now)
+        with self._lock:
+            self._ensure_loaded()
+            slots = self._slots(device_ids)
+
+            # Cihaza göre grupla (stable: cihaz içi geliş sırası korunur)
+            order = np.argsort(slots, kind='stable')
+            sorted_slots = slots[order]
+            rows = X[order]
+            ts = np.asarray(timestamps, dtype=np.float64)[order]
+            starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+            g = sorted_slots[starts]  # Batch'teki benzersiz cihaz slotları
+            k = np.diff(np.r_[starts, len(rows)])  # Cihaz başına okuma sayısı
+            group = np.repeat(np.arange(len(g)), k)
+            position = np.arange(len(rows)) - starts[group]
+
+            # Yeni cihazlar: EWMA ve önceki okuma ilk okuma ile başlatılır
+            new = self.count[g] == 0
+            if new.any():
+                self.ewma[g[new]] = rows[starts[new]]
+                self.ewsq[g[new]] = rows[starts[new]] ** 2
+                self.last[g[new]] = rows[starts[new]]
+                self.first_seen[g[new]] = np.minimum.reduceat(ts, starts)[new]
+
+            # Batch istatistikleri ve Chan (paralel Welford) birleştirmesi
+            batch_mean = np.add.reduceat(rows, starts, axis=0) / k[:, None]
+            batch_m2 = np.add.reduceat((rows - batch_mean[group]) ** 2, starts, axis=0)
+            n_old = self.count[g][:, None].astype(np.float64)
+            n_total = n_old + k[:, None]
+            delta = batch_mean - self.mean[g]
+            self.mean[g] += delta * (k[:, None] / n_total)
+            self.m2[g] += batch_m2 + delta ** 2 * (n_old * k[:, None] / n_total)
+            self.minimum[g] = np.minimum(self.minimum[g], np.minimum.reduceat(rows, starts, axis=0))
+            self.maximum[g] = np.maximum(self.maximum[g], np.maximum.reduceat(rows, starts, axis=0))
+
+            # Ardışık yüzde değişim (grubun ilk satırı cihazın önceki son okuması ile karşılaştırılır)
+            previous = np.empty_like(rows)
+            previous[1:] = rows[:-1]
+            previous[starts] = self.last[g]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                change = np.where(previous != 0, rows / previous - 1, 0.0)
+
+            # EWMA: k adım tek seferde; i. satırın ağırlığı alpha * (1 - alpha)^(k - 1 - i)
+            remaining = (k[group] - 1 - position)[:, None]
+            for name, alpha, values in (('ewma', self.ewma_alpha, rows), ('ewsq', self.ewma_alpha, rows ** 2),
+                                        ('trend', self.trend_alpha, change)):
+                weighted = np.add.reduceat(alpha * (1 - alpha) ** remaining * values, starts, axis=0)
+                state = getattr(self, name)
+                state[g] = state[g] * (1 - alpha) ** k[:, None] + weighted
+
+            self.last[g] = rows[starts + k - 1]
+            self.last_seen[g] = np.maximum(self.last_seen[g], np.maximum.reduceat(ts, starts))
+            self.count[g] += k
+            self._dirty = True
+
+    def get(self, device_id) -> Optional[Dict[str, Any]]:
+        """Cihazın istatistik özeti (hiç okuma yoksa None)"""
+        with self._lock:
+            self._ensure_loaded()
+            slot = self._index.get(str(device_id))
+            if slot is None:
+                return None
+            return _summary(self.features, {name: getattr(self, name)[slot] for name in _ARRAY_FIELDS})
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ------------------------------------------------------------------
+    # Snapshot (süreçler arası paylaşım)
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        """İlk kullanımda önceki snapshot'tan devam eder (kilit altında çağrılır)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        path = self.snapshot_path
+        if not path or not os.path.exists(path):
+            return
+        try:
+            snapshot = _read_snapshot(path)
+        except Exception as e:
+            logger.warning("⚠ Cihaz istatistikleri yüklenemedi (%s): %s", path, e)
+            return
+        if snapshot['features'] != self.features:
+            logger.warning("⚠ Cihaz istatistik snapshot'ı farklı özellik listesi içeriyor, yok sayıldı: %s", path)
+            return
+        self._reset(0)
+        self._slots(snapshot['ids'])
+        for name in _ARRAY_FIELDS:
+            getattr(self, name)[:len(snapshot['ids'])] = snapshot[name]
+
+    def maybe_snapshot(self) -> None:
+        """Son snapshot'tan bu yana snapshot_interval geçtiyse ve değişiklik varsa kaydeder"""
+        if self._dirty and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Durumu snapshot dosyasına atomik olarak yazar"""
+        path = self.snapshot_path
+        if not path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            n = len(self._ids)
+            arrays = {name: getattr(self, name)[:n].copy() for name in _ARRAY_FIELDS}
+            ids = np.asarray(self._ids, dtype=str)
+            self._dirty = False
+            self._last_snapshot = time.monotonic()
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, ids=ids, features=np.asarray(self.features, dtype=str), **arrays)
+            os.replace(tmp_path, path)  # Atomik: okuyan worker yarım dosya görmez
+        except Exception as e:
+            logger.warning("⚠ Cihaz istatistikleri kaydedilemedi: %s", e)
+            with self._lock:
+                self._dirty = True
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class DeviceStatsReader:
+    """
+    HTTP worker'ları için: snapshot_dir altındaki tüm consumer snapshot'larını okur.
+
+    Her consumer süreci farklı mesajları işlediğinden aynı cihazın istatistikleri
+    süreçler arasında birleştirilir (count/mean/m2 Chan birleştirmesi, min/max);
+    sıraya bağlı olan ewma/trend/last en son veri gören süreçten alınır.
+    Dosyalar reload_interval aralıklarla, sadece mtime değiştiyse yeniden okunur.
+    """
+
+    def __init__(self, snapshot_dir: str, reload_interval: float = 5.0):
+        self.snapshot_dir = snapshot_dir
+        self.reload_interval = reload_interval
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+
+    def _maybe_reload(self) -> None:
+        if time.monotonic() - self._last_scan < self.reload_interval:
+            return
+        self._last_scan = time.monotonic()
+        paths = glob.glob(os.path.join(self.snapshot_dir, f'{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}'))
+        for path in set(self._snapshots) - set(paths):
+            self._snapshots.pop(path, None)
+            self._mtimes.pop(path, None)
+        for path in paths:
+            try:
+                mtime = os.path.getmtime(path)
+                if self._mtimes.get(path) == mtime:
+                    continue
+                snapshot = _read_snapshot(path)
+                snapshot['index'] = {device_id: i for i, device_id in enumerate(snapshot['ids'])}
+                self._snapshots[path] = snapshot
+                self._mtimes[path] = mtime
+            except Exception as e:
+                logger.warning("⚠ Cihaz istatistik snapshot'ı okunamadı (%s): %s", path, e)
+
+    def get(self, device_id) -> Optional[Dict[str, Any]]:
+        """Cihazın tüm consumer süreçlerinden birleştirilmiş istatistik özeti"""
+        key = str(device_id)
+        with self._lock:
+            self._maybe_reload()
+            parts = []
+            for snapshot in self._snapshots.values():
+                slot = snapshot['index'].get(key)
+                if slot is not None:
+                    parts.append((snapshot['features'], {name: snapshot[name][slot] for name in _ARRAY_FIELDS}))
+        if not parts:
+            return None
+        features = parts[0][0]
+        merged = dict(parts[0][1])
+        for other_features, other in parts[1:]:
+            if other_features == features:
+                merged = _merge(merged, other)
+        return _summary(features, merged)
+
+    def frame(self, device_id) -> Optional['DeviceStatsFrame']:
+        stats = self.get(device_id)
+        return DeviceStatsFrame(stats) if stats is not None else None
+
+
+class DeviceStatsFrame(FeatureFrame):
+    """
+    Artımlı istatistiklerden oluşturulan, FeatureFrame ile aynı arayüze sahip salt okunur çerçeve.
+
+    Verimlilik ve bakım analizleri geçmiş veri yerine bununla çalışır:
+    mean/std/var tüm okumalar üzerinden, pct_change_mean son okumalara ağırlık veren trend EWMA'sı;
+    tail(n) son okumaların EWMA tabanlı çerçevesidir (mean = Ewma, var/std = RecentVar/RecentStd).
+    Satır verisi olmadığından tahmin çerçevesi oluşturulamaz.
+    """
+
+    # tail() çerçevesinde tüm geçmiş alanları yerine kullanılan son okuma (EWMA) alanları
+    RECENT_FIELDS = {'Mean': 'Ewma', 'Var': 'RecentVar', 'Std': 'RecentStd'}
+
+    def __init__(self, stats: Dict[str, Any], recent: Optional[int] = None):
+        self.stats = stats
+        self.recent = recent
+        self.df = None
+        self._memo = {}
+
+    def _field(self, column: str, name: str) -> float:
+        if self.recent is not None:
+            name = self.RECENT_FIELDS.get(name, name)
+        try:
+            return self.stats['Features'][column][name]
+        except KeyError:
+            raise KeyError(column)
+
+    def __len__(self) -> int:
+        count = int(self.stats['Count'])
+        return count if self.recent is None else min(count, self.recent)
+
+    def mean(self, column: str) -> float:
+        return self._field(column, 'Mean')
+
+    def std(self, column: str) -> float:
+        return self._field(column, 'Std')
+
+    def var(self, column: str) -> float:
+        return self._field(column, 'Var')
+
+    def pct_change_mean(self, column: str) -> float:
+        return self._field(column, 'Trend')
+
+    def corr(self, a: str, b: str) -> float:
+        raise ValueError('Korelasyon için geçmiş veri gerekli')
+
+    def tail(self, n: int) -> 'DeviceStatsFrame':
+        return DeviceStatsFrame(self.stats, recent=n)
+
+    @property
+    def prediction_frame(self):
+        raise ValueError('Tahmin için geçmiş veri gerekli')
+
+
+def _read_snapshot(path: str) -> Dict[str, Any]:
+    with np.load(path, allow_pickle=False) as archive:
+        snapshot = {name: archive[name] for name in _ARRAY_FIELDS}
+        snapshot['ids'] = [str(device_id) for device_id in archive['ids']]
+        snapshot['features'] = [str(feature) for feature in archive['features']]
+    return snapshot
+
+
+def _merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """İki sürecin aynı cihaz için tuttuğu istatistikleri birleştirir"""
+    n_a, n_b = float(a['count']), float(b['count'])
+    n = n_a + n_b
+    delta = b['mean'] - a['mean']
+    latest = b if b['last_seen'] >= a['last_seen'] else a
+    return {
+        'count': a['count'] + b['count'],
+        'mean': a['mean'] + delta * (n_b / n),
+        'm2': a['m2'] + b['m2'] + delta ** 2 * (n_a * n_b / n),
+        'minimum': np.minimum(a['minimum'], b['minimum']),
+        'maximum': np.maximum(a['maximum'], b['maximum']),
+        'ewma': latest['ewma'],
+        'ewsq': latest['ewsq'],
+        'trend': latest['trend'],
+        'last': latest['last'],
+        'first_seen': min(a['first_seen'], b['first_seen']),
+        'last_seen': max(a['last_seen'], b['last_seen'])
+    }
+
+
+def _summary(features: Sequence[str], state: Dict[str, Any]) -> Dict[str, Any]:
+    """Dizi durumunu JSON'a uygun özet sözlüğüne çevirir (varyans örneklem varyansıdır, ddof=1)"""
+    count = int(state['count'])
+    variance = state['m2'] / (count - 1) if count > 1 else np.zeros(len(features))
+    recent_variance = np.maximum(state['ewsq'] - state['ewma'] ** 2, 0.0)
+    return {
+        'Count': count,
+        'FirstSeen': float(state['first_seen']),
+        'LastSeen': float(state['last_seen']),
+        'Features': {
+            feature: {
+                'Mean': float(state['mean'][i]),
+                'Var': float(variance[i]),
+                'Std': float(np.sqrt(variance[i])),
+                'Min': float(state['minimum'][i]),
+                'Max': float(state['maximum'][i]),
+                'Ewma': float(state['ewma'][i]),
+                'RecentVar': float(recent_variance[i]),
+                'RecentStd': float(np.sqrt(recent_variance[i])),
+                'Trend': float(state['trend'][i]),
+                'Last': float(state['last'][i])
+            }
+            for i, feature in enumerate(features)
+        }
+    }
@@ -0,0 +1,83 @@
+"""Analizler arasında paylaşılan, bir kez oluşturulan özellik çerçevesi (feature frame)."""
+from typing import Any, Callable, Dict, Hashable
+
+import pandas as pd  # pyright: ignore[reportMissingImports]
+
+from payload_format import to_frame, parse_date_column
+
+
+class FeatureFrame:
+    """
+    Geçmiş veriden bir kez oluşturulan DataFrame ve üzerindeki istatistiklerin önbelleği.
+
+    - df: girdi sırası korunmuş ham çerçeve (tarih ayrıştırılmaz, gerekmedikçe maliyet yok)
+    - mean/std/var/pct_change_mean/corr: ilk çağrıda hesaplanır, sonraki analizler aynı değeri kullanır
+    - prediction_frame: tarihe göre sıralı, zaman özellikleri ve trend sütunları eklenmiş çerçeve
+      (sadece tahmin analizi kullandığında oluşturulur)
+
+    Tek istek kapsamında kullanılır; thread'ler arasında paylaşılmaz.
+    """
+
+    def __init__(self, data):
+        self.df = to_frame(data, parse_dates=False)
+        self._memo: Dict[Hashable, Any] = {}
+
+    @classmethod
+    def of(cls, data) -> 'FeatureFrame':
+        """Veri zaten FeatureFrame ise aynısını, değilse yeni çerçeve döndürür"""
+        return data if isinstance(data, cls) else cls(data)
+
+    def _cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def mean(self, column: str) -> float:
+        return self._cached(('mean', column), lambda: self.df[column].mean())
+
+    def std(self, column: str) -> float:
+        return self._cached(('std', column), lambda: self.df[column].std())
+
+    def var(self, column: str) -> float:
+        return self._cached(('var', column), lambda: self.df[column].var())
+
+    def pct_change_mean(self, column: str) -> float:
+        """Ardışık satırlar arası ortalama yüzde değişim (girdi sırasına göre)"""
+        return self._cached(('pct_change_mean', column), lambda: self.df[column].pct_change().mean())
+
+    def corr(self, a: str, b: str) -> float:
+        return self._cached(('corr', a, b), lambda: self.df[a].corr(self.df[b]))
+
+    def tail(self, n: int) -> 'FeatureFrame':
+        """Son n satırın çerçevesi (yeniden ayrıştırma yapılmaz, kendi istatistik önbelleği vardır)"""
+        def build():
+            frame = FeatureFrame.__new__(FeatureFrame)
+            frame.df = self.df.tail(n)
+            frame._memo = {}
+            return frame
+        return self._cached(('tail', n), build)
+
+    @property
+    def prediction_frame(self) -> pd.DataFrame:
+        """Tahmin modeli için hazırlanmış çerçeve (salt okunur kullanılmalı)"""
+        return self._cached('prediction_frame', self._build_prediction_frame)
+
+    def _build_prediction_frame(self) -> pd.DataFrame:
+        df = self.df.assign(Date=parse_date_column(self.df['Date']))
+        df = df.sort_values('Date')  # Tarihe göre sırala
+
+        # Zaman bazlı özellikler: mevsimsel ve günlük pattern'ler
+        dates = df['Date'].dt
+        df['DayOfWeek'] = dates.dayofweek  # Haftanın günü (0=Pazartesi, 6=Pazar)
+        df['Hour'] = dates.hour  # Günün saati (0-23)
+        df['Month'] = dates.month  # Ay (1-12)
+
+        # Hareketli ortalama ile kısa vadeli trendler
+        df['EnergyTrend'] = df['EnergyConsumption'].rolling(window=7).mean()  # 7 günlük ortalama
+        df['PowerTrend'] = df['PowerConsumption'].rolling(window=7).mean()  # 7 günlük güç ortalaması
+
+        # ML modeli eksik veri ile çalışamaz: önce ileriye, sonra geriye doldur
+        return df.ffill().bfill()
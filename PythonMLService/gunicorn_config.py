@@ -1,8 +1,23 @@
 """Gunicorn configuration file"""
+import gc
 import os
+import shutil
+
+# Prometheus multiprocess modu: worker'lar ve consumer süreçleri metriklerini bu dizine yazar,
+# /metrics hepsini birleştirir. prometheus_client import edilmeden önce ayarlanmalıdır.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/ml-metrics')
+
+# Önceki çalıştırmadan kalan metrik dosyaları app import edilmeden (preload) önce temizlenir.
+# Config HUP ile yeniden okunduğunda canlı süreçlerin dosyaları silinmesin diye sadece bir kez.
+if os.environ.get('ML_METRICS_DIR_PREPARED') != '1':
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+    os.environ['ML_METRICS_DIR_PREPARED'] = '1'
 
 # Gunicorn worker sayısı
 workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+# Thread sayısı güvenle artırılabilir: EnergyMLService fit edilen modelleri istekler
+# arasında paylaşmaz (her çağrı kendi tahmincisini oluşturur), global kilit yoktur
 threads = int(os.getenv('GUNICORN_THREADS', '2'))
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
 timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))  # 30 saniye (optimize edildi: 120 → 30)
@@ -11,16 +26,73 @@ accesslog = '-'
 errorlog = '-'
 loglevel = 'info'
 
-# RabbitMQ consumer'ı sadece master process'te başlat
+# RabbitMQ consumer modu:
+# - thread:  master process'te tek consumer thread'i (varsayılan, eski davranış)
+# - process: master, CONSUMER_PROCESSES kadar consumer sürecini başlatır ve izler (consumer.py)
+# - none:    bu konteynerde consumer yok (consumer ayrı servis olarak `python consumer.py` ile çalışır)
+ML_CONSUMER_MODE = os.getenv('ML_CONSUMER_MODE', 'thread').lower()
+consumer_supervisor = None
+
+# Preload modu (ML_PRELOAD=true): app master'da bir kez import edilir ve ısıtılır (warm_up:
+# modeller yüklenir, örnek fit/predict çalıştırılır); worker'lar ısınmış master'dan fork edilir
+# ve belleği copy-on-write paylaşır. Kapalıyken her worker açılışta kendi ısınmasını yapar.
+ML_PRELOAD = os.getenv('ML_PRELOAD', 'false').lower() == 'true'
+preload_app = ML_PRELOAD
+
 def on_starting(server):
     """Gunicorn başlatıldığında çağrılır (master process'te)"""
-    print("🚀 Gunicorn başlatılıyor...")
+    global consumer_supervisor
+    # Worker'lar fork ile açıldığında log listener thread'i çocukta yeniden başlatılır
+    from structured_log import configure_logging, get_logger
+    configure_logging()
+    logger = get_logger('gunicorn')
+    logger.info("🚀 Gunicorn başlatılıyor...")
+    consumer_mode = ML_CONSUMER_MODE
+    if ML_PRELOAD:
+        # preload_app: app bu noktada master'da import edilmiş durumda
+        from app import warm_up
+        warm_up()
+        if consumer_mode == 'thread':
+            # Consumer thread'i fork edilen worker'lara kilit/soket durumu bırakmasın:
+            # preload modunda consumer ayrı (spawn) süreçlerde çalışır
+            logger.warning("⚠ ML_PRELOAD=true iken consumer master'da thread olarak çalışmaz, 'process' modu kullanılıyor")
+            consumer_mode = 'process'
+    if consumer_mode == 'none':
+        logger.info("ℹ RabbitMQ consumer bu serviste çalışmıyor (ML_CONSUMER_MODE=none)")
+        return
     try:
-        # Import'u burada yapıyoruz çünkü --preload kullanmıyoruz
+        if consumer_mode == 'process':
+            from consumer import ConsumerSupervisor
+            consumer_supervisor = ConsumerSupervisor()
+            consumer_supervisor.start_in_background()
+            logger.info("✓ RabbitMQ consumer supervisor başlatıldı (%d süreç)", consumer_supervisor.processes)
+            return
+        # Import'u burada yapıyoruz çünkü (varsayılan olarak) --preload kullanmıyoruz
         from app import start_consumer_thread
         consumer_thread = start_consumer_thread()
-        print("✓ RabbitMQ consumer thread başlatıldı (master process)")
+        logger.info("✓ RabbitMQ consumer thread başlatıldı (master process)")
     except Exception as e:
-        print(f"⚠ RabbitMQ consumer başlatılamadı: {str(e)}")
-        print("⚠ Sadece HTTP endpoint'leri çalışacak")
+        logger.warning("⚠ RabbitMQ consumer başlatılamadı: %s (sadece HTTP endpoint'leri çalışacak)", e)
+
+def when_ready(server):
+    """Worker'lar fork edilmeden hemen önce (master'da)"""
+    if ML_PRELOAD:
+        # Isınmış master'daki nesneler kalıcı nesle taşınır: worker'lardaki GC taramaları bu
+        # nesnelerin sayfalarına yazmaz (referans/GC başlıkları), copy-on-write paylaşım korunur
+        gc.freeze()
+
+def post_worker_init(worker):
+    """Preload kapalıyken her worker ilk istekten önce kendi ısınmasını yapar"""
+    if not ML_PRELOAD:
+        from app import warm_up
+        warm_up()
+
+def child_exit(server, worker):
+    """Sonlanan worker'ın canlı gauge değerlerini metrik dizininden kaldırır"""
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
 
+def on_exit(server):
+    """Gunicorn kapanırken consumer süreçlerini durdurur"""
+    if consumer_supervisor is not None:
+        consumer_supervisor.stop()
@@ -0,0 +1,106 @@
+"""
+Prometheus metrikleri (/metrics).
+
+Gunicorn worker'ları, consumer süreçleri ve toplu analiz havuzu ayrı süreçlerdir; her
+süreç kendi sayaçlarını tuttuğundan PROMETHEUS_MULTIPROC_DIR ayarlıysa prometheus_client
+multiprocess modu kullanılır: her süreç değerlerini bu dizindeki mmap dosyalarına yazar,
+/metrics tüm dosyaları toplayarak döner. Değişken prometheus_client import edilmeden önce
+ayarlanmalıdır (gunicorn_config.py ve consumer.py bunu yapar, dizini de başlangıçta temizler).
+Ayarlı değilse (ör. python app.py) tek süreçlik varsayılan registry kullanılır.
+"""
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (  # pyright: ignore[reportMissingImports]
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+# Analiz aşamaları milisaniyeler mertebesinde: varsayılan kovalar (5 ms+) yetersiz kalır
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# --- HTTP ---
+HTTP_REQUEST_SECONDS = Histogram(
+    'ml_http_request_duration_seconds', 'HTTP istek süresi (route şablonu bazında)',
+    ['route', 'method', 'status'], buckets=STAGE_BUCKETS
+)
+
+# --- Analiz aşamaları: frame (DataFrame oluşturma), fit, predict, compute, rules, serialize ---
+ANALYSIS_STAGE_SECONDS = Histogram(
+    'ml_analysis_stage_duration_seconds', 'EnergyMLService analiz aşaması süresi',
+    ['analysis', 'stage'], buckets=STAGE_BUCKETS
+)
+
+# --- Consumer ---
+CONSUMER_MESSAGES = Counter(
+    'ml_consumer_messages_total', 'Consumer mesajları (processed, stale, invalid, error)', ['outcome']
+)
+CONSUMER_BATCH_SECONDS = Histogram(
+    'ml_consumer_batch_duration_seconds', 'Mesaj batch işleme süresi', buckets=STAGE_BUCKETS
+)
+CONSUMER_BATCH_SIZE = Histogram(
+    'ml_consumer_batch_size', 'Batch başına işlenen mesaj sayısı', buckets=BATCH_SIZE_BUCKETS
+)
+CONSUMER_MESSAGE_AGE_SECONDS = Histogram(
+    'ml_consumer_message_age_seconds', 'Mesajın recordedAt zamanından işlenene kadar geçen süre',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+
+# --- Sonuç gönderimi: api_enqueue (outbox'a bırakma), api_post (HTTP), rabbitmq_publish ---
+CALLBACK_SECONDS = Histogram(
+    'ml_result_callback_duration_seconds', 'Sonuç gönderim çağrısı süresi', ['target'], buckets=STAGE_BUCKETS
+)
+CALLBACK_RESULTS = Counter(
+    'ml_result_callback_total', 'Gönderilen sonuçlar (hedef ve sonuç bazında)', ['target', 'outcome']
+)
+
+# --- Kuyruk derinlikleri ---
+# Broker kuyruğu tüm consumer'lar için aynıdır: süreçler arası toplanmaz, en büyük değer alınır
+BROKER_QUEUE_DEPTH = Gauge(
+    'ml_broker_queue_depth', 'RabbitMQ kuyruğunda bekleyen mesaj', ['queue'], multiprocess_mode='livemax'
+)
+# Süreç içi tamponlar (outbox, yayıncı) süreç başınadır: canlı süreçlerin toplamı
+LOCAL_QUEUE_DEPTH = Gauge(
+    'ml_local_queue_depth', 'Süreç içi bekleyen sonuç (outbox, publisher)', ['queue'], multiprocess_mode='livesum'
+)
+
+
+def stage(analysis: str, name: str):
+    """Analiz aşaması zamanlayıcısı: `with stage('predict-energy', 'fit'): ...`"""
+    return ANALYSIS_STAGE_SECONDS.labels(analysis, name).time()
+
+
+class StageTimer:
+    """
+    Ardışık aşamaların süresini ölçer: her mark() bir önceki mark'tan bu yana geçen süreyi
+    o aşamaya yazar (analiz kodunu iç içe with bloklarına bölmeden).
+    """
+
+    def __init__(self, analysis: str):
+        self.analysis = analysis
+        self._last = time.perf_counter()
+
+    def mark(self, name: str) -> None:
+        now = time.perf_counter()
+        ANALYSIS_STAGE_SECONDS.labels(self.analysis, name).observe(now - self._last)
+        self._last = now
+
+
+def render() -> Tuple[bytes, str]:
+    """/metrics gövdesi ve içerik tipi (multiprocess modunda tüm süreçler birleştirilir)"""
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess  # pyright: ignore[reportMissingImports]
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Sonlanan sürecin canlı (live*) gauge değerlerini kaldırır"""
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess  # pyright: ignore[reportMissingImports]
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
@@ -0,0 +1,185 @@
+"""Anomali modelleri için kalıcı model kayıt defteri (cihaz bazlı + filo geneli)."""
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+import joblib  # pyright: ignore[reportMissingImports]
+from sklearn.ensemble import IsolationForest  # pyright: ignore[reportMissingImports]
+from sklearn.preprocessing import StandardScaler  # pyright: ignore[reportMissingImports]
+
+from structured_log import get_logger
+
+logger = get_logger('models')
+
+# Cihaza özel model yoksa kullanılan filo geneli modelin anahtarı
+FLEET_MODEL_KEY = 'fleet'
+MODEL_FILE_PREFIX = 'anomaly_'
+MODEL_FILE_SUFFIX = '.joblib'
+
+
+class AnomalyModelRegistry:
+    """
+    Eğitilmiş IsolationForest + StandardScaler çiftlerini deviceId bazında saklar.
+
+    - Modeller MODEL_DIR altında 'anomaly_<anahtar>.joblib' dosyalarına yazılır
+    - Worker başlarken load_all() ile diskteki tüm modeller belleğe alınır
+    - Skorlama sırasında model yeniden eğitilmez (sadece transform + decision_function)
+    - Kayıtlar değiştirilmez: yeniden eğitimde yeni kayıt oluşturulup atomik olarak değiştirilir
+    - Diğer gunicorn worker'larının eğittiği modeller dosya mtime kontrolü ile periyodik olarak yüklenir
+    """
+
+    def __init__(self, model_dir: str, contamination: float = 0.1, random_state: int = 42,
+                 min_samples: int = 10, reload_interval: float = 30.0):
+        self.model_dir = model_dir
+        self.contamination = contamination
+        self.random_state = random_state
+        self.min_samples = min_samples
+        self.reload_interval = reload_interval
+
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()  # Aynı anda tek thread diski tarar
+        self._last_scan = 0.0
+
+    @staticmethod
+    def model_key(device_id) -> str:
+        """deviceId'yi dosya adında kullanılabilecek model anahtarına çevirir (None = filo modeli)"""
+        if device_id is None or str(device_id) == '':
+            return FLEET_MODEL_KEY
+        return re.sub(r'[^A-Za-z0-9_-]', '_', str(device_id))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.model_dir, f'{MODEL_FILE_PREFIX}{key}{MODEL_FILE_SUFFIX}')
+
+    def load_all(self) -> int:
+        """Diskteki tüm modelleri belleğe yükler, yüklenen model sayısını döndürür"""
+        if not os.path.isdir(self.model_dir):
+            return 0
+
+        loaded = 0
+        for entry in os.scandir(self.model_dir):
+            name = entry.name
+            if not (name.startswith(MODEL_FILE_PREFIX) and name.endswith(MODEL_FILE_SUFFIX)):
+                continue
+            key = name[len(MODEL_FILE_PREFIX):-len(MODEL_FILE_SUFFIX)]
+            try:
+                mtime = entry.stat().st_mtime
+                if self._mtimes.get(key) == mtime:
+                    continue
+                model_entry = joblib.load(entry.path)
+                with self._lock:
+                    self._models[key] = model_entry
+                    self._mtimes[key] = mtime
+                loaded += 1
+            except Exception as e:
+                logger.warning("⚠ Model yüklenemedi (%s): %s", name, e)
+
+        self._last_scan = time.monotonic()
+        return loaded
+
+    def _maybe_reload(self) -> None:
+        """Başka bir worker'ın kaydettiği modelleri reload_interval aralıklarla yükler"""
+        if self.reload_interval <= 0:
+            return
+        if time.monotonic() - self._last_scan < self.reload_interval:
+            return
+        # Başka bir thread zaten tarıyorsa beklemeden mevcut modellerle devam et
+        if not self._scan_lock.acquire(blocking=False):
+            return
+        try:
+            self.load_all()
+        finally:
+            self._scan_lock.release()
+
+    def fit(self, X: np.ndarray, features: List[str], contamination=None) -> Dict[str, Any]:
+        """Verilen matris üzerinde yeni bir scaler + IsolationForest eğitir (kayıt defterine eklemez)"""
+        X = np.asarray(X, dtype=float)
+        if X.ndim != 2 or len(X) < self.min_samples:
+            raise ValueError(f'Model eğitimi için en az {self.min_samples} veri noktası gerekli')
+
+        scaler = StandardScaler().fit(X)
+        model = IsolationForest(
+            contamination=self.contamination if contamination is None else contamination,
+            random_state=self.random_state
+        )
+        model.fit(scaler.transform(X))
+
+        return {
+            'model': model,
+            'scaler': scaler,
+            'features': list(features),
+            'n_samples': int(len(X)),
+            'trained_at': datetime.now(timezone.utc).isoformat()
+        }
+
+    def train(self, device_id, X: np.ndarray, features: List[str], persist: bool = True,
+              contamination=None) -> Dict[str, Any]:
+        """Modeli eğitir, kayıt defterine ekler ve (persist=True ise) diske kaydeder"""
+        key = self.model_key(device_id)
+        model_entry = self.fit(X, features, contamination)
+
+        if persist:
+            os.makedirs(self.model_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'  # Aynı süreçte eşzamanlı eğitimler ayrı dosyaya yazar
+            joblib.dump(model_entry, tmp_path)
+            os.replace(tmp_path, path)  # Atomik değiştirme: okuyan worker yarım dosya görmez
+
+        with self._lock:
+            self._models[key] = model_entry
+            if persist:
+                self._mtimes[key] = os.path.getmtime(self._path(key))
+
+        return self._describe(key, model_entry)
+
+    def get(self, device_id, fallback: bool = True) -> Optional[Dict[str, Any]]:
+        """Cihaz modelini döndürür; yoksa (fallback=True ise) filo geneli modeli döndürür"""
+        self._maybe_reload()
+        key = self.model_key(device_id)
+        with self._lock:
+            model_entry = self._models.get(key)
+            if model_entry is None and fallback:
+                model_entry = self._models.get(FLEET_MODEL_KEY)
+        return model_entry
+
+    @staticmethod
+    def score(model_entry: Dict[str, Any], X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Önceden eğitilmiş model ile skorlar: (label, score) - label -1 = anomali"""
+        X_scaled = model_entry['scaler'].transform(np.asarray(X, dtype=float))
+        scores = model_entry['model'].decision_function(X_scaled)
+        # IsolationForest.predict ile aynı kural: skor < 0 ise anomali
+        labels = np.where(scores < 0, -1, 1)
+        return labels, scores
+
+    def remove(self, device_id) -> bool:
+        """Modeli bellekten ve diskten siler"""
+        key = self.model_key(device_id)
+        with self._lock:
+            existed = self._models.pop(key, None) is not None
+            self._mtimes.pop(key, None)
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+            existed = True
+        return existed
+
+    @staticmethod
+    def _describe(key: str, model_entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'ModelKey': key,
+            'Features': model_entry.get('features', []),
+            'SampleCount': model_entry.get('n_samples', 0),
+            'TrainedAt': model_entry.get('trained_at')
+        }
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Yüklü modellerin özet bilgilerini döndürür"""
+        self._maybe_reload()
+        with self._lock:
+            items = list(self._models.items())
+        return [self._describe(key, model_entry) for key, model_entry in sorted(items)]
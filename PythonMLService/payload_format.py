@@ -0,0 +1,100 @@
+"""Analiz endpoint'leri için satır / sütun (columnar) veri formatları ve ikili gövde çözümleme."""
+import io
+import json
+from typing import Any, Dict, Mapping
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+import pandas as pd  # pyright: ignore[reportMissingImports]
+
+# Content-Type ile seçilen ikili sütunsal formatlar
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+NPZ_MIMETYPE = 'application/x-npz'
+BINARY_TABLE_MIMETYPES = (ARROW_STREAM_MIMETYPE, NPZ_MIMETYPE)
+
+# İkili gövdede tablo dışındaki istek alanları (DaysAhead, DeviceId, ...) bu başlıkta JSON olarak gelir
+PAYLOAD_HEADER = 'X-ML-Payload'
+
+
+class PayloadFormatError(ValueError):
+    """Gövde çözülemedi ya da içerik tipi desteklenmiyor"""
+
+
+def to_frame(data, parse_dates: bool = True) -> pd.DataFrame:
+    """
+    HistoricalData / Data alanını DataFrame'e çevirir.
+
+    Kabul edilen biçimler:
+    - Satır listesi (eski format): [{"Date": "2024-01-01T00:00:00", "EnergyConsumption": 1.2, ...}, ...]
+    - Sütun sözlüğü (JSON): {"Date": [1704067200000, ...], "EnergyConsumption": [1.2, ...], ...}
+    - İkili gövdeden çözülmüş sütun sözlüğü (NumPy dizileri, kopyalanmadan kullanılır)
+
+    Date sütunu sayısal ise epoch milisaniye (UTC) kabul edilir, aksi halde ISO metin olarak ayrıştırılır.
+    """
+    if isinstance(data, Mapping):
+        columns = {name: values if isinstance(values, np.ndarray) else np.asarray(values)
+                   for name, values in data.items()}
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('Sütun uzunlukları eşit olmalı')
+        df = pd.DataFrame(columns, copy=False)
+    else:
+        df = pd.DataFrame(data)
+
+    if parse_dates and 'Date' in df.columns:
+        df['Date'] = parse_date_column(df['Date'])
+    return df
+
+
+def parse_date_column(dates: pd.Series) -> pd.Series:
+    """Epoch ms (sayısal), datetime64 ya da ISO metin tarih sütununu datetime64'e çevirir"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    if pd.api.types.is_numeric_dtype(dates):
+        return pd.Series(pd.to_datetime(dates.to_numpy(), unit='ms'), index=dates.index, name=dates.name)
+    return pd.to_datetime(dates)
+
+
+def decode_table(body: bytes, mimetype: str) -> Dict[str, np.ndarray]:
+    """İkili sütunsal gövdeyi sütun adı -> NumPy dizisi sözlüğüne çözer"""
+    if mimetype == NPZ_MIMETYPE:
+        # allow_pickle=False: sadece sayısal/metin diziler, keyfi nesne çözülmez
+        with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+            return {name: archive[name] for name in archive.files}
+
+    if mimetype == ARROW_STREAM_MIMETYPE:
+        try:
+            import pyarrow as pa  # pyright: ignore[reportMissingImports]
+        except ImportError:
+            raise PayloadFormatError('Arrow formatı için pyarrow kurulu değil')
+        # py_buffer gövdeyi kopyalamaz; tek parça ve null içermeyen sayısal sütunlar kopyasız NumPy'a açılır
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        columns = {}
+        for name in table.column_names:
+            column = table.column(name)
+            if column.num_chunks == 1 and column.null_count == 0:
+                columns[name] = column.chunk(0).to_numpy(zero_copy_only=False)
+            else:
+                columns[name] = column.to_numpy()
+        return columns
+
+    raise PayloadFormatError(f'Desteklenmeyen içerik tipi: {mimetype}')
+
+
+def read_request_payload(request, table_field: str = 'HistoricalData') -> Dict[str, Any]:
+    """
+    Flask isteğinden analiz gövdesini okur (Content-Type'a göre).
+
+    - application/json: satır listesi ya da sütun sözlüğü içeren JSON (olduğu gibi)
+    - Arrow IPC stream / NPZ: gövde table_field alanına, diğer alanlar X-ML-Payload başlığından
+    """
+    if request.mimetype in BINARY_TABLE_MIMETYPES:
+        try:
+            payload = json.loads(request.headers.get(PAYLOAD_HEADER) or '{}')
+            table = decode_table(request.get_data(cache=False), request.mimetype)
+        except PayloadFormatError:
+            raise
+        except Exception as e:
+            raise PayloadFormatError(f'Gövde çözülemedi: {str(e)}')
+        payload[table_field] = table
+        return payload
+    return request.get_json()
@@ -0,0 +1,319 @@
+"""RabbitMQ için publisher confirms kullanan, kanal havuzlu ve toplu (batched) yayıncı."""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pika  # pyright: ignore[reportMissingModuleSource]
+
+from structured_log import get_logger
+
+logger = get_logger('publisher')
+
+class _ChannelState:
+    """Havuzdaki tek bir kanal ve onu bekleyen (onaylanmamış) mesajlar"""
+
+    __slots__ = ('channel', 'next_tag', 'unconfirmed')
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.next_tag = 1  # confirm modunda broker delivery tag'leri 1'den başlar
+        self.unconfirmed: 'OrderedDict[int, bytes]' = OrderedDict()
+
+
+class ConfirmedPublisher:
+    """
+    Tek bir SelectConnection üzerinde çalışan, arka plan I/O thread'li yayıncı.
+
+    - publish() / publish_many() thread-safe'dir ve beklemez: mesaj bekleme kuyruğuna
+      eklenir, I/O thread'i uyandırılır (birden fazla çağrı tek uyandırmada birleşir)
+    - I/O thread'i mesajları channel_count kanala round-robin dağıtır; her kanal confirm
+      modundadır ve en fazla max_unconfirmed onaylanmamış mesaj taşır
+    - Broker onayları toplu gelir (Basic.Ack multiple=True); nack alan ya da kanal/bağlantı
+      koptuğunda onaylanmamış kalan mesajlar kuyruğun başına geri alınır (en az bir kez teslim)
+    - Bağlantı koparsa reconnect_delay sonra yeniden bağlanılır
+    - Thread ilk publish'te başlatılır; fork sonrası (farklı PID) yeniden başlatılır
+    """
+
+    def __init__(self, parameters_factory: Callable[[], pika.ConnectionParameters], routing_key: str,
+                 exchange: str = '', declare_queue: bool = True, channel_count: int = 2,
+                 max_unconfirmed: int = 1000, max_pending: int = 50000, reconnect_delay: float = 5.0,
+                 properties: Optional[pika.BasicProperties] = None):
+        self.parameters_factory = parameters_factory
+        self.routing_key = routing_key
+        self.exchange = exchange
+        self.declare_queue = declare_queue
+        self.channel_count = channel_count
+        self.max_unconfirmed = max_unconfirmed
+        self.max_pending = max_pending
+        self.reconnect_delay = reconnect_delay
+        self.properties = properties or pika.BasicProperties(
+            delivery_mode=2,  # Mesajı kalıcı yap
+            content_type='application/json'
+        )
+
+        self._reset_state()
+        self._pid = None
+
+    def _reset_state(self) -> None:
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._scheduled = False
+        self._in_flight = 0
+        self._stopping = False
+        self._connection = None
+        self._channels: List[_ChannelState] = []
+        self._next_channel = 0
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {'Published': 0, 'Confirmed': 0, 'Nacked': 0, 'Requeued': 0,
+                          'Dropped': 0, 'Reconnects': 0}
+
+    def _ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # Fork edilmiş süreç: ebeveynin soketi ve I/O thread'i kullanılamaz
+                self._reset_state()
+            self._thread = threading.Thread(target=self._run, name='ml-rabbit-publisher', daemon=True)
+            self._thread.start()
+            self._pid = pid
+
+    # ------------------------------------------------------------------
+    # Uygulama thread'lerinden çağrılanlar
+    # ------------------------------------------------------------------
+
+    def publish(self, body) -> bool:
+        """Tek mesajı yayın kuyruğuna ekler"""
+        return self.publish_many([body]) == 1
+
+    def publish_many(self, bodies: Iterable) -> int:
+        """Mesajları tek kilit + tek I/O uyandırması ile kuyruğa ekler, eklenen sayısını döndürür"""
+        self._ensure_started()
+        added = 0
+        with self._lock:
+            for body in bodies:
+                if len(self._pending) >= self.max_pending:
+                    self._pending.popleft()  # En eski mesaj atılır, consumer beklemez
+                    self._counters['Dropped'] += 1
+                self._pending.append(body.encode('utf-8') if isinstance(body, str) else body)
+                added += 1
+            connection = self._connection
+            wake = added > 0 and not self._scheduled and bool(self._channels)
+            if wake:
+                self._scheduled = True
+        if wake:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._drain)
+            except Exception:
+                # Bağlantı kapanıyor: mesajlar kuyrukta kalır, yeniden bağlanınca gönderilir
+                with self._lock:
+                    self._scheduled = False
+        return added
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Bekleyen ve onaylanmamış mesajlar bitene kadar bekler"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(min(remaining, 0.1))
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Bekleyen mesajları onaylatmayı dener, bağlantıyı kapatır"""
+        if self._pid != os.getpid():
+            return
+        self.flush(timeout)
+        with self._lock:
+            self._stopping = True
+            connection = self._connection
+        if connection is not None:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._close_connection)
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                'Pending': len(self._pending),
+                'Unconfirmed': self._in_flight,
+                'Channels': len(self._channels),
+                'Connected': self._connection is not None and bool(self._channels)
+            }
+
+    # ------------------------------------------------------------------
+    # I/O thread'i
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._stopping:
+            try:
+                connection = pika.SelectConnection(
+                    self.parameters_factory(),
+                    on_open_callback=self._on_connection_open,
+                    on_open_error_callback=self._on_connection_open_error,
+                    on_close_callback=self._on_connection_closed
+                )
+                with self._lock:
+                    self._connection = connection
+                connection.ioloop.start()
+            except Exception as e:
+                logger.warning("⚠ RabbitMQ publisher hatası: %s", e)
+            with self._lock:
+                self._connection = None
+                channels, self._channels = self._channels, []
+            for state in channels:
+                self._requeue_unconfirmed(state)
+            if not self._stopping:
+                with self._lock:
+                    self._counters['Reconnects'] += 1
+                time.sleep(self.reconnect_delay)
+
+    def _close_connection(self) -> None:
+        if self._connection is not None and not (self._connection.is_closing or self._connection.is_closed):
+            self._connection.close()
+
+    def _on_connection_open(self, connection) -> None:
+        logger.info("✓ RabbitMQ publisher bağlandı (%d kanal, publisher confirms)", self.channel_count)
+        for _ in range(self.channel_count):
+            connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error) -> None:
+        logger.warning("⚠ RabbitMQ publisher bağlanamadı: %s", error)
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason) -> None:
+        with self._lock:
+            channels, self._channels = self._channels, []
+        for state in channels:
+            self._requeue_unconfirmed(state)
+        if not self._stopping:
+            logger.warning("⚠ RabbitMQ publisher bağlantısı kapandı: %s", reason)
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel) -> None:
+        channel.add_on_close_callback(self._on_channel_closed)
+        if self.declare_queue:
+            channel.queue_declare(queue=self.routing_key, durable=True,
+                                  callback=lambda _frame: self._enable_confirms(channel))
+        else:
+            self._enable_confirms(channel)
+
+    def _enable_confirms(self, channel) -> None:
+        state = _ChannelState(channel)
+        channel.confirm_delivery(
+            ack_nack_callback=partial(self._on_confirm, state),
+            callback=lambda _frame: self._on_channel_ready(state)
+        )
+
+    def _on_channel_ready(self, state: _ChannelState) -> None:
+        with self._lock:
+            self._channels.append(state)
+        self._drain()
+
+    def _on_channel_closed(self, channel, reason) -> None:
+        with self._lock:
+            state = next((s for s in self._channels if s.channel is channel), None)
+            if state is not None:
+                self._channels.remove(state)
+        if state is not None:
+            self._requeue_unconfirmed(state)
+        connection = self._connection
+        if self._stopping or connection is None or connection.is_closing or connection.is_closed:
+            return
+        logger.warning("⚠ RabbitMQ publisher kanalı kapandı, yeniden açılacak: %s", reason)
+        connection.ioloop.call_later(
+            self.reconnect_delay,
+            lambda: connection.is_open and connection.channel(on_open_callback=self._on_channel_open)
+        )
+
+    def _requeue_unconfirmed(self, state: _ChannelState) -> None:
+        """Onayı gelmeyen mesajları kuyruğun başına geri alır"""
+        if not state.unconfirmed:
+            return
+        bodies = list(state.unconfirmed.values())
+        state.unconfirmed.clear()
+        with self._lock:
+            self._pending.extendleft(reversed(bodies))
+            self._in_flight -= len(bodies)
+            self._counters['Requeued'] += len(bodies)
+
+    def _drain(self) -> None:
+        """Bekleyen mesajları kapasitesi olan kanallara round-robin yayınlar"""
+        with self._lock:
+            self._scheduled = False
+            channels = list(self._channels)
+        if not channels:
+            return
+
+        for _ in range(len(channels)):
+            state = channels[self._next_channel % len(channels)]
+            self._next_channel += 1
+            capacity = self.max_unconfirmed - len(state.unconfirmed)
+            if capacity <= 0:
+                continue
+            with self._lock:
+                batch = [self._pending.popleft() for _ in range(min(capacity, len(self._pending)))]
+                self._in_flight += len(batch)
+            if not batch:
+                return
+            sent = 0
+            for i, body in enumerate(batch):
+                try:
+                    state.channel.basic_publish(self.exchange, self.routing_key, body, self.properties)
+                except Exception as e:
+                    logger.error("✗ RabbitMQ publish hatası: %s", e)
+                    rest = batch[i:]
+                    with self._lock:
+                        self._pending.extendleft(reversed(rest))
+                        self._in_flight -= len(rest)
+                    break
+                state.unconfirmed[state.next_tag] = body
+                state.next_tag += 1
+                sent += 1
+            with self._lock:
+                self._counters['Published'] += sent
+
+    def _on_confirm(self, state: _ChannelState, method_frame) -> None:
+        """Broker onayı: multiple=True ise delivery_tag'e kadar tüm mesajlar onaylanır"""
+        method = method_frame.method
+        tag = method.delivery_tag
+        if method.multiple:
+            tags = []
+            for t in state.unconfirmed:  # Tag'ler artan sırada
+                if t > tag:
+                    break
+                tags.append(t)
+        else:
+            tags = [tag] if tag in state.unconfirmed else []
+        bodies = [state.unconfirmed.pop(t) for t in tags]
+
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        with self._lock:
+            self._in_flight -= len(bodies)
+            if acked:
+                self._counters['Confirmed'] += len(bodies)
+            else:
+                # Nack: broker mesajı kabul etmedi, tekrar gönderilecek
+                self._counters['Nacked'] += len(bodies)
+                self._pending.extendleft(reversed(bodies))
+            self._idle.notify_all()
+        if acked:
+            if self._pending:
+                self._drain()
+        elif self._connection is not None:
+            # Broker nack veriyorsa (ör. disk/bellek alarmı) hemen tekrar yüklenmeden bekle
+            self._connection.ioloop.call_later(self.reconnect_delay, self._drain)
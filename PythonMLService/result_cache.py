@@ -0,0 +1,191 @@
+"""Analiz endpoint'leri için içerik adresli (content-addressed) sonuç önbelleği."""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def _json_key_default(value: Any) -> Any:
+    """JSON'a çevrilemeyen değerler için anahtar: NumPy dizileri içerik hash'i ile temsil edilir"""
+    if hasattr(value, 'tobytes') and hasattr(value, 'dtype'):
+        # object dtype (ör. Arrow string sütunları) tobytes() ile PyObject adreslerini verir:
+        # bu diziler içerikleri (JSON) ile hash'lenir
+        if value.dtype.kind == 'O':
+            payload = json.dumps(value.tolist(), sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+        else:
+            payload = value.tobytes()
+        digest = hashlib.blake2b(payload, digest_size=16)
+        return {'ndarray': digest.hexdigest(), 'dtype': str(value.dtype), 'shape': list(getattr(value, 'shape', ()))}
+    return str(value)
+
+
+class FallbackResult(dict):
+    """Analiz hata verdiğinde dönen varsayılan sonuç: yanıt olarak döner ama önbelleğe alınmaz"""
+
+
+def is_cacheable(value: Any) -> bool:
+    """Varsayılan (hata) sonuç içermeyen değerler önbelleğe alınır; birleşik sonuçlarda (/analyze-device) alanlara da bakılır"""
+    if isinstance(value, FallbackResult):
+        return False
+    if isinstance(value, dict):
+        return not any(isinstance(item, FallbackResult) for item in value.values())
+    return True
+
+
+class ResultCache:
+    """
+    İstek gövdesi + endpoint adının hash'i ile anahtarlanan LRU + TTL önbellek.
+
+    - Bellek katmanı: worker başına, max_entries ile sınırlı (en eski kullanılan atılır)
+    - Disk katmanı (opsiyonel): disk_dir altında JSON dosyaları, tüm worker'lar paylaşır
+    - Anahtar: normalize edilmiş (sıralı anahtarlı) JSON'un BLAKE2b özeti;
+      aynı veri farklı anahtar sırasıyla gelse de aynı sonuca denk gelir
+    """
+
+    # Disk katmanında kaç yazmada bir süresi dolmuş dosyaların temizleneceği
+    DISK_PRUNE_EVERY = 256
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir or None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_writes = 0
+
+    @staticmethod
+    def make_key(endpoint: str, payload: Any) -> str:
+        """Endpoint + normalize edilmiş istek gövdesinden önbellek anahtarı üretir"""
+        normalized = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=_json_key_default)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(endpoint.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(normalized.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f'{key}.json')
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(bulundu_mu, değer) döndürür"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return True, value
+                del self._entries[key]
+
+        if self.disk_dir:
+            value = self._disk_get(key)
+            if value is not None:
+                self._store(key, value)
+                with self._lock:
+                    self._disk_hits += 1
+                return True, value
+
+        with self._lock:
+            self._misses += 1
+        return False, None
+
+    def _disk_get(self, key: str) -> Any:
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def set(self, key: str, value: Any) -> None:
+        """Değeri bellek (ve varsa disk) katmanına yazar"""
+        self._store(key, value)
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)  # Atomik: diğer worker yarım dosya okumaz
+        except (OSError, TypeError, ValueError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % self.DISK_PRUNE_EVERY == 0
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Süresi dolmuş disk kayıtlarını siler"""
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(self.disk_dir):
+            try:
+                if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def get_or_compute(self, endpoint: str, payload: Any, compute) -> Any:
+        """Önbellekte varsa döndürür, yoksa compute() sonucunu (varsayılan hata sonucu değilse) önbelleğe alıp döndürür"""
+        key = self.make_key(endpoint, payload)
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = compute()
+        if is_cacheable(value):
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Bellek ve disk katmanlarını temizler"""
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir:
+            for entry in os.scandir(self.disk_dir):
+                if entry.name.endswith('.json'):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss sayaçları (bu worker için)"""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                'Entries': len(self._entries),
+                'MaxEntries': self.max_entries,
+                'TtlSeconds': self.ttl,
+                'Hits': self._hits,
+                'DiskHits': self._disk_hits,
+                'Misses': self._misses,
+                'Evictions': self._evictions,
+                'HitRatio': (self._hits + self._disk_hits) / lookups if lookups else 0.0,
+                'DiskTier': self.disk_dir is not None
+            }
@@ -0,0 +1,196 @@
+"""ML sonuçlarının .NET API'ye asenkron, toplu (batched) iletimi için sınırlı kapasiteli outbox."""
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+from structured_log import get_logger
+
+logger = get_logger('outbox')
+
+# send_batch fonksiyonunun dönüş değerleri
+DELIVERED = 'delivered'  # Batch iletildi
+RETRY = 'retry'  # Geçici hata (ağ, timeout, 5xx, 429): backoff ile yeniden denenir
+REJECTED = 'rejected'  # Kalıcı hata (4xx): yeniden denenmez
+
+# Outbox dolu olduğunda uygulanacak politikalar
+FULL_POLICIES = ('drop_oldest', 'drop_new', 'block')
+
+
+class ResultOutbox:
+    """
+    Consumer thread'inin sonuçları beklemeden bıraktığı sınırlı bellek içi kuyruk.
+
+    - put() sadece kuyruğa ekler; HTTP çağrısını arka plandaki sender thread'leri yapar
+    - Sender thread'leri kuyruktan batch_size'a kadar sonucu (ya da max_wait dolunca
+      eldekileri) alıp send_batch(list) ile tek istekte gönderir
+    - RETRY sonucunda üstel backoff + jitter ile max_retries kez yeniden denenir
+    - Kuyruk doluyken full_policy uygulanır:
+        drop_oldest: en eski sonuç atılır (varsayılan, consumer hiç beklemez)
+        drop_new:    yeni sonuç atılır
+        block:       block_timeout saniyeye kadar yer açılması beklenir, sonra yeni sonuç atılır
+    - Thread'ler ilk put() çağrısında başlatılır; fork sonrası (farklı PID) yeniden başlatılır
+    """
+
+    def __init__(self, send_batch: Callable[[List[Any]], str], max_size: int = 10000,
+                 batch_size: int = 100, max_wait: float = 0.5, workers: int = 2,
+                 full_policy: str = 'drop_oldest', block_timeout: float = 5.0,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f'Geçersiz outbox politikası: {full_policy} ({", ".join(FULL_POLICIES)})')
+        self.send_batch = send_batch
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.workers = workers
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._reset_state()
+        self._pid = None
+
+    def _reset_state(self) -> None:
+        self._items: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._in_flight = 0
+        self._counters = {'Enqueued': 0, 'Delivered': 0, 'Rejected': 0, 'Dropped': 0,
+                          'Retries': 0, 'Batches': 0, 'FailedBatches': 0}
+
+    def _ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # Fork edilmiş süreç: ebeveynin thread'leri burada yok, kilitler kopya
+                self._reset_state()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'ml-outbox-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._pid = pid
+
+    def put(self, item: Any) -> bool:
+        """Sonucu kuyruğa ekler; kuyruğa alınamadıysa (politika gereği atıldıysa) False döner"""
+        self._ensure_started()
+        with self._lock:
+            if len(self._items) >= self.max_size:
+                if self.full_policy == 'drop_oldest':
+                    self._items.popleft()
+                    self._counters['Dropped'] += 1
+                elif self.full_policy == 'drop_new':
+                    self._counters['Dropped'] += 1
+                    return False
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._items) >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or self._stopping:
+                            self._counters['Dropped'] += 1
+                            return False
+                        self._not_full.wait(remaining)
+            self._items.append(item)
+            self._counters['Enqueued'] += 1
+            self._not_empty.notify()
+        return True
+
+    def _take_batch(self) -> List[Any]:
+        """batch_size kadar sonuç ya da ilk sonuçtan itibaren max_wait dolunca eldekileri alır"""
+        with self._lock:
+            while not self._items and not self._stopping:
+                self._not_empty.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._items) < self.batch_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._not_empty.wait(remaining)
+            batch = [self._items.popleft() for _ in range(min(self.batch_size, len(self._items)))]
+            self._in_flight += len(batch)
+            self._not_full.notify_all()
+        return batch
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)  # Jitter: sender'lar aynı anda tekrar denemesin
+
+    def _deliver(self, batch: List[Any]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                outcome = self.send_batch(batch)
+            except Exception as e:
+                logger.error("✗ Outbox gönderim hatası: %s", e)
+                outcome = RETRY
+
+            if outcome != RETRY:
+                with self._lock:
+                    self._counters['Batches'] += 1
+                    self._counters['Delivered' if outcome == DELIVERED else 'Rejected'] += len(batch)
+                return
+            if attempt == self.max_retries or self._stopping:
+                break
+            with self._lock:
+                self._counters['Retries'] += 1
+            time.sleep(self._backoff(attempt))
+
+        logger.error("✗ Outbox: %d sonuç %d denemeden sonra iletilemedi, atıldı", len(batch), self.max_retries + 1)
+        with self._lock:
+            self._counters['FailedBatches'] += 1
+            self._counters['Dropped'] += len(batch)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if self._stopping:
+                    return
+                continue
+            try:
+                self._deliver(batch)
+            finally:
+                with self._lock:
+                    self._in_flight -= len(batch)
+                    self._not_full.notify_all()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Kuyruk ve uçuştaki batch'ler boşalana kadar bekler (kapatma/test için)"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._items or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._not_full.wait(min(remaining, 0.1))
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Kalan sonuçları göndermeyi dener ve sender thread'lerini durdurur"""
+        self.flush(timeout)
+        with self._lock:
+            self._stopping = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Kuyruk derinliği ve iletim sayaçları (bu süreç için)"""
+        with self._lock:
+            return {
+                **self._counters,
+                'Pending': len(self._items),
+                'InFlight': self._in_flight,
+                'MaxSize': self.max_size,
+                'FullPolicy': self.full_policy
+            }
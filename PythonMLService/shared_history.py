@@ -0,0 +1,305 @@
+"""
+Süreçler arası paylaşılan (mmap) cihaz geçmişi önbelleği.
+
+Consumer son okumaları sabit düzenli bir bellek alanına (arena) yazar; tüm gunicorn
+worker'ları aynı dosyayı MAP_SHARED ile eşler ve veriyi IPC/serileştirme olmadan
+doğrudan okur. Bellek worker sayısından bağımsızdır (sayfalar çekirdek tarafından paylaşılır).
+
+Düzen (sabit, başlıkta doğrulanır):
+    başlık | anahtarlar (slots, S64) | seq (slots) | head/count/total (slots, 3)
+    | last_seen (slots) | window_sum (slots, features) | timestamps (slots, window)
+    | values (slots, window, features)
+
+- Cihaz slotu crc32(deviceId) ile bulunur (doğrusal yoklama, MAX_PROBE); tablo doluysa
+  yoklama aralığında en uzun süredir güncellenmeyen cihazın slotu yeniden kullanılır
+- Yazıcılar (consumer süreçleri/thread'leri) lockf + thread kilidi ile sıralanır
+- Okuyucular kilit almaz: slot başına sıra sayacı (seqlock) tek ise ya da okuma sırasında
+  değiştiyse okuma tekrarlanır; RETRIES denemeden sonra paylaşımlı kilide düşülür
+- Dosya /dev/shm (tmpfs) altında durur: diske yazılmaz, seyrek (sparse) olduğundan sadece
+  dokunulan slotların sayfaları bellek tüketir
+"""
+import fcntl
+import mmap
+import os
+import threading
+import zlib
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+from structured_log import get_logger
+
+logger = get_logger('shared_history')
+
+MAGIC = b'MLHIST01'
+HEADER_SIZE = 64
+KEY_SIZE = 64
+MAX_PROBE = 16
+RETRIES = 8
+
+
+def _align(offset: int, alignment: int = 64) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class SharedHistoryArena:
+    """
+    Cihaz slotu x pencere x özellik boyutlu paylaşılan halka tamponlar.
+
+    Aynı path, slots, window ve features ile açılan her süreç aynı belleği görür.
+    Başlıktaki düzen farklıysa (ayarlar değişti) arena sıfırlanır.
+    """
+
+    def __init__(self, path: str, features: Sequence[str], slots: int = 4096, window: int = 256):
+        self.path = path
+        self.features = list(features)
+        self.slots = slots
+        self.window = window
+        n_features = len(self.features)
+
+        # Dizi ofsetleri (64 byte hizalı)
+        layout = []
+        offset = HEADER_SIZE
+        for name, dtype, shape in (
+            ('keys', f'S{KEY_SIZE}', (slots,)),
+            ('seq', '<u8', (slots,)),
+            ('meta', '<i8', (slots, 3)),  # head, count, total
+            ('last_seen', '<f8', (slots,)),
+            ('window_sum', '<f8', (slots, n_features)),
+            ('timestamps', '<i8', (slots, window)),  # epoch ms
+            ('values', '<f8', (slots, window, n_features)),
+        ):
+            layout.append((name, np.dtype(dtype), shape, offset))
+            offset = _align(offset + np.dtype(dtype).itemsize * int(np.prod(shape)))
+        self._layout = layout
+        self.size = offset
+        self._header = np.array([slots, window, n_features, self.size], dtype='<i8').tobytes()
+
+        self._pid = None
+        self._fd = None
+        self._mm = None
+        self._lock = threading.Lock()
+        self._slot_cache: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Eşleme (süreç başına, fork sonrası yeniden)
+    # ------------------------------------------------------------------
+
+    def _attach(self) -> None:
+        """Arena dosyasını bu süreçte açar ve eşler (gerekirse oluşturur/sıfırlar)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Fork ile gelen kilit/önbellek durumu ebeveyne ait: çocukta yenilenir
+            self._lock = threading.Lock()
+            self._slot_cache = {}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o660)
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+                try:
+                    header = os.pread(fd, HEADER_SIZE, 0)
+                    if header[:len(MAGIC)] != MAGIC or header[len(MAGIC):len(MAGIC) + len(self._header)] != self._header:
+                        if header[:len(MAGIC)] == MAGIC:
+                            logger.warning("⚠ Paylaşılan geçmiş düzeni değişti, arena sıfırlanıyor: %s", self.path)
+                        os.ftruncate(fd, 0)
+                        os.ftruncate(fd, self.size)  # Sıfırlanmış, seyrek dosya
+                        os.pwrite(fd, MAGIC + self._header, 0)
+                finally:
+                    fcntl.lockf(fd, fcntl.LOCK_UN)
+                mm = mmap.mmap(fd, self.size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            except Exception:
+                os.close(fd)
+                raise
+            for name, dtype, shape, offset in self._layout:
+                setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=mm, offset=offset))
+            self._fd = fd
+            self._mm = mm
+            self._pid = os.getpid()
+            logger.info("✓ Paylaşılan geçmiş eşlendi: %s (%d slot x %d okuma, %.1f MB)",
+                        self.path, self.slots, self.window, self.size / 1e6)
+
+    # ------------------------------------------------------------------
+    # Slot bulma
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key_bytes(device_id) -> bytes:
+        return str(device_id).encode('utf-8')[:KEY_SIZE]
+
+    def _find_slot(self, key: bytes) -> Optional[int]:
+        """Cihazın slotu (yoksa None); okuyucu tarafı, kilitsiz"""
+        cached = self._slot_cache.get(key)
+        if cached is not None and self.keys[cached] == key:
+            return cached
+        start = zlib.crc32(key) % self.slots
+        for probe in range(MAX_PROBE):
+            slot = (start + probe) % self.slots
+            stored = self.keys[slot]
+            if stored == key:
+                self._slot_cache[key] = slot
+                return slot
+            if not stored:
+                return None
+        return None
+
+    def _claim_slot(self, key: bytes, now_ms: int) -> int:
+        """Yazıcı tarafı (kilit altında): mevcut slot, boş slot ya da en eski cihazın slotu"""
+        slot = self._find_slot(key)
+        if slot is not None:
+            return slot
+        start = zlib.crc32(key) % self.slots
+        candidates = [(start + probe) % self.slots for probe in range(MAX_PROBE)]
+        empty = [slot for slot in candidates if not self.keys[slot]]
+        slot = empty[0] if empty else min(candidates, key=lambda candidate: self.last_seen[candidate])
+        # Slot yeni cihaza devredilirken okuyucular tutarsız durum görmesin
+        self.seq[slot] += 1
+        self.keys[slot] = key
+        self.meta[slot] = 0
+        self.window_sum[slot] = 0.0
+        self.last_seen[slot] = now_ms
+        self.seq[slot] += 1
+        self._slot_cache[key] = slot
+        return slot
+
+    # ------------------------------------------------------------------
+    # Yazma (consumer)
+    # ------------------------------------------------------------------
+
+    def append(self, device_ids: Sequence, timestamps_ms: np.ndarray, X: np.ndarray) -> None:
+        """
+        Okumaları cihaz pencerelerine ekler (device_ids[i], timestamps_ms[i], X[i]).
+
+        Batch tek kilit altında yazılır; satırlar cihaza göre gruplanır, her cihaz slotu
+        için sıra sayacı bir kez artırılır.
+        """
+        if len(device_ids) == 0:
+            return
+        self._attach()
+        rows_by_device: Dict[bytes, list] = {}
+        for i, device_id in enumerate(device_ids):
+            rows_by_device.setdefault(self._key_bytes(device_id), []).append(i)
+        timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                for key, rows in rows_by_device.items():
+                    received = len(rows)
+                    rows = rows[-self.window:]  # Pencereden uzun batch'te sadece son okumalar kalır
+                    slot = self._claim_slot(key, int(timestamps_ms[rows[-1]]))
+                    head, count, total = (int(value) for value in self.meta[slot])
+                    positions = (head + np.arange(len(rows))) % self.window
+                    new_values = X[rows]
+
+                    self.seq[slot] += 1
+                    # Üzerine yazılan (en eski) okumalar pencere toplamından düşülür; bunlar
+                    # yazılacak pozisyonların sonundakilerdir (baştakiler henüz boş)
+                    evicted = max(0, count + len(rows) - self.window)
+                    if evicted:
+                        self.window_sum[slot] -= self.values[slot, positions[len(rows) - evicted:]].sum(axis=0)
+                    self.values[slot, positions] = new_values
+                    self.timestamps[slot, positions] = timestamps_ms[rows]
+                    new_head = (head + len(rows)) % self.window
+                    if new_head <= head:
+                        # Her tur sonunda toplam baştan hesaplanır (kayan nokta birikimi olmasın)
+                        self.window_sum[slot] = self.values[slot, :min(count + len(rows), self.window)].sum(axis=0)
+                    else:
+                        self.window_sum[slot] += new_values.sum(axis=0)
+                    self.meta[slot] = (new_head, min(count + len(rows), self.window), total + received)
+                    self.last_seen[slot] = timestamps_ms[rows].max()
+                    self.seq[slot] += 1
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Okuma (HTTP worker'ları)
+    # ------------------------------------------------------------------
+
+    def _copy_slot(self, slot: int):
+        head, count, total = (int(value) for value in self.meta[slot])
+        if count < self.window:
+            order = np.arange(count)
+        else:
+            order = (head + np.arange(self.window)) % self.window
+        return (count, total, int(self.last_seen[slot]), self.timestamps[slot, order],
+                self.values[slot, order], self.window_sum[slot].copy())
+
+    def snapshot(self, device_id) -> Optional[Dict[str, Any]]:
+        """
+        Cihazın penceresinin tutarlı bir kopyası (yoksa None):
+        {'Count', 'Total', 'LastSeen', 'Timestamps' (eskiden yeniye), 'Values', 'WindowSum'}
+        """
+        self._attach()
+        key = self._key_bytes(device_id)
+        copied = None
+        for _ in range(RETRIES):
+            slot = self._find_slot(key)
+            if slot is None:
+                return None
+            before = int(self.seq[slot])
+            if before & 1:
+                continue
+            copied = self._copy_slot(slot)
+            if int(self.seq[slot]) == before and self.keys[slot] == key:
+                break
+            copied = None
+        if copied is None:
+            # Yoğun yazma altında: yazıcıları kısa süre durdurup oku
+            fcntl.lockf(self._fd, fcntl.LOCK_SH)
+            try:
+                slot = self._find_slot(key)
+                if slot is None:
+                    return None
+                copied = self._copy_slot(slot)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        count, total, last_seen, timestamps, values, window_sum = copied
+        if count == 0:
+            return None
+        return {'Count': count, 'Total': total, 'LastSeen': last_seen,
+                'Timestamps': timestamps, 'Values': values, 'WindowSum': window_sum}
+
+    def history(self, device_id) -> Optional[Dict[str, np.ndarray]]:
+        """Cihaz penceresi sütun sözlüğü olarak ({'Date': epoch ms, <özellik>: ...}), yoksa None"""
+        window = self.snapshot(device_id)
+        if window is None:
+            return None
+        columns = {'Date': window['Timestamps']}
+        for j, feature in enumerate(self.features):
+            columns[feature] = window['Values'][:, j]
+        return columns
+
+    def summary(self, device_id) -> Optional[Dict[str, Any]]:
+        """Pencere özeti: okuma sayıları, son zaman, pencere ortalaması ve son okuma"""
+        window = self.snapshot(device_id)
+        if window is None:
+            return None
+        means = window['WindowSum'] / window['Count']
+        return {
+            'DeviceId': device_id,
+            'WindowCount': window['Count'],
+            'TotalReadings': window['Total'],
+            'LastSeen': window['LastSeen'],
+            'WindowMean': {feature: float(means[j]) for j, feature in enumerate(self.features)},
+            'Latest': {feature: float(window['Values'][-1, j]) for j, feature in enumerate(self.features)}
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mm is not None and self._pid == os.getpid():
+                for name, _, _, _ in self._layout:
+                    if hasattr(self, name):
+                        delattr(self, name)
+                try:
+                    self._mm.close()
+                except BufferError:
+                    pass  # Dışarıda hâlâ görünüm var: eşleme süreç sonunda kalkar
+                os.close(self._fd)
+            self._mm = None
+            self._fd = None
+            self._pid = None
@@ -0,0 +1,95 @@
+"""RabbitMQ consumer için cihaz bazlı, önceden ayrılmış (preallocated) halka tampon pencereleri."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+
+class DeviceWindow:
+    """
+    Tek bir cihazın son N okumasını tutan sabit boyutlu halka tampon (ring buffer).
+
+    - values: (capacity, n_features) float64 matris, bir kez ayrılır ve yeniden kullanılır
+    - Yeni okuma en eski okumanın üzerine yazılır (O(1) ekleme, ek bellek yok)
+    - Isolation Forest için satır sırası önemsiz olduğundan view() kopya üretmez
+    - model: pencereden eğitilen akış modeli; sadece bellekte tutulur (kayıt defterine/diske
+      yazılmaz), pencere atılınca onunla birlikte atılır
+    """
+
+    __slots__ = ('values', 'timestamps', 'capacity', 'head', 'count', 'total', 'trained_total', 'model')
+
+    def __init__(self, capacity: int, n_features: int):
+        self.values = np.empty((capacity, n_features), dtype=np.float64)
+        self.timestamps = np.empty(capacity, dtype=np.float64)  # epoch saniye
+        self.capacity = capacity
+        self.head = 0  # Bir sonraki yazma pozisyonu
+        self.count = 0  # Penceredeki geçerli okuma sayısı
+        self.total = 0  # Bu cihaz için şimdiye kadar eklenen toplam okuma
+        self.trained_total = 0  # Son model eğitimi yapıldığındaki toplam okuma sayısı
+        self.model = None  # Pencereden eğitilen akış modeli (AnomalyModelRegistry.fit çıktısı)
+
+    def append(self, row, timestamp: Optional[float] = None) -> None:
+        """Yeni okumayı pencereye ekler (en eski okumanın üzerine yazar)"""
+        self.values[self.head] = row
+        self.timestamps[self.head] = time.time() if timestamp is None else timestamp
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def view(self) -> np.ndarray:
+        """Penceredeki geçerli satırlar (kopyasız görünüm, sıra garanti değil)"""
+        if self.count < self.capacity:
+            return self.values[:self.count]
+        return self.values
+
+    def ordered(self) -> np.ndarray:
+        """Penceredeki satırlar eskiden yeniye sıralı (kopya üretir)"""
+        if self.count < self.capacity:
+            return self.values[:self.count].copy()
+        return np.concatenate((self.values[self.head:], self.values[:self.head]))
+
+    def latest(self) -> np.ndarray:
+        """Son eklenen okuma"""
+        return self.values[(self.head - 1) % self.capacity]
+
+
+class DeviceWindowStore:
+    """
+    deviceId -> DeviceWindow eşlemesi.
+
+    Cihaz sayısı max_devices ile sınırlıdır; sınır aşılınca en uzun süredir
+    veri gelmeyen cihazın penceresi atılır (LRU). Böylece toplam bellek
+    max_devices * capacity * n_features * 8 byte ile, akış modelleri de max_devices ile sınırlı kalır.
+    """
+
+    def __init__(self, capacity: int, n_features: int, max_devices: int):
+        self.capacity = capacity
+        self.n_features = n_features
+        self.max_devices = max_devices
+        self._windows: 'OrderedDict[str, DeviceWindow]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, device_id, row, timestamp: Optional[float] = None) -> DeviceWindow:
+        """Okumayı cihazın penceresine ekler ve pencereyi döndürür"""
+        key = str(device_id)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = DeviceWindow(self.capacity, self.n_features)
+                self._windows[key] = window
+                if len(self._windows) > self.max_devices:
+                    self._windows.popitem(last=False)
+            else:
+                self._windows.move_to_end(key)
+            window.append(row, timestamp)
+        return window
+
+    def get(self, device_id) -> Optional[DeviceWindow]:
+        with self._lock:
+            return self._windows.get(str(device_id))
+
+    def __len__(self) -> int:
+        return len(self._windows)
@@ -0,0 +1,164 @@
+"""
+Kuyruk tabanlı, asenkron yapılandırılmış (JSON) loglama.
+
+Log kaydı çağıran thread'de sadece bir kuyruğa bırakılır (biçimlendirme ve stdout yazımı
+ayrı bir listener thread'inde yapılır); kuyruk doluysa kayıt atılır, consumer döngüsü
+stdout'u hiçbir zaman beklemez.
+
+Mesaj başına loglar ('ml.messages') ayrıca örneklenir:
+- LOG_MESSAGE_SAMPLE_RATE=0 (varsayılan): kapalı, maliyet tek bir seviye kontrolü
+- LOG_MESSAGE_SAMPLE_RATE=0.01: mesajların ~%1'i, 1: hepsi (hata ayıklama)
+
+Ayarlar: LOG_LEVEL (INFO), LOG_FORMAT (json | text), LOG_QUEUE_SIZE (10000)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_MESSAGE_SAMPLE_RATE = float(os.getenv('LOG_MESSAGE_SAMPLE_RATE', '0'))
+
+ROOT_LOGGER = 'ml'
+MESSAGE_LOGGER = 'ml.messages'
+
+# LogRecord'un standart alanları: bunların dışındaki alanlar (extra=...) JSON'a eklenir
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_lock = threading.Lock()
+_handler = None
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Tek satır JSON: ts, level, logger, msg, pid + extra alanları (+ exc)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class MessageSampler(logging.Filter):
+    """Mesaj başına kayıtların sadece `rate` oranında kısmını geçirir"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Engellemeyen QueueHandler: kuyruk doluysa kayıt sessizce atılır (sayılır).
+
+    Kayıt biçimlendirilmeden kuyruğa konur (aynı süreç içinde kalır, pickle edilmez);
+    mesajın %-biçimlendirmesi ve JSON üretimi listener thread'inde yapılır.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _stdout_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == 'text':
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    else:
+        handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def _start_listener() -> None:
+    """Yeni kuyruk + listener thread'i (ilk yapılandırmada ve fork sonrası çocukta)"""
+    global _listener
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, _stdout_handler(), respect_handler_level=False)
+    _listener.start()
+
+
+def _after_fork_in_child() -> None:
+    # Listener thread'i fork ile kopyalanmaz (ör. gunicorn master'ında yapılandırıldıktan sonra
+    # açılan worker'lar): kuyruğu kimse boşaltmazdı, çocukta yeniden başlatılır
+    global _lock
+    _lock = threading.Lock()
+    if _handler is not None:
+        _start_listener()
+
+
+def stop_logging() -> None:
+    """Kuyruktaki kayıtları yazar ve listener thread'ini durdurur"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def configure_logging() -> None:
+    """'ml' logger ağacını kuyruk + JSON çıktısına bağlar (süreç başına bir kez, tekrar çağrılabilir)"""
+    global _handler
+    with _lock:
+        if _handler is not None:
+            return
+        _handler = DroppingQueueHandler(None)
+        _start_listener()
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_handler)
+        root.propagate = False
+
+        # Mesaj başına loglar LOG_LEVEL'dan bağımsız olarak sadece örnekleme oranıyla açılır;
+        # kapalıyken seviye kontrolü kayıt oluşturulmadan (findCaller vb. maliyet olmadan) döner
+        messages = logging.getLogger(MESSAGE_LOGGER)
+        if LOG_MESSAGE_SAMPLE_RATE > 0:
+            messages.setLevel(logging.DEBUG)
+            messages.addFilter(MessageSampler(LOG_MESSAGE_SAMPLE_RATE))
+        else:
+            messages.setLevel(logging.CRITICAL + 1)
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_after_fork_in_child)
+        atexit.register(stop_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """'ml.<name>' logger'ı (configure_logging çağrılmadıysa standart logging davranışı)"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def dropped_count() -> int:
+    """Kuyruk dolu olduğu için atılan kayıt sayısı (bu süreç)"""
+    return _handler.dropped if _handler is not None else 0
@@ -0,0 +1,16 @@
+"""
+Testler app modülünü geçici dizinlerle yükler: modeller, istatistikler ve zaman serileri
+çalışma ortamına yazılmaz; paylaşılan bellek, outbox ve önbellek kapalıdır.
+"""
+import os
+import sys
+import tempfile
+
+_state_dir = tempfile.mkdtemp(prefix='ml-test-')
+os.environ.setdefault('MODEL_DIR', _state_dir)
+os.environ.setdefault('SHARED_HISTORY_ENABLED', 'false')
+os.environ.setdefault('TIMESERIES_ENABLED', 'false')
+os.environ.setdefault('DEVICE_STATS_ENABLED', 'false')
+os.environ.setdefault('RESULT_CACHE_ENABLED', 'false')
+os.environ.setdefault('OUTBOX_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,89 @@
+"""
+AnomalyRuleEngine + DEFAULT_RULES: kural motoruna taşınmadan önceki satır satır eşik kontrolleriyle
+aynı anomalileri (tip, şiddet, açıklama) üretmeli; sınır değerleri dahil.
+"""
+import json
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+from anomaly_rules import DEFAULT_RULES, AnomalyRuleEngine
+
+
+def baseline_anomalies(row):
+    """Kural motorundan önceki tek satır eşik kontrolleri (app.py), karşılaştırma için aynen"""
+    anomalies = []
+    if row['EnergyConsumption'] > 300:
+        anomalies.append(('HighConsumption', 0.7, 200.0,
+                          f'Yüksek enerji tüketimi tespit edildi: {row["EnergyConsumption"]:.2f} kWh (Eşik: 300 kWh)'))
+    if row['Temperature'] > 40:
+        severity = 0.9 if row['Temperature'] > 50 else 0.7
+        anomalies.append(('TemperatureAnomaly', severity, 25.0,
+                          f'Yüksek sıcaklık tespit edildi: {row["Temperature"]:.2f}°C (Eşik: 40°C)'))
+    if row['Voltage'] > 0 and (row['Voltage'] < 200 or row['Voltage'] > 250):
+        severity = 0.9 if (row['Voltage'] < 180 or row['Voltage'] > 260) else 0.6
+        anomalies.append(('VoltageAnomaly', severity, 220.0,
+                          f'Voltaj anomalisi tespit edildi: {row["Voltage"]:.2f}V (Normal: 200-250V)'))
+    if row['PowerFactor'] > 0 and row['PowerFactor'] < 0.7:
+        severity = 0.8 if row['PowerFactor'] < 0.5 else 0.6
+        anomalies.append(('LowPowerFactor', severity, 0.85,
+                          f'Düşük güç faktörü tespit edildi: {row["PowerFactor"]:.2f} (Normal: >0.8)'))
+    return anomalies
+
+
+def make_columns():
+    """Rastgele değerler + her eşiğin tam üstü/altı/kendisi ve geçersiz (0, negatif) okumalar"""
+    rng = np.random.default_rng(8)
+    edges = {
+        'EnergyConsumption': [0.0, 299.99, 300.0, 300.01, 1000.0],
+        'Temperature': [-5.0, 40.0, 40.01, 50.0, 50.01],
+        'Voltage': [0.0, -1.0, 179.99, 180.0, 199.99, 200.0, 250.0, 250.01, 260.0, 260.01],
+        'PowerFactor': [0.0, -0.1, 0.49, 0.5, 0.69, 0.7, 0.95],
+    }
+    n = 2000
+    columns = {
+        'EnergyConsumption': rng.uniform(0, 400, n),
+        'Temperature': rng.uniform(10, 60, n),
+        'Voltage': rng.uniform(150, 280, n),
+        'PowerFactor': rng.uniform(0.3, 1.0, n),
+    }
+    for feature, values in edges.items():
+        columns[feature][:len(values)] = values
+    return columns, n
+
+
+def test_default_rules_match_baseline_checks():
+    columns, n = make_columns()
+    detected_at = [f'2026-01-01T00:00:{i % 60:02d}' for i in range(n)]
+    results = AnomalyRuleEngine().anomalies_by_row(columns, detected_at, n)
+    by_rule = {rule['AnomalyType']: rule for rule in DEFAULT_RULES}
+
+    for i in range(n):
+        row = {feature: float(values[i]) for feature, values in columns.items()}
+        actual = [(a['AnomalyType'], a['Severity'], a['NormalValue'], a['Description']) for a in results[i]]
+        assert actual == baseline_anomalies(row), row
+        for anomaly in results[i]:
+            assert anomaly['ActualValue'] == row[by_rule[anomaly['AnomalyType']]['Feature']]
+            assert anomaly['Recommendation'] == by_rule[anomaly['AnomalyType']]['Recommendation']
+            assert anomaly['DetectedAt'] == detected_at[i] and anomaly['DecidedBy'] == 'rules'
+
+
+def test_device_type_overrides(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'DeviceTypes': {
+        'HVAC': {'TemperatureAnomaly': {'Above': 45, 'CriticalAbove': 60}},
+        'Lighting': {'HighConsumption': {'Enabled': False}}
+    }}), encoding='utf-8')
+    engine = AnomalyRuleEngine.from_file(str(path))
+    columns = {'EnergyConsumption': np.array([350.0, 350.0]), 'Temperature': np.array([42.0, 55.0])}
+
+    def types(device_type):
+        return [[(a['AnomalyType'], a['Severity']) for a in row]
+                for row in engine.anomalies_by_row(columns, ['a', 'b'], 2, device_type)]
+
+    assert types(None) == [[('HighConsumption', 0.7), ('TemperatureAnomaly', 0.7)],
+                           [('HighConsumption', 0.7), ('TemperatureAnomaly', 0.9)]]
+    assert types('HVAC') == [[('HighConsumption', 0.7)],
+                             [('HighConsumption', 0.7), ('TemperatureAnomaly', 0.7)]]
+    assert types('Lighting') == [[('TemperatureAnomaly', 0.7)], [('TemperatureAnomaly', 0.9)]]
+    # Override'lar paylaşılan varsayılan kuralları değiştirmez
+    assert AnomalyRuleEngine.from_file(None).rules == DEFAULT_RULES
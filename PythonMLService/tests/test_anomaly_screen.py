@@ -0,0 +1,96 @@
+"""
+İki aşamalı anomali tespiti: tarama skorları elle hesaplanan medyan/MAD ve pandas çeyrekleri ile
+aynı olmalı; uç değer taramada (DecidedBy 'screen'), kural ihlali kurallarda karar bulmalı.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+import pandas as pd  # pyright: ignore[reportMissingImports]
+
+from anomaly_screen import AnomalyScreen, outside_iqr_fences, robust_z_scores
+from app import ANOMALY_SCREEN_MIN_ROWS, ml_service
+
+
+def test_robust_z_matches_median_mad():
+    rng = np.random.default_rng(3)
+    X = np.column_stack([rng.normal(10, 2, 501), rng.standard_t(3, 501), rng.gamma(2.0, 1.0, 501)])
+    expected = np.zeros(len(X))
+    for j in range(X.shape[1]):
+        column = X[:, j]
+        median = np.median(column)
+        mad = np.median(np.abs(column - median))
+        expected = np.maximum(expected, 0.6745 * np.abs(column - median) / mad)
+    np.testing.assert_allclose(robust_z_scores(X), expected)
+
+
+def test_robust_z_without_spread():
+    # MAD = 0: ortalama mutlak sapmaya düşülür; sabit sütunda sapma sonsuz skor alır
+    mostly_same = np.array([5.0] * 7 + [6.0, 9.0])
+    deviation = np.abs(mostly_same - 5.0)
+    z = robust_z_scores(mostly_same[:, None])
+    np.testing.assert_allclose(z, deviation / (deviation.mean() * 1.2533))
+    assert robust_z_scores(np.array([[1.0], [1.0], [1.0]])).tolist() == [0.0, 0.0, 0.0]
+
+
+def test_iqr_fences_match_pandas_quantiles():
+    rng = np.random.default_rng(4)
+    X = np.column_stack([rng.standard_t(2, 400), rng.normal(0, 1, 400)])
+    frame = pd.DataFrame(X)
+    q1, q3 = frame.quantile(0.25), frame.quantile(0.75)
+    for k in (1.5, 3.0):
+        expected = ((frame < q1 - k * (q3 - q1)) | (frame > q3 + k * (q3 - q1))).any(axis=1).to_numpy()
+        np.testing.assert_array_equal(outside_iqr_fences(X, k), expected)
+
+
+def test_screen_masks_and_severity():
+    screen = AnomalyScreen(z_threshold=3.5, iqr_k=3.0, decisive_z=10.0)
+    rng = np.random.default_rng(5)
+    X = rng.normal(0, 1, (1000, 2))
+    X[10, 0] = 100.0
+    suspects, decisive, z = screen.screen(X)
+    assert np.flatnonzero(decisive).tolist() == [10]
+    assert not (decisive & ~suspects).any()
+    np.testing.assert_array_equal(suspects, (z > 3.5) | outside_iqr_fences(X, 3.0))
+    np.testing.assert_allclose(screen.severity(np.array([10.0, 15.0, 40.0])), [0.5, 0.75, 1.0])
+    np.testing.assert_array_equal(screen.context_rows(100), np.arange(100))
+    rows = screen.context_rows(5000)
+    assert len(rows) == 512 and np.all(np.diff(rows) > 0)
+    np.testing.assert_array_equal(rows, screen.context_rows(5000))
+
+
+def make_history(rows):
+    rng = np.random.default_rng(6)
+    start = datetime(2026, 1, 1)
+    return [{
+        'Date': (start + timedelta(minutes=15 * i)).isoformat(),
+        'EnergyConsumption': float(rng.normal(50, 5)),
+        'PowerConsumption': float(rng.normal(2000, 50)),
+        'Temperature': float(rng.normal(25, 1)),
+        'Voltage': float(rng.normal(230, 2)),
+        'Current': float(rng.normal(8.7, 0.2)),
+        'PowerFactor': float(rng.normal(0.95, 0.01))
+    } for i in range(rows)]
+
+
+def test_detect_anomalies_records_deciding_stage():
+    history = make_history(ANOMALY_SCREEN_MIN_ROWS + 200)
+    history[100]['PowerConsumption'] = 20000.0  # Kural yok, robust z >> decisive_z
+    history[200]['Temperature'] = 55.0  # TemperatureAnomaly kuralı (kritik)
+    anomalies = ml_service.detect_anomalies(history)
+
+    by_date = {}
+    for anomaly in anomalies:
+        by_date.setdefault(anomaly['DetectedAt'], []).append(anomaly)
+    screened = by_date[history[100]['Date']]
+    assert [anomaly['DecidedBy'] for anomaly in screened] == ['screen']
+    assert screened[0]['Severity'] == 1.0
+    ruled = by_date[history[200]['Date']]
+    assert [(anomaly['DecidedBy'], anomaly['AnomalyType']) for anomaly in ruled] == [('rules', 'TemperatureAnomaly')]
+
+    # Isolation Forest sadece taramada şüpheli bulunan satırları skorlar
+    X = pd.DataFrame(history)[['EnergyConsumption', 'PowerConsumption', 'Temperature',
+                               'Voltage', 'Current', 'PowerFactor']].to_numpy()
+    suspects, _, _ = ml_service.anomaly_screen.screen(X)
+    suspect_dates = {history[i]['Date'] for i in np.flatnonzero(suspects)}
+    forest_dates = {anomaly['DetectedAt'] for anomaly in anomalies if anomaly['DecidedBy'] == 'isolation-forest'}
+    assert forest_dates <= suspect_dates
@@ -0,0 +1,51 @@
+"""
+/project-bill: aynı geçmişten gelen üç girdi (ham geçmiş, UseForecast saatlik tahmini ve varsayılan
+/predict-energy çıktısı) aynı birimde ve birbirine yakın tüketim vermeli.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+import pytest  # pyright: ignore[reportMissingImports]
+
+from app import app
+
+TARIFF = {'Name': 'Tek', 'EnergyRate': 1.0}
+
+
+def make_history(rows, readings_per_hour):
+    rng = np.random.default_rng(7)
+    start = datetime(2026, 1, 1)
+    step = timedelta(minutes=60 // readings_per_hour)
+    return [{
+        'Date': (start + i * step).isoformat(),
+        'EnergyConsumption': float(2.0 / readings_per_hour + rng.normal(0, 0.05 / readings_per_hour)),
+        'PowerConsumption': 2000.0,
+        'Voltage': 230.0,
+        'Current': 8.7,
+        'PowerFactor': 0.95,
+        'Temperature': 25.0
+    } for i in range(rows)]
+
+
+def project(client, entry):
+    response = client.post('/project-bill', json={'Tariff': TARIFF, 'Days': 30, 'Devices': [entry]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['Errors'] == []
+    return body['Fleet']['EnergyKWh']
+
+
+@pytest.mark.parametrize('readings_per_hour', [1, 4])
+def test_forecast_and_history_sources_agree(readings_per_hour):
+    history = make_history(120 * readings_per_hour, readings_per_hour)
+    with app.test_client() as client:
+        forecast = client.post('/predict-energy', json={'HistoricalData': history, 'DaysAhead': 30}).get_json()
+        from_history = project(client, {'DeviceId': 1, 'HistoricalData': history})
+        from_hourly = project(client, {'DeviceId': 1, 'HistoricalData': history, 'UseForecast': True})
+        from_default = project(client, {'DeviceId': 1, 'Forecast': forecast,
+                                        'ReadingsPerHour': readings_per_hour})
+
+    # ~2 kWh/saat -> 30 günde ~1440 kWh
+    assert from_history == pytest.approx(1440, rel=0.05)
+    assert from_hourly == pytest.approx(from_history, rel=0.1)
+    assert from_default == pytest.approx(from_history, rel=0.1)
@@ -0,0 +1,82 @@
+"""Yönlendirici: deviceId bölümlemesi ve worker'lar bitirdikçe sıralı batch onayı."""
+import json
+import queue
+
+from consumer import PartitionRouter, partition_of
+
+
+class FakeMethod:
+    def __init__(self, delivery_tag):
+        self.delivery_tag = delivery_tag
+
+
+class FakeChannel:
+    def __init__(self):
+        self.acks = []
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.acks.append((delivery_tag, multiple))
+
+
+def deliveries(start_tag, device_ids):
+    return [(FakeMethod(start_tag + i), json.dumps({'deviceId': device_id, 'energyUsed': 1.0}).encode('utf-8'))
+            for i, device_id in enumerate(device_ids)]
+
+
+def drain(work_queue):
+    items = []
+    while not work_queue.empty():
+        items.append(work_queue.get_nowait())
+    return items
+
+
+def test_partition_is_stable_and_in_range():
+    for device_id in list(range(200)) + ['abc', 'dev-7']:
+        slot = partition_of(device_id, 4)
+        assert 0 <= slot < 4
+        assert slot == partition_of(str(device_id), 4)
+
+
+def test_each_device_goes_to_one_worker():
+    work_queues = [queue.Queue() for _ in range(3)]
+    router = PartitionRouter(work_queues, queue.Queue())
+    router.dispatch(FakeChannel(), deliveries(1, list(range(1, 31)) * 2))
+    for slot, work_queue in enumerate(work_queues):
+        for _, messages in drain(work_queue):
+            assert {partition_of(m['deviceId'], 3) for m in messages} == {slot}
+
+
+def test_batches_are_acked_in_order_after_all_parts_finish():
+    work_queues = [queue.Queue() for _ in range(2)]
+    done_queue = queue.Queue()
+    router = PartitionRouter(work_queues, done_queue)
+    channel = FakeChannel()
+    router.dispatch(channel, deliveries(1, range(10)))   # batch 0, tag 1..10
+    router.dispatch(channel, deliveries(11, range(10)))  # batch 1, tag 11..20
+    parts = [item for work_queue in work_queues for item in drain(work_queue)]
+
+    # Sonraki batch önce biterse onay beklenir (multiple=True önceki teslimatları da onaylardı)
+    for batch_id, _ in parts:
+        if batch_id == 1:
+            done_queue.put(batch_id)
+    router.acknowledge(channel)
+    assert channel.acks == []
+
+    for batch_id, _ in parts:
+        if batch_id == 0:
+            done_queue.put(batch_id)
+    router.acknowledge(channel)
+    assert channel.acks == [(20, True)]
+
+
+def test_batch_without_valid_messages_is_acked_in_turn():
+    done_queue = queue.Queue()
+    router = PartitionRouter([queue.Queue()], done_queue)
+    channel = FakeChannel()
+    router.dispatch(channel, deliveries(1, [5]))
+    router.dispatch(channel, [(FakeMethod(2), b'not json')])
+    router.acknowledge(channel)
+    assert channel.acks == []
+    done_queue.put(0)
+    router.acknowledge(channel)
+    assert channel.acks == [(2, True)]
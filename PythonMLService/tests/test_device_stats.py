@@ -0,0 +1,79 @@
+"""
+DeviceStatsStore: batch'ler halinde (Chan birleştirmesi) ve süreçler arası snapshot birleştirmesiyle
+tutulan istatistikler, tüm okumalar üzerinden NumPy/pandas ile hesaplananlarla aynı olmalı.
+"""
+import numpy as np  # pyright: ignore[reportMissingImports]
+import pandas as pd  # pyright: ignore[reportMissingImports]
+
+from device_stats import DeviceStatsReader, DeviceStatsStore
+
+FEATURES = ['EnergyConsumption', 'Temperature']
+DEVICES = ['1', '2', '3']
+
+
+def random_batches(seed, batches=8):
+    """Düzensiz boyutlu, cihazların karışık geldiği batch'ler"""
+    rng = np.random.default_rng(seed)
+    result = []
+    for _ in range(batches):
+        n = int(rng.integers(1, 40))
+        device_ids = rng.choice(DEVICES, size=n).tolist()
+        X = np.column_stack([rng.gamma(2.0, 1.5, n), rng.normal(25, 3, n)])
+        result.append((device_ids, X))
+    return result
+
+
+def rows_of(batches, device_id):
+    return np.vstack([X[np.asarray(ids) == device_id] for ids, X in batches])
+
+
+def test_batch_merge_matches_numpy():
+    store = DeviceStatsStore(FEATURES, ewma_alpha=0.2)
+    batches = random_batches(3)
+    for device_ids, X in batches:
+        store.update(device_ids, X)
+
+    for device_id in DEVICES:
+        rows = rows_of(batches, device_id)
+        stats = store.get(device_id)
+        assert stats['Count'] == len(rows)
+        for i, feature in enumerate(FEATURES):
+            column = stats['Features'][feature]
+            ewm = pd.Series(rows[:, i]).ewm(alpha=0.2, adjust=False)
+            assert np.isclose(column['Mean'], np.mean(rows[:, i]))
+            assert np.isclose(column['Var'], np.var(rows[:, i], ddof=1))
+            assert np.isclose(column['Min'], rows[:, i].min())
+            assert np.isclose(column['Max'], rows[:, i].max())
+            assert np.isclose(column['Last'], rows[-1, i])
+            assert np.isclose(column['Ewma'], ewm.mean().iloc[-1])
+            recent_var = (pd.Series(rows[:, i] ** 2).ewm(alpha=0.2, adjust=False).mean().iloc[-1]
+                          - ewm.mean().iloc[-1] ** 2)
+            assert np.isclose(column['RecentVar'], max(recent_var, 0.0))
+
+
+def test_snapshots_from_two_processes_merge(tmp_path):
+    first, second = random_batches(11, batches=4), random_batches(12, batches=5)
+    for name, batches, timestamp in (('a', first, 1000.0), ('b', second, 2000.0)):
+        store = DeviceStatsStore(FEATURES, snapshot_dir=str(tmp_path), snapshot_name=name)
+        for device_ids, X in batches:
+            store.update(device_ids, X, timestamps=np.full(len(X), timestamp))
+        store.snapshot()
+
+    reader = DeviceStatsReader(str(tmp_path), reload_interval=0)
+    for device_id in DEVICES:
+        rows = np.vstack([rows_of(first, device_id), rows_of(second, device_id)])
+        latest = rows_of(second, device_id)
+        stats = reader.get(device_id)
+        assert stats['Count'] == len(rows)
+        assert stats['FirstSeen'] == 1000.0 and stats['LastSeen'] == 2000.0
+        for i, feature in enumerate(FEATURES):
+            column = stats['Features'][feature]
+            assert np.isclose(column['Mean'], np.mean(rows[:, i]))
+            assert np.isclose(column['Var'], np.var(rows[:, i], ddof=1))
+            assert np.isclose(column['Min'], rows[:, i].min())
+            assert np.isclose(column['Max'], rows[:, i].max())
+            # Sıraya bağlı alanlar en son veri gören süreçten gelir
+            assert np.isclose(column['Ewma'], pd.Series(latest[:, i]).ewm(alpha=0.1, adjust=False).mean().iloc[-1])
+            assert np.isclose(column['Last'], latest[-1, i])
+
+    assert reader.get('yok') is None
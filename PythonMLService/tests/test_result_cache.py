@@ -0,0 +1,91 @@
+"""
+ResultCache: aynı istek (anahtar sırasından bağımsız) önbellekten dönmeli, TTL dolunca yeniden
+hesaplanmalı; varsayılan hata sonuçları (FallbackResult) önbelleğe alınmamalı.
+"""
+import time
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+from result_cache import FallbackResult, ResultCache, is_cacheable
+
+
+class Counter:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def test_key_is_content_addressed():
+    key = ResultCache.make_key('detect-anomalies', {'DeviceId': 1, 'Data': [{'a': 1, 'b': 2}]})
+    assert key == ResultCache.make_key('detect-anomalies', {'Data': [{'b': 2, 'a': 1}], 'DeviceId': 1})
+    assert key != ResultCache.make_key('optimize-energy', {'DeviceId': 1, 'Data': [{'a': 1, 'b': 2}]})
+    assert key != ResultCache.make_key('detect-anomalies', {'DeviceId': 2, 'Data': [{'a': 1, 'b': 2}]})
+
+    # NumPy dizileri içerikleri ile (object dtype dahil) anahtarlanır
+    values = np.arange(5, dtype=float)
+    assert ResultCache.make_key('x', {'v': values}) == ResultCache.make_key('x', {'v': values.copy()})
+    assert ResultCache.make_key('x', {'v': values}) != ResultCache.make_key('x', {'v': values + 1})
+    names = np.array(['a', 'b'], dtype=object)
+    assert ResultCache.make_key('x', {'v': names}) == ResultCache.make_key('x', {'v': np.array(['a', 'b'], dtype=object)})
+
+
+def test_hit_and_lru_eviction():
+    cache = ResultCache(max_entries=2, ttl=60)
+    compute = Counter({'Score': 1.0})
+    for _ in range(3):
+        assert cache.get_or_compute('e', {'DeviceId': 1}, compute) == {'Score': 1.0}
+    assert compute.calls == 1
+
+    cache.get_or_compute('e', {'DeviceId': 2}, Counter({}))
+    cache.get_or_compute('e', {'DeviceId': 1}, compute)  # 1 en son kullanılan olur
+    cache.get_or_compute('e', {'DeviceId': 3}, Counter({}))  # 2 atılır
+    assert cache.get(ResultCache.make_key('e', {'DeviceId': 1}))[0]
+    assert not cache.get(ResultCache.make_key('e', {'DeviceId': 2}))[0]
+
+    stats = cache.stats()
+    assert stats['Entries'] == 2 and stats['Evictions'] == 1
+    assert stats['Hits'] == 4 and stats['Misses'] == 4
+
+
+def test_ttl_expiry(tmp_path):
+    for disk_dir in (None, str(tmp_path)):
+        cache = ResultCache(ttl=0.05, disk_dir=disk_dir)
+        compute = Counter({'Score': 1.0})
+        cache.get_or_compute('e', {'DeviceId': 1}, compute)
+        cache.get_or_compute('e', {'DeviceId': 1}, compute)
+        assert compute.calls == 1
+        time.sleep(0.1)
+        cache.get_or_compute('e', {'DeviceId': 1}, compute)
+        assert compute.calls == 2
+
+
+def test_fallback_results_are_not_cached():
+    cache = ResultCache(ttl=60)
+    fallback = Counter(FallbackResult({'OverallScore': 0}))
+    for _ in range(2):
+        assert cache.get_or_compute('calculate-efficiency', {'DeviceId': 1}, fallback) == {'OverallScore': 0}
+    assert fallback.calls == 2
+
+    # /analyze-device: alanlardan biri varsayılan sonuçsa birleşik sonuç da önbelleğe alınmaz
+    combined = Counter({'Efficiency': {'OverallScore': 80}, 'Maintenance': FallbackResult({})})
+    cache.get_or_compute('analyze-device', {'DeviceId': 1}, combined)
+    cache.get_or_compute('analyze-device', {'DeviceId': 1}, combined)
+    assert combined.calls == 2
+    assert cache.stats()['Entries'] == 0
+    assert is_cacheable([]) and is_cacheable({'Efficiency': {}})
+
+
+def test_disk_tier_is_shared_between_workers(tmp_path):
+    first = ResultCache(ttl=60, disk_dir=str(tmp_path))
+    second = ResultCache(ttl=60, disk_dir=str(tmp_path))
+    first.get_or_compute('e', {'DeviceId': 1}, Counter({'Score': 2.0}))
+    compute = Counter({'Score': 3.0})
+    assert second.get_or_compute('e', {'DeviceId': 1}, compute) == {'Score': 2.0}
+    assert compute.calls == 0 and second.stats()['DiskHits'] == 1
+
+    first.clear()
+    assert not ResultCache(ttl=60, disk_dir=str(tmp_path)).get(ResultCache.make_key('e', {'DeviceId': 1}))[0]
@@ -0,0 +1,65 @@
+"""
+SharedHistoryArena: halka tampon pencereden uzun yazımda son `window` okumayı, pencere toplamı da
+bu okumaların toplamını vermeli; tablo dolunca en uzun süredir güncellenmeyen cihaz çıkarılmalı.
+"""
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+from shared_history import SharedHistoryArena
+
+FEATURES = ['EnergyConsumption', 'Temperature']
+WINDOW = 16
+
+
+def test_ring_wraparound_keeps_last_window(tmp_path):
+    arena = SharedHistoryArena(str(tmp_path / 'arena'), FEATURES, slots=64, window=WINDOW)
+    rng = np.random.default_rng(5)
+    device_ids, timestamps, rows = [], [], []
+    t = 0
+    # Düzensiz boyutlu batch'ler; bazıları pencereden uzun, cihazlar karışık
+    for n in (3, 7, 20, 1, 11, 16, 5, 40, 2):
+        ids = rng.choice(['1', '2'], size=n).tolist()
+        ts = np.arange(t, t + n, dtype=np.int64) * 1000
+        X = rng.normal(10, 2, (n, len(FEATURES)))
+        arena.append(ids, ts, X)
+        device_ids += ids
+        timestamps.append(ts)
+        rows.append(X)
+        t += n
+    device_ids = np.asarray(device_ids)
+    timestamps, rows = np.concatenate(timestamps), np.vstack(rows)
+
+    for device_id in ('1', '2'):
+        mask = device_ids == device_id
+        expected_ts, expected = timestamps[mask][-WINDOW:], rows[mask][-WINDOW:]
+        history = arena.history(device_id)
+        np.testing.assert_array_equal(history['Date'], expected_ts)
+        for j, feature in enumerate(FEATURES):
+            np.testing.assert_allclose(history[feature], expected[:, j])
+
+        snapshot = arena.snapshot(device_id)
+        assert snapshot['Count'] == WINDOW
+        assert snapshot['Total'] == mask.sum()
+        np.testing.assert_allclose(snapshot['WindowSum'], expected.sum(axis=0))
+
+    # Aynı dosyayı açan başka bir örnek (worker) aynı pencereyi görür
+    reader = SharedHistoryArena(str(tmp_path / 'arena'), FEATURES, slots=64, window=WINDOW)
+    np.testing.assert_array_equal(reader.history('1')['Date'], arena.history('1')['Date'])
+    reader.close()
+    arena.close()
+
+
+def test_full_table_evicts_least_recently_seen(tmp_path):
+    arena = SharedHistoryArena(str(tmp_path / 'arena'), FEATURES, slots=2, window=WINDOW)
+    ones = np.ones((1, len(FEATURES)))
+    arena.append(['a'], [1000], ones)
+    arena.append(['b'], [2000], 2 * ones)
+    arena.append(['a'], [3000], 3 * ones)
+    arena.append(['c'], [4000], 4 * ones)  # 'b' en eskisi: slotu 'c'ye geçer
+
+    assert arena.history('b') is None
+    np.testing.assert_array_equal(arena.history('a')['Date'], [1000, 3000])
+    np.testing.assert_allclose(arena.snapshot('a')['WindowSum'], [4.0, 4.0])
+    snapshot = arena.snapshot('c')
+    assert snapshot['Count'] == 1 and snapshot['Total'] == 1
+    np.testing.assert_allclose(snapshot['WindowSum'], [4.0, 4.0])
+    arena.close()
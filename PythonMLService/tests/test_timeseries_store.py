@@ -0,0 +1,86 @@
+"""
+TimeSeriesStore: gün ve yazıcı bölümlerine dağılmış okumaların aralık okuması, tüm okumaların
+pandas ile filtrelenip zamana göre sıralanmış haliyle aynı olmalı.
+"""
+import os
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+import pandas as pd  # pyright: ignore[reportMissingImports]
+import pytest  # pyright: ignore[reportMissingImports]
+
+from timeseries_store import DAY_MS, TimeSeriesNotFound, TimeSeriesStore, device_key, to_epoch_ms
+
+FEATURES = ['EnergyConsumption', 'Temperature']
+START_MS = to_epoch_ms('2026-03-01T00:00:00Z')
+
+
+def write_random(data_dir, writer_name, seed):
+    """Üç güne yayılmış, cihazları karışık ve zamanı sırasız okumalar"""
+    rng = np.random.default_rng(seed)
+    n = 300
+    device_ids = rng.choice(['1', '2'], size=n).tolist()
+    timestamps = START_MS + rng.integers(0, 3 * DAY_MS, size=n)
+    X = rng.normal(10, 2, (n, len(FEATURES)))
+    store = TimeSeriesStore(data_dir, FEATURES, writer_name=writer_name)
+    store.append(device_ids, timestamps, X)
+    store.close()
+    frame = pd.DataFrame(X, columns=FEATURES)
+    frame.insert(0, 'Date', timestamps)
+    frame.insert(0, 'DeviceId', device_ids)
+    return frame
+
+
+@pytest.fixture
+def written(tmp_path):
+    data_dir = str(tmp_path)
+    frame = pd.concat([write_random(data_dir, 'consumer-0', 1), write_random(data_dir, 'consumer-1', 2)],
+                      ignore_index=True)
+    return data_dir, frame
+
+
+def expected_range(frame, device_id, start_ms, end_ms):
+    selected = frame[(frame['DeviceId'] == device_id) & (frame['Date'] >= start_ms) & (frame['Date'] <= end_ms)]
+    return selected.sort_values('Date', kind='stable')
+
+
+@pytest.mark.parametrize('start_offset, end_offset', [
+    (DAY_MS - 6 * 3_600_000, DAY_MS + 6 * 3_600_000),  # Gün sınırını geçen aralık
+    (0, 3 * DAY_MS),                                    # Tüm günler
+    (DAY_MS + 1, 2 * DAY_MS - 1),                       # Tek günün içi
+])
+def test_range_read_matches_pandas_filter(written, start_offset, end_offset):
+    data_dir, frame = written
+    store = TimeSeriesStore(data_dir, FEATURES)
+    start_ms, end_ms = START_MS + start_offset, START_MS + end_offset
+    for device_id in ('1', '2'):
+        expected = expected_range(frame, device_id, start_ms, end_ms)
+        columns = store.read(device_id, start_ms, end_ms)
+        np.testing.assert_array_equal(columns['Date'], expected['Date'].to_numpy())
+        # Aynı ms'de iki okuma sırasız gelebilir: değerler zaman + değer ile karşılaştırılır
+        for feature in FEATURES:
+            actual = pd.DataFrame({'Date': columns['Date'], feature: columns[feature]}).sort_values(['Date', feature])
+            np.testing.assert_allclose(actual[feature].to_numpy(),
+                                       expected.sort_values(['Date', feature])[feature].to_numpy())
+
+
+def test_partitions_per_day_and_writer(written):
+    data_dir, frame = written
+    names = sorted(os.listdir(os.path.join(data_dir, device_key('1'))))
+    assert names == [f'{day}.{writer}.bin' for day in ('2026-03-01', '2026-03-02', '2026-03-03')
+                     for writer in ('consumer-0', 'consumer-1')]
+    store = TimeSeriesStore(data_dir, FEATURES)
+    assert store.describe('1')['Records'] == (frame['DeviceId'] == '1').sum()
+
+
+def test_truncated_tail_and_missing_device(written):
+    data_dir, frame = written
+    store = TimeSeriesStore(data_dir, FEATURES)
+    path = os.path.join(data_dir, device_key('1'), '2026-03-01.consumer-0.bin')
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * (store.dtype.itemsize // 2))  # Çökme: yarım yazılmış kayıt
+    assert len(store.read('1')['Date']) == (frame['DeviceId'] == '1').sum()
+
+    with pytest.raises(TimeSeriesNotFound):
+        store.read('yok')
+    with pytest.raises(TimeSeriesNotFound):
+        store.read('1', START_MS - 2 * DAY_MS, START_MS - DAY_MS)
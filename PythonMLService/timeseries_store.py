@@ -0,0 +1,213 @@
+"""
+Cihaz bazlı, yalnızca ekleme yapılan (append-only) yerel zaman serisi deposu.
+
+Consumer her okumayı cihazın günlük bölüm dosyasına ekler; analiz endpoint'leri tüm geçmişi
+POST etmek yerine {DeviceId, From, To} ile çağrılabilir ve aralık doğrudan diskten okunur.
+
+Dosya düzeni (kayıt: epoch ms + özellikler, float64, sabit uzunluk):
+    <data_dir>/<cihaz>/<YYYY-MM-DD>.<writer>.bin
+
+- Her yazıcı süreç (consumer süreci / konteyneri) kendi dosyalarına yazar: kilit gerekmez
+- Okuyucu aralığa düşen günlerin tüm yazıcı dosyalarını np.memmap ile açar (kopyasız),
+  zaman aralığını maskeler ve birleştirip zamana göre sıralar
+- Yarım yazılmış son kayıt (çökme) okuma sırasında yok sayılır (dosya boyu // kayıt boyu)
+- retention_days > 0 ise eski gün dosyaları yazıcı tarafından periyodik olarak silinir
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+from structured_log import get_logger
+
+logger = get_logger('timeseries')
+
+PARTITION_SUFFIX = '.bin'
+DAY_MS = 86_400_000
+
+
+class TimeSeriesNotFound(LookupError):
+    """Cihaz için istenen aralıkta kayıt yok"""
+
+
+def device_key(device_id) -> str:
+    """deviceId'yi dizin adında kullanılabilecek anahtara çevirir"""
+    return re.sub(r'[^A-Za-z0-9_-]', '_', str(device_id))
+
+
+def to_epoch_ms(value) -> Optional[int]:
+    """Epoch ms (sayı) ya da ISO tarih metnini epoch ms'e çevirir (None -> None)"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def _day(epoch_ms: int) -> str:
+    return datetime.fromtimestamp(epoch_ms / 1000, timezone.utc).strftime('%Y-%m-%d')
+
+
+class TimeSeriesStore:
+    """
+    Yazıcı (consumer) ve okuyucu (HTTP worker'ları) tarafı aynı sınıf.
+
+    append() sadece bu sürecin writer_name'i ile adlandırılmış dosyalara yazar;
+    read() tüm yazıcıların dosyalarını okur.
+    """
+
+    def __init__(self, data_dir: str, features: Sequence[str], writer_name: str = 'default',
+                 retention_days: int = 0, max_open_files: int = 256):
+        self.data_dir = data_dir
+        self.features = list(features)
+        self.writer_name = writer_name
+        self.retention_days = retention_days
+        self.max_open_files = max_open_files
+        self.dtype = np.dtype([('t', '<i8')] + [(feature, '<f8') for feature in self.features])
+        self._files: 'OrderedDict[str, object]' = OrderedDict()  # Açık dosya tanıtıcıları (LRU)
+        self._lock = threading.Lock()
+        self._pruned_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Yazma (consumer)
+    # ------------------------------------------------------------------
+
+    def _partition_path(self, key: str, day: str, writer: Optional[str] = None) -> str:
+        return os.path.join(self.data_dir, key, f'{day}.{writer or self.writer_name}{PARTITION_SUFFIX}')
+
+    def _handle(self, path: str):
+        handle = self._files.pop(path, None)
+        if handle is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # buffering=0: her write doğrudan dosyaya gider, okuyucular yarım tampon görmez
+            handle = open(path, 'ab', buffering=0)
+            while len(self._files) >= self.max_open_files:
+                self._files.popitem(last=False)[1].close()
+        self._files[path] = handle
+        return handle
+
+    def append(self, device_ids: Sequence, timestamps_ms: np.ndarray, X: np.ndarray) -> None:
+        """
+        Okumaları ekler: device_ids[i], timestamps_ms[i] (epoch ms), X[i] (features sırasıyla)
+
+        Satırlar (cihaz, gün) bölümüne göre gruplanır, her bölüm tek write ile yazılır.
+        """
+        if len(device_ids) == 0:
+            return
+        records = np.empty(len(device_ids), dtype=self.dtype)
+        records['t'] = timestamps_ms
+        for j, feature in enumerate(self.features):
+            records[feature] = X[:, j]
+
+        days = (np.asarray(timestamps_ms, dtype=np.int64) // DAY_MS)
+        rows_by_partition: Dict[tuple, list] = {}
+        for i, (device_id, day) in enumerate(zip(device_ids, days.tolist())):
+            rows_by_partition.setdefault((device_id, day), []).append(i)
+
+        with self._lock:
+            for (device_id, day), rows in rows_by_partition.items():
+                path = self._partition_path(device_key(device_id), _day(day * DAY_MS))
+                self._handle(path).write(records[rows].tobytes())
+        self.maybe_prune()
+
+    def close(self) -> None:
+        with self._lock:
+            while self._files:
+                self._files.popitem()[1].close()
+
+    def maybe_prune(self, interval: float = 3600.0) -> None:
+        """retention_days'ten eski bu yazıcıya ait gün dosyalarını siler (saatte bir)"""
+        if self.retention_days <= 0 or time.monotonic() - self._pruned_at < interval:
+            return
+        self._pruned_at = time.monotonic()
+        cutoff = _day(int(time.time() * 1000) - self.retention_days * DAY_MS)
+        suffix = f'.{self.writer_name}{PARTITION_SUFFIX}'
+        removed = 0
+        with self._lock:
+            for key in self._device_keys():
+                for name in os.listdir(os.path.join(self.data_dir, key)):
+                    if name.endswith(suffix) and name[:10] < cutoff:
+                        path = os.path.join(self.data_dir, key, name)
+                        handle = self._files.pop(path, None)
+                        if handle is not None:
+                            handle.close()
+                        os.remove(path)
+                        removed += 1
+        if removed:
+            logger.info("✓ Zaman serisi deposu: %d eski gün dosyası silindi (< %s)", removed, cutoff)
+
+    def _device_keys(self) -> Iterable[str]:
+        try:
+            return [entry.name for entry in os.scandir(self.data_dir) if entry.is_dir()]
+        except FileNotFoundError:
+            return []
+
+    # ------------------------------------------------------------------
+    # Okuma (HTTP worker'ları)
+    # ------------------------------------------------------------------
+
+    def _records(self, path: str) -> np.ndarray:
+        """Bölüm dosyasını kopyasız açar (yarım son kayıt hariç)"""
+        count = os.path.getsize(path) // self.dtype.itemsize
+        if count == 0:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(path, dtype=self.dtype, mode='r', shape=(count,))
+
+    def read(self, device_id, start_ms: Optional[int] = None, end_ms: Optional[int] = None
+             ) -> Dict[str, np.ndarray]:
+        """
+        [start_ms, end_ms] aralığındaki okumaları sütun sözlüğü olarak döndürür:
+        {'Date': epoch ms, <özellik>: float64, ...} (zamana göre sıralı, to_frame ile uyumlu)
+
+        Kayıt yoksa TimeSeriesNotFound.
+        """
+        directory = os.path.join(self.data_dir, device_key(device_id))
+        start_day = _day(start_ms) if start_ms is not None else ''
+        end_day = _day(end_ms) if end_ms is not None else '9999-99-99'
+        try:
+            names = sorted(name for name in os.listdir(directory)
+                           if name.endswith(PARTITION_SUFFIX) and start_day <= name[:10] <= end_day)
+        except FileNotFoundError:
+            names = []
+
+        parts = []
+        for name in names:
+            records = self._records(os.path.join(directory, name))
+            if len(records) == 0:
+                continue
+            t = records['t']
+            mask = np.ones(len(records), dtype=bool)
+            if start_ms is not None:
+                mask &= t >= start_ms
+            if end_ms is not None:
+                mask &= t <= end_ms
+            parts.append(records[mask])  # Maskeleme kopya üretir, memmap burada bırakılır
+
+        if not parts or sum(len(part) for part in parts) == 0:
+            raise TimeSeriesNotFound(f'Cihaz için zaman serisi kaydı bulunamadı: {device_id}')
+        records = np.concatenate(parts)
+        records = records[np.argsort(records['t'], kind='stable')]
+        columns = {'Date': records['t'].copy()}
+        for feature in self.features:
+            columns[feature] = records[feature].copy()
+        return columns
+
+    def describe(self, device_id) -> Dict[str, object]:
+        """Cihazın gün bölümleri ve toplam kayıt sayısı"""
+        directory = os.path.join(self.data_dir, device_key(device_id))
+        try:
+            names = sorted(name for name in os.listdir(directory) if name.endswith(PARTITION_SUFFIX))
+        except FileNotFoundError:
+            names = []
+        days: Dict[str, int] = {}
+        for name in names:
+            days[name[:10]] = days.get(name[:10], 0) + os.path.getsize(os.path.join(directory, name)) // self.dtype.itemsize
+        return {'DeviceId': device_id, 'Records': sum(days.values()), 'Days': days}
@@ -3,14 +3,29 @@
 """
 Canlı Veri Üretici - Aygaz Smart Energy
 Sürekli olarak gerçek zamanlı test verileri gönderir
+
+Kullanım:
+    python canli_veri_uret.py                                   # Sürekli mod (3 saniyede bir tur)
+    python canli_veri_uret.py --load --rate 5000 --devices 2000 # Yük testi modu (hedef hız, canlı gecikme)
+    python canli_veri_uret.py --rabbitmq --rate 5000            # API'siz: doğrudan RabbitMQ, uçtan uca gecikme
+    python canli_veri_uret.py --load --help                     # Tüm yük testi seçenekleri
 """
 
 import requests
 import time
 import random
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 import sys
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from requests.adapters import HTTPAdapter
 
 # API URL
 API_URL = "http://localhost:5001/api/IoT/sensor-data"
@@ -135,8 +150,518 @@ def send_sensor_data(data):
         print(f"✗ İstek hatası: {e}")
         return False
 
+# ============================================================================
+# Yük Testi Modu (hedef hız, keep-alive bağlantı havuzu, canlı gecikme histogramı)
+# ============================================================================
+
+LOAD_BUCKETS_PER_OCTAVE = 16  # Histogram çözünürlüğü: ~%4.4 genişlikte logaritmik kovalar
+LOAD_LATE_THRESHOLD = 0.1  # Planlanan zamandan bu kadar (saniye) geç gönderilen istek "gecikmeli" sayılır
+LOAD_FLUSH_INTERVAL = 0.25  # Yük süreçlerinin ara istatistik gönderme aralığı (saniye)
+
+
+class LatencyHistogram:
+    """
+    Logaritmik kovalı gecikme histogramı (mikro saniye çözünürlüğünde).
+
+    Kova sayısı değer aralığına göre sınırlıdır (1 µs - 1 saat ~ 500 kova); süreçler arası
+    sadece dolu kovalar {kova: adet} olarak taşınır ve toplanır.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.max_ms = 0.0
+
+    @staticmethod
+    def _bucket(ms):
+        return int(math.log2(max(ms * 1000, 1.0)) * LOAD_BUCKETS_PER_OCTAVE)
+
+    @staticmethod
+    def _bucket_upper_ms(bucket):
+        return 2 ** ((bucket + 1) / LOAD_BUCKETS_PER_OCTAVE) / 1000
+
+    def record(self, ms):
+        bucket = self._bucket(ms)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def merge(self, counts, max_ms):
+        for bucket, count in counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+            self.total += count
+        self.max_ms = max(self.max_ms, max_ms)
+
+    def percentile(self, percent):
+        """Yüzdelik değeri (kova üst sınırı, ms)"""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * percent / 100)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._bucket_upper_ms(bucket), self.max_ms)
+        return self.max_ms
+
+    def bars(self, width=50, rows=12):
+        """Histogramı ASCII çubuklar olarak döndürür (kovalar rows satıra birleştirilir)"""
+        if not self.total:
+            return []
+        buckets = sorted(self.counts)
+        step = max(1, math.ceil((buckets[-1] - buckets[0] + 1) / rows))
+        groups = {}
+        for bucket in buckets:
+            group = (bucket - buckets[0]) // step
+            groups[group] = groups.get(group, 0) + self.counts[bucket]
+        peak = max(groups.values())
+        lines = []
+        for group in range(max(groups) + 1):
+            count = groups.get(group, 0)
+            upper = self._bucket_upper_ms(buckets[0] + (group + 1) * step - 1)
+            bar = "█" * max(1 if count else 0, round(count / peak * width))
+            lines.append(f"  ≤{upper:>9.2f} ms | {bar} {count}")
+        return lines
+
+
+def build_virtual_devices(count, use_unique_ids, id_start):
+    """
+    Sanal cihaz listesi: her sanal cihazın kendi sensör adı vardır.
+
+    use_unique_ids=False: sanal cihazlar API'deki gerçek cihazlara round-robin eşlenir
+    (veritabanında olmayan deviceId göndermemek için); True: id_start'tan başlayan ardışık id'ler
+    """
+    if not use_unique_ids:
+        get_active_devices()
+    virtual = []
+    for i in range(count):
+        if use_unique_ids:
+            device_id = id_start + i
+        else:
+            device_id = devices[i % len(devices)].get("id", 1)
+        virtual.append((device_id, f"Sanal_Cihaz_{i:05d}_Sensor"))
+    return virtual
+
+
+def _load_process(index, options, virtual_devices, start_at, results, stop_event):
+    """
+    Tek yük süreci: threads kadar thread, her biri kendi keep-alive Session'ı ile.
+
+    İstek i'nin planlanan zamanı start_at + i / hız'dır (sabit hız, kümülatif planlama);
+    thread boşalınca sıradaki planlı isteği alır. Süreç LOAD_FLUSH_INTERVAL aralıklarla
+    ara istatistiklerini ana sürece gönderir.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C ana süreçte yakalanır
+    processes = options["processes"]
+    rate = options["rate"] / processes
+    threads = max(1, math.ceil(options["concurrency"] / processes))
+    end_at = start_at + options["duration"] if options["duration"] > 0 else float("inf")
+    offset = index / options["rate"]  # Süreçlerin istekleri zaman ekseninde iç içe geçer
+    counter = itertools.count()
+    lock = threading.Lock()
+    state = {"histogram": LatencyHistogram(), "ok": 0, "errors": {}, "late": 0, "anomaly": 0}
+    anomaly_types = ["high_temperature", "low_voltage", "high_voltage",
+                     "high_consumption", "low_power_factor", "critical"]
+
+    def worker():
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        session.headers.update({"Content-Type": "application/json"})
+        while not stop_event.is_set():
+            i = next(counter)
+            due = start_at + offset + i / rate
+            if due >= end_at or time.time() >= end_at:
+                break
+            delay = due - time.time()
+            if delay > 0:
+                if stop_event.wait(delay):
+                    break
+            late = -delay > LOAD_LATE_THRESHOLD
+
+            device_id, sensor_name = virtual_devices[(i * processes + index) % len(virtual_devices)]
+            is_anomaly = random.random() < options["anomaly_rate"]
+            if is_anomaly:
+                data = generate_anomaly_data(device_id, sensor_name, random.choice(anomaly_types))
+            else:
+                data = generate_normal_data(device_id, sensor_name)
+            body = json.dumps(data)
+
+            sent_at = time.perf_counter()
+            try:
+                response = session.post(options["url"], data=body, timeout=options["timeout"])
+                error = None if response.status_code < 400 else f"HTTP {response.status_code}"
+                response.content  # Yanıt gövdesi okunur: bağlantı havuza geri döner
+            except requests.Timeout:
+                error = "Zaman aşımı"
+            except requests.RequestException as e:
+                error = type(e).__name__
+            elapsed_ms = (time.perf_counter() - sent_at) * 1000
+
+            with lock:
+                state["histogram"].record(elapsed_ms)
+                if error is None:
+                    state["ok"] += 1
+                else:
+                    state["errors"][error] = state["errors"].get(error, 0) + 1
+                state["late"] += late
+                state["anomaly"] += is_anomaly
+
+    def flush():
+        with lock:
+            snapshot = {
+                "counts": state["histogram"].counts, "max_ms": state["histogram"].max_ms,
+                "ok": state["ok"], "errors": state["errors"], "late": state["late"], "anomaly": state["anomaly"]
+            }
+            state.update({"histogram": LatencyHistogram(), "ok": 0, "errors": {}, "late": 0, "anomaly": 0})
+        results.put(snapshot)
+
+    pool = [threading.Thread(target=worker, daemon=True) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    next_flush = time.time() + LOAD_FLUSH_INTERVAL
+    while any(thread.is_alive() for thread in pool):
+        for thread in pool:
+            thread.join(max(0.0, next_flush - time.time()))
+        if time.time() >= next_flush:
+            flush()
+            next_flush += LOAD_FLUSH_INTERVAL
+    flush()
+    results.put(None)  # Süreç bitti
+
+
+def _print_interval(elapsed, interval_seconds, interval, total, target_rate):
+    sent = interval["ok"] + interval["errors_total"]
+    rate = sent / interval_seconds if interval_seconds > 0 else 0
+    histogram = interval["histogram"]
+    error_rate = interval["errors_total"] / sent * 100 if sent else 0
+    print(f"[{elapsed:6.1f}s] {rate:7.0f}/s (hedef {target_rate:.0f}) | "
+          f"p50 {histogram.percentile(50):7.1f} ms  p95 {histogram.percentile(95):7.1f} ms  "
+          f"p99 {histogram.percentile(99):7.1f} ms  max {histogram.max_ms:7.1f} ms | "
+          f"hata %{error_rate:.2f} | gecikmeli {interval['late']} | toplam {total['ok'] + total['errors_total']}")
+
+
+def _empty_stats():
+    return {"histogram": LatencyHistogram(), "ok": 0, "errors": {}, "errors_total": 0, "late": 0, "anomaly": 0}
+
+
+def _add_snapshot(stats, snapshot):
+    stats["histogram"].merge(snapshot["counts"], snapshot["max_ms"])
+    stats["ok"] += snapshot["ok"]
+    stats["late"] += snapshot["late"]
+    stats["anomaly"] += snapshot["anomaly"]
+    for error, count in snapshot["errors"].items():
+        stats["errors"][error] = stats["errors"].get(error, 0) + count
+        stats["errors_total"] += count
+
+
+def run_load_test(args):
+    """
+    Hedef hızda (rate istek/sn) sürekli yük üretir.
+
+    - processes süreç x (concurrency / processes) thread: requests GIL nedeniyle tek süreçte
+      ~1-2k istek/sn ile sınırlı olduğundan yük süreçlere bölünür
+    - Her thread kendi keep-alive Session'ını kullanır (istek başına yeni bağlantı açılmaz)
+    - Gecikme isteğin gönderildiği andan yanıtın okunmasına kadardır; planlanan zamandan
+      LOAD_LATE_THRESHOLD'dan geç gönderilen istekler "gecikmeli" sayılır (istemci/servis hedef hıza yetişemiyor)
+    """
+    virtual_devices = build_virtual_devices(args.devices, args.unique_device_ids, args.device_id_start)
+    if not virtual_devices:
+        print("✗ Hiç cihaz bulunamadı!")
+        sys.exit(1)
+
+    options = {
+        "url": args.url, "rate": args.rate, "concurrency": args.concurrency, "processes": args.processes,
+        "duration": args.duration, "timeout": args.timeout, "anomaly_rate": args.anomaly_rate,
+        "report_interval": args.report_interval
+    }
+    duration_text = f"{args.duration:.0f} sn" if args.duration > 0 else "Ctrl+C ile durdurulana kadar"
+    print(f"Yük testi: {args.rate:.0f} istek/sn, {len(virtual_devices)} sanal cihaz, "
+          f"{args.processes} süreç x {math.ceil(args.concurrency / args.processes)} eşzamanlı istek, {duration_text}")
+    print(f"Hedef: {args.url}\n")
+
+    results = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    start_at = time.time() + 0.5  # Süreçlerin başlaması için kısa pay
+    workers = [
+        multiprocessing.Process(target=_load_process,
+                                args=(i, options, virtual_devices, start_at, results, stop_event), daemon=True)
+        for i in range(args.processes)
+    ]
+    for process in workers:
+        process.start()
+
+    total, interval = _empty_stats(), _empty_stats()
+    running = len(workers)
+    last_report = start_at
+    try:
+        while running:
+            try:
+                snapshot = results.get(timeout=0.2)
+            except queue.Empty:
+                snapshot = False
+            if snapshot is None:
+                running -= 1
+            elif snapshot:
+                _add_snapshot(total, snapshot)
+                _add_snapshot(interval, snapshot)
+            now = time.time()
+            if now >= start_at and now - last_report >= args.report_interval:
+                _print_interval(now - start_at, now - last_report, interval, total, args.rate)
+                interval, last_report = _empty_stats(), now
+    except KeyboardInterrupt:
+        print("\n→ Durduruluyor, devam eden istekler bekleniyor...")
+        stop_event.set()
+        while running:
+            try:
+                snapshot = results.get(timeout=args.timeout + 2)
+            except queue.Empty:
+                break
+            if snapshot is None:
+                running -= 1
+            else:
+                _add_snapshot(total, snapshot)
+    for process in workers:
+        process.join(5)
+
+    elapsed = max(time.time() - start_at, 1e-9)
+    sent = total["ok"] + total["errors_total"]
+    histogram = total["histogram"]
+    print(f"\n✓ Yük testi bitti - {sent} istek, ortalama {sent / elapsed:.0f}/s "
+          f"(Başarılı: {total['ok']}, Başarısız: {total['errors_total']}, Anomali verisi: {total['anomaly']}, "
+          f"Gecikmeli: {total['late']})")
+    _print_latency_summary("Gecikme", histogram)
+    if total["errors"]:
+        print("  Hatalar: " + ", ".join(f"{error}: {count}" for error, count in
+                                      sorted(total["errors"].items(), key=lambda item: -item[1])))
+    for line in histogram.bars():
+        print(line)
+
+
+def _print_latency_summary(label, histogram):
+    print(f"  {label}: p50 {histogram.percentile(50):.1f} ms | p95 {histogram.percentile(95):.1f} ms | "
+          f"p99 {histogram.percentile(99):.1f} ms | p99.9 {histogram.percentile(99.9):.1f} ms | max {histogram.max_ms:.1f} ms")
+
+
+# ============================================================================
+# RabbitMQ Yük Modu (API'yi atlayarak ML consumer'ını doğrudan ölçer)
+# ============================================================================
+
+def build_sensor_message(device_id, sensor_name, anomaly_rate):
+    """
+    .NET API'nin sensor-data kuyruğuna yazdığı mesajın aynısı (IoTController.PostSensorData).
+
+    recordedAt yayın anındaki UTC zamanıdır; ML servisi efficiency_score sonucunda
+    geri döndürdüğü için uçtan uca gecikme ml-results kuyruğundan ölçülür.
+    """
+    if random.random() < anomaly_rate:
+        data = generate_anomaly_data(device_id, sensor_name)
+    else:
+        data = generate_normal_data(device_id, sensor_name)
+    power = data["energyUsage"]
+    return {
+        "deviceId": device_id,
+        "sensorName": sensor_name,
+        "temperature": data["temperature"],
+        "gasLevel": data["gasLevel"],
+        "voltage": data["voltage"],
+        "current": data["current"],
+        "energyUsed": power / 1000.0,  # .NET CalculateEnergyUsed ile aynı (1 saatlik kWh)
+        "powerConsumption": power,
+        "powerFactor": data["powerFactor"],
+        "recordedAt": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def run_rabbitmq_load(args):
+    """
+    sensor-data mesajlarını doğrudan aygaz.sensors exchange'ine yayınlar ve ml-results
+    kuyruğundan sonuçları okuyarak uçtan uca (yayın -> ML consumer -> ml-results) gecikmeyi ölçer.
+
+    - Yayın tek bağlantı üzerinden hedef hızda, o ana kadar planlanmış mesajlar en fazla
+      batch_size'lık gruplar halinde yapılır (her grup sonrası I/O tek seferde boşaltılır)
+    - Her mesaj tek bir efficiency_score sonucu üretir; gecikme = sonucun okunduğu an - recordedAt
+    - Bu çalıştırmadan önce kaydedilmiş (eski) sonuçlar ölçüme katılmaz
+    """
+    try:
+        import pika
+    except ImportError:
+        print("✗ RabbitMQ modu için pika gerekli: pip install pika")
+        sys.exit(1)
+
+    virtual_devices = build_virtual_devices(args.devices, args.unique_device_ids, args.device_id_start)
+    if not virtual_devices:
+        print("✗ Hiç cihaz bulunamadı!")
+        sys.exit(1)
+
+    def connect():
+        return pika.BlockingConnection(pika.ConnectionParameters(
+            host=args.rabbitmq_host, port=args.rabbitmq_port,
+            credentials=pika.PlainCredentials(args.rabbitmq_user, args.rabbitmq_pass),
+            heartbeat=60
+        ))
+
+    publish_connection = connect()
+    channel = publish_connection.channel()
+    channel.exchange_declare(exchange=args.exchange, exchange_type="topic", durable=True)
+    properties = pika.BasicProperties(delivery_mode=2, content_type="application/json")  # .NET: Persistent
+
+    run_started = datetime.now(timezone.utc)
+    lock = threading.Lock()
+    results = {"histogram": LatencyHistogram(), "interval": LatencyHistogram(), "efficiency": 0, "anomaly": 0,
+               "other": 0, "stale": 0}
+    consumer_ready = threading.Event()
+    consumer_state = {}
+
+    def on_result(result_channel, method, header, body):
+        received = datetime.now(timezone.utc)
+        try:
+            message = json.loads(body)
+            result_type = message.get("resultType")
+            recorded_at = (message.get("resultData") or {}).get("recordedAt")
+        except ValueError:
+            result_type, recorded_at = None, None
+        with lock:
+            if result_type == "anomaly_detection":
+                results["anomaly"] += 1
+            elif result_type != "efficiency_score" or not recorded_at:
+                results["other"] += 1
+            else:
+                recorded = datetime.fromisoformat(recorded_at.replace("Z", "+00:00"))
+                if recorded.tzinfo is None:
+                    recorded = recorded.replace(tzinfo=timezone.utc)
+                if recorded < run_started:
+                    results["stale"] += 1  # Önceki çalıştırmalardan kalan sonuç
+                    return
+                latency_ms = (received - recorded).total_seconds() * 1000
+                results["efficiency"] += 1
+                results["histogram"].record(latency_ms)
+                results["interval"].record(latency_ms)
+
+    def consume_results():
+        connection = connect()
+        result_channel = connection.channel()
+        result_channel.queue_declare(queue=args.results_queue, durable=True)
+        result_channel.basic_qos(prefetch_count=1000)
+        result_channel.basic_consume(queue=args.results_queue, on_message_callback=on_result, auto_ack=True)
+        consumer_state.update(connection=connection, channel=result_channel)
+        consumer_ready.set()
+        try:
+            result_channel.start_consuming()
+        finally:
+            connection.close()
+
+    consumer_thread = threading.Thread(target=consume_results, daemon=True)
+    consumer_thread.start()
+    if not consumer_ready.wait(10):
+        print(f"✗ {args.results_queue} kuyruğu dinlenemedi")
+        sys.exit(1)
+
+    duration_text = f"{args.duration:.0f} sn" if args.duration > 0 else "Ctrl+C ile durdurulana kadar"
+    print(f"RabbitMQ yük testi: {args.rate:.0f} mesaj/sn, {len(virtual_devices)} sanal cihaz, "
+          f"batch {args.batch_size}, {duration_text}")
+    print(f"Yayın: {args.exchange} / {args.routing_key} | Sonuçlar: {args.results_queue}\n")
+
+    published = 0
+    started = time.time()
+    end_at = started + args.duration if args.duration > 0 else float("inf")
+    last_report, last_published, last_received = started, 0, 0
+    try:
+        while time.time() < end_at:
+            now = time.time()
+            due = int((now - started) * args.rate)
+            while published < due:
+                for _ in range(min(args.batch_size, due - published)):
+                    device_id, sensor_name = virtual_devices[published % len(virtual_devices)]
+                    body = json.dumps(build_sensor_message(device_id, sensor_name, args.anomaly_rate))
+                    channel.basic_publish(args.exchange, args.routing_key, body, properties)
+                    published += 1
+                publish_connection.process_data_events(0)  # Heartbeat + ağ tamponunu boşalt
+
+            if now - last_report >= args.report_interval:
+                with lock:
+                    received = results["efficiency"]
+                    interval, results["interval"] = results["interval"], LatencyHistogram()
+                elapsed = now - last_report
+                print(f"[{now - started:6.1f}s] yayın {(published - last_published) / elapsed:7.0f}/s "
+                      f"(hedef {args.rate:.0f}) | sonuç {(received - last_received) / elapsed:7.0f}/s | "
+                      f"uçtan uca p50 {interval.percentile(50):7.1f} ms  p95 {interval.percentile(95):7.1f} ms  "
+                      f"p99 {interval.percentile(99):7.1f} ms | bekleyen {published - received}")
+                last_report, last_published, last_received = now, published, received
+
+            next_due = started + (published + 1) / args.rate
+            time.sleep(max(0.0, min(next_due, end_at) - time.time()))
+    except KeyboardInterrupt:
+        print("\n→ Yayın durduruldu")
+
+    elapsed = time.time() - started
+    publish_connection.close()
+
+    # Kalan sonuçları bekle
+    deadline = time.time() + args.drain_seconds
+    while time.time() < deadline:
+        with lock:
+            if results["efficiency"] >= published:
+                break
+        time.sleep(0.1)
+    connection = consumer_state["connection"]
+    connection.add_callback_threadsafe(consumer_state["channel"].stop_consuming)
+    consumer_thread.join(5)
+
+    with lock:
+        histogram = results["histogram"]
+        print(f"\n✓ {published} mesaj yayınlandı ({published / max(elapsed, 1e-9):.0f}/s), "
+              f"{results['efficiency']} verimlilik sonucu alındı "
+              f"(eksik: {max(0, published - results['efficiency'])}, anomali sonucu: {results['anomaly']}, "
+              f"eski çalıştırmadan: {results['stale']})")
+        _print_latency_summary("Uçtan uca gecikme", histogram)
+        for line in histogram.bars():
+            print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Aygaz Smart Energy canlı veri üretici")
+    parser.add_argument("--load", action="store_true", help="Yük testi modu (hedef hız, eşzamanlı istekler)")
+    parser.add_argument("--rabbitmq", action="store_true",
+                        help="API yerine doğrudan RabbitMQ'ya yayınla ve ml-results'tan uçtan uca gecikmeyi ölç")
+    parser.add_argument("--url", default=API_URL, help="Sensör verisi endpoint'i")
+    parser.add_argument("--rate", type=float, default=5000, help="Hedef istek/sn")
+    parser.add_argument("--devices", type=int, default=2000, help="Sanal cihaz sayısı")
+    parser.add_argument("--concurrency", type=int, default=256, help="Toplam eşzamanlı (uçuştaki) istek")
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Yükün bölüneceği süreç sayısı")
+    parser.add_argument("--duration", type=float, default=60, help="Test süresi (sn, 0 = durdurulana kadar)")
+    parser.add_argument("--timeout", type=float, default=5, help="İstek zaman aşımı (sn)")
+    parser.add_argument("--anomaly-rate", type=float, default=0.15, help="Anomali verisi oranı (0-1)")
+    parser.add_argument("--report-interval", type=float, default=2, help="Canlı rapor aralığı (sn)")
+    parser.add_argument("--unique-device-ids", action="store_true",
+                        help="Her sanal cihaza ayrı deviceId ver (veritabanında bu id'ler olmalı)")
+    parser.add_argument("--device-id-start", type=int, default=1, help="--unique-device-ids için ilk id")
+    rabbitmq = parser.add_argument_group("RabbitMQ modu")
+    rabbitmq.add_argument("--rabbitmq-host", default=os.getenv("RABBITMQ_HOST", "localhost"))
+    rabbitmq.add_argument("--rabbitmq-port", type=int, default=int(os.getenv("RABBITMQ_PORT", "5672")))
+    rabbitmq.add_argument("--rabbitmq-user", default=os.getenv("RABBITMQ_USER", "guest"))
+    rabbitmq.add_argument("--rabbitmq-pass", default=os.getenv("RABBITMQ_PASS", "guest"))
+    rabbitmq.add_argument("--exchange", default=os.getenv("RABBITMQ_EXCHANGE", "aygaz.sensors"))
+    rabbitmq.add_argument("--routing-key", default="sensor.sensor-data")
+    rabbitmq.add_argument("--results-queue", default=os.getenv("RABBITMQ_RESULTS_QUEUE", "ml-results"))
+    rabbitmq.add_argument("--batch-size", type=int, default=100, help="Tek seferde yayınlanan en fazla mesaj")
+    rabbitmq.add_argument("--drain-seconds", type=float, default=15,
+                          help="Yayın bittikten sonra sonuçlar için bekleme süresi (sn)")
+    return parser.parse_args(argv)
+
+
 def main():
     """Ana fonksiyon"""
+    args = parse_args()
+    if args.rabbitmq:
+        run_rabbitmq_load(args)
+        return
+    if args.load:
+        run_load_test(args)
+        return
+    
     # Aktif cihazları al
     get_active_devices()
     